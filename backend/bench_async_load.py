@@ -0,0 +1,145 @@
+"""
+Prueba de carga: ¿siguen respondiendo los endpoints de la UI con upstreams lentos?
+
+Levanta un TMDB/AIOStreams falso que tarda --delay segundos en responder y lanza
+--concurrency peticiones simultáneas a /api/streams (IDs distintos para que la
+caché no las agrupe). Mientras tanto mide la latencia de /api/status, un endpoint
+sync barato que corre en el threadpool de FastAPI.
+
+  - async: /api/streams tal como está (async def + cliente httpx compartido)
+  - sync:  un endpoint equivalente con requests bloqueante (el diseño anterior),
+           registrado solo para esta prueba, para comparar
+
+Los dos upstreams falsos comparten host, así que en modo async el límite por
+host (http_async.PER_HOST_LIMIT) marca el throughput de las peticiones lentas.
+
+Uso: python bench_async_load.py [--concurrency 120] [--delay 2] [--mode both]
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import requests
+
+import config as config_module
+import main
+from tmdb_client import get_tmdb_client
+
+
+class SlowUpstream(BaseHTTPRequestHandler):
+    """TMDB y AIOStreams falsos: responden después de `delay` segundos."""
+    protocol_version = "HTTP/1.1"
+    delay = 2.0
+
+    def do_GET(self):
+        time.sleep(SlowUpstream.delay)
+        if "/external_ids" in self.path:
+            body = {"imdb_id": None}
+        else:
+            body = {"streams": [{"name": "⚡ 1080p", "description": "Movie.2020.1080p.mkv", "url": "http://x"}]}
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_upstream(delay: float) -> tuple:
+    SlowUpstream.delay = delay
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowUpstream)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def install_sync_baseline(upstream: str):
+    """Endpoint con el diseño anterior (def + requests bloqueante) para comparar."""
+    @main.app.get("/bench/sync-streams/{tmdb_id}")
+    def sync_streams(tmdb_id: str):
+        requests.get(f"{upstream}/3/movie/{tmdb_id}/external_ids", timeout=30)
+        return requests.get(f"{upstream}/stream/movie/tmdb:{tmdb_id}.json", timeout=30).json()
+
+
+def percentile(samples: list, p: float) -> float:
+    samples = sorted(samples)
+    return round(samples[min(len(samples) - 1, int(len(samples) * p))] * 1000, 1) if samples else 0.0
+
+
+async def run_load(client: httpx.AsyncClient, path_fmt: str, concurrency: int, offset: int) -> dict:
+    probes = []
+    done = asyncio.Event()
+
+    async def probe():
+        while not done.is_set():
+            t0 = time.perf_counter()
+            r = await client.get("/api/status")
+            r.raise_for_status()
+            probes.append(time.perf_counter() - t0)
+            await asyncio.sleep(0.05)
+
+    async def slow_call(i: int):
+        t0 = time.perf_counter()
+        r = await client.get(path_fmt.format(id=offset + i))
+        return r.status_code, time.perf_counter() - t0
+
+    prober = asyncio.ensure_future(probe())
+    started = time.perf_counter()
+    results = await asyncio.gather(*[slow_call(i) for i in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    done.set()
+    await prober
+
+    slow = [t for _, t in results]
+    return {
+        "slow_requests": concurrency,
+        "slow_ok": sum(1 for status, _ in results if status == 200),
+        "slow_p50_ms": percentile(slow, 0.5),
+        "wall_s": round(elapsed, 2),
+        "ui_probes": len(probes),
+        "ui_p50_ms": percentile(probes, 0.5),
+        "ui_p99_ms": percentile(probes, 0.99),
+        "ui_max_ms": percentile(probes, 1.0),
+    }
+
+
+async def bench(args) -> dict:
+    server, upstream = start_upstream(args.delay)
+    config_module.config = {"tmdb": {"api_key": "bench"}, "aiostreams": {"url": upstream}}
+    main.TMDB_API_KEY = "bench"
+    get_tmdb_client().base_url = f"{upstream}/3"
+    main.id_map._store.path = os.path.join(tempfile.mkdtemp(), "id_map.json")
+    install_sync_baseline(upstream)
+
+    result = {"concurrency": args.concurrency, "delay_s": args.delay}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        result["idle"] = await run_load(client, "/api/status?n={id}", 1, 0)
+        if args.mode in ("async", "both"):
+            result["async"] = await run_load(client, "/api/streams/movie/{id}", args.concurrency, 1000)
+        if args.mode in ("sync", "both"):
+            result["sync"] = await run_load(client, "/bench/sync-streams/{id}", args.concurrency, 2000)
+    server.shutdown()
+    return result
+
+
+def main_cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=120)
+    parser.add_argument("--delay", type=float, default=2.0, help="Segundos que tarda el upstream falso")
+    parser.add_argument("--mode", choices=("async", "sync", "both"), default="both")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(bench(args)), indent=2, sort_keys=True, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main_cli()
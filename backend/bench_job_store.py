@@ -0,0 +1,83 @@
+"""
+Benchmark: escrituras a disco de active_jobs con 100 trabajos concurrentes.
+
+Compara el save_jobs() histórico (json.dump en cada actualización de estado)
+contra JobStore/SQLiteJobStore con escrituras agrupadas.
+
+Uso: python bench_job_store.py [--jobs 100] [--seconds 5]
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+from job_store import JobStore, SQLiteJobStore
+
+
+def simulate(save, jobs: dict, n_jobs: int, seconds: float, tick: float = 1.0):
+    """Cada trabajo actualiza su estado una vez por `tick` (como on_status_update)."""
+    stop = time.time() + seconds
+
+    def worker(job_id):
+        i = 0
+        while time.time() < stop:
+            i += 1
+            jobs[job_id]["status"] = "Searching"
+            jobs[job_id]["message"] = f"Buscando '{job_id}.mkv'... ({i}s)"
+            save()
+            time.sleep(tick)
+
+    for n in range(n_jobs):
+        jobs[f"job{n}"] = {"title": f"Job {n}", "status": "Searching", "req": {"filename": f"job{n}.mkv", "tmdb_id": n}}
+    threads = [threading.Thread(target=worker, args=(f"job{n}",)) for n in range(n_jobs)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--tick", type=float, default=0.1, help="Segundos entre actualizaciones por trabajo (producción: 1)")
+    args = parser.parse_args()
+    tmp = tempfile.mkdtemp()
+    results = {}
+
+    # 1. Histórico: escritura completa y sin lock en cada actualización
+    jobs, counter = {}, {"writes": 0, "errors": 0}
+    path = os.path.join(tmp, "naive.json")
+
+    def naive_save():
+        try:
+            with open(path, "w") as f:
+                json.dump(jobs, f)
+            counter["writes"] += 1
+        except Exception:
+            counter["errors"] += 1
+
+    started = time.time()
+    simulate(naive_save, jobs, args.jobs, args.seconds, args.tick)
+    results["naive"] = {"writes": counter["writes"], "errors": counter["errors"], "elapsed": round(time.time() - started, 2)}
+
+    # 2. JobStore JSON y 3. SQLite WAL
+    for name, cls, filename in [("json_store", JobStore, "jobs.json"), ("sqlite_store", SQLiteJobStore, "jobs.db")]:
+        jobs = {}
+        store = cls(os.path.join(tmp, filename), jobs, flush_interval_ms=500)
+        store.start()
+        started = time.time()
+        simulate(store.mark_dirty, jobs, args.jobs, args.seconds, args.tick)
+        store.close()
+        results[name] = {"writes": store.writes, "updates": store.dirty_marks, "elapsed": round(time.time() - started, 2)}
+
+    naive_writes = results["naive"]["writes"] or 1
+    for name in ("json_store", "sqlite_store"):
+        results[name]["reduction"] = f"{naive_writes / max(1, results[name]['writes']):.0f}x"
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark: listado del remoto vía RC (operations/list) contra el recorrido del mount FUSE.
+
+Arma un árbol sintético (--folders carpetas de --files archivos, como los torrents
+de TorBox), lo sirve con `rclone serve webdav` como sustituto local de TorBox y
+levanta `rclone rcd` con un remoto webdav apuntando ahí. Mide con MountIndex:
+
+  - rc:   RcloneListProvider (un operations/list recursivo, luego solo la raíz)
+  - fuse: el recorrido por stat/scandir sobre un mount de ese remoto (mount/mount
+          vía RC); se omite si no hay FUSE disponible
+
+Para cada modo: índice en frío, refresco sin cambios, y si una carpeta recién
+agregada al remoto se ve en el siguiente refresco (sin vfs/refresh, con el
+--dir-cache-time por defecto del mount).
+
+Requiere el binario `rclone` en el PATH (y /dev/fuse para el modo fuse).
+Uso: python bench_listing.py [--folders 500] [--files 12]
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+
+from listing import RcloneListProvider
+from mount_index import MountIndex
+from rclone_rc import RcloneRC, RcloneRCError
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def build_tree(root: str, folders: int, files: int):
+    for i in range(folders):
+        folder = os.path.join(root, f"Show.{i:04d}.S01.1080p.WEB-DL")
+        os.makedirs(os.path.join(folder, "Extras"))
+        for ep in range(1, files + 1):
+            open(os.path.join(folder, f"Show.{i:04d}.S01E{ep:02d}.1080p.mkv"), "wb").close()
+        open(os.path.join(folder, "Extras", "Featurette.mkv"), "wb").close()
+
+
+def wait_for(check, timeout: float = 15.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if check():
+                return True
+        except Exception:
+            pass
+        time.sleep(0.1)
+    return False
+
+
+def timed(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return round(time.perf_counter() - started, 4)
+
+
+def measure(index: MountIndex, source_root: str, label: str) -> dict:
+    result = {"cold_s": timed(index.refresh), "files": index.file_count(), "source": index.last_source}
+    result["warm_s"] = timed(index.refresh)
+    result["warm_relisted"] = index.last_relisted
+    name = f"Fresh.{label}.S01"
+    os.makedirs(os.path.join(source_root, name))
+    open(os.path.join(source_root, name, f"Fresh.{label}.S01E01.mkv"), "wb").close()
+    result["new_folder_s"] = timed(index.refresh)
+    result["new_folder_seen"] = index.lookup(f"Fresh.{label}.S01E01.mkv") is not None
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--folders", type=int, default=500)
+    parser.add_argument("--files", type=int, default=12)
+    args = parser.parse_args()
+    if not shutil.which("rclone"):
+        raise SystemExit("Se necesita el binario rclone en el PATH")
+
+    tmp = tempfile.mkdtemp()
+    source, mount = os.path.join(tmp, "remote"), os.path.join(tmp, "mnt")
+    os.makedirs(source)
+    os.makedirs(mount)
+    build_tree(source, args.folders, args.files)
+
+    dav_port, rc_port = free_port(), free_port()
+    env = dict(os.environ, RCLONE_CONFIG_BENCH_TYPE="webdav", RCLONE_CONFIG_BENCH_URL=f"http://127.0.0.1:{dav_port}",
+               RCLONE_CONFIG_BENCH_VENDOR="other")
+    procs = [
+        subprocess.Popen(["rclone", "serve", "webdav", source, "--addr", f"127.0.0.1:{dav_port}"],
+                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL),
+        subprocess.Popen(["rclone", "rcd", "--rc-no-auth", "--rc-addr", f"127.0.0.1:{rc_port}"],
+                         env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL),
+    ]
+    client = RcloneRC(f"http://127.0.0.1:{rc_port}", timeout=30)
+    result = {"folders": args.folders, "files_per_folder": args.files}
+    try:
+        if not wait_for(client.alive):
+            raise SystemExit("rclone rcd no respondió")
+
+        provider = RcloneListProvider("bench:", client=client)
+        result["rc"] = measure(MountIndex(os.path.join(tmp, "unused"), provider=provider), source, "rc")
+        result["rc"]["provider"] = provider.stats()
+
+        try:
+            client.call("mount/mount", fs="bench:", mountPoint=mount)
+        except RcloneRCError as e:
+            result["fuse"] = {"skipped": str(e)[:200]}
+        else:
+            if wait_for(lambda: len(os.listdir(mount)) > 0):
+                result["fuse"] = measure(MountIndex(mount), source, "fuse")
+            else:
+                result["fuse"] = {"skipped": "el mount no mostró entradas"}
+            client.call("mount/unmount", mountPoint=mount)
+    finally:
+        for proc in procs:
+            proc.terminate()
+        shutil.rmtree(tmp, ignore_errors=True)
+    print(json.dumps(result, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark y corpus de regresión del matching (media_utils.get_match_score).
+
+Evalúa el corpus etiquetado de bench_data/match_corpus.json (películas, packs de
+temporada, 1x01, [D1.Ep1], Temporada/Capitulo...) y reporta:
+  - precisión / recall con el umbral de is_valid_match (35)
+  - throughput (puntajes/s) y latencia p50/p99 por llamada, en frío (sin caché de
+    parseo) y en caliente
+
+La salida JSON es estable (claves ordenadas, valores redondeados) para poder
+compararla entre commits. Con --baseline se sale con código 1 si baja la
+precisión/recall o si el throughput empeora más de --max-slowdown.
+
+Uso: python bench_matcher.py [--rounds 200] [--output resultado.json] [--baseline base.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import media_utils
+from media_utils import get_match_score
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_data", "match_corpus.json")
+
+
+def load_corpus(path: str = CORPUS_PATH) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def score_case(case: dict) -> int:
+    q = case["query"]
+    return get_match_score(case["name"], q.get("expected_filename", ""), q.get("title", ""), q.get("year", ""),
+                           q.get("season"), q.get("episode"), q.get("original_title", ""))
+
+
+def evaluate(cases: list, threshold: int) -> dict:
+    """Matriz de confusión, precisión/recall global y por categoría, y la lista de fallos."""
+    totals = {"tp": 0, "fp": 0, "fn": 0, "tn": 0}
+    by_category = {}
+    failures = []
+    for case in cases:
+        score = score_case(case)
+        predicted = score >= threshold
+        key = ("tp" if predicted else "fn") if case["match"] else ("fp" if predicted else "tn")
+        totals[key] += 1
+        by_category.setdefault(case["category"], {"tp": 0, "fp": 0, "fn": 0, "tn": 0})[key] += 1
+        if key in ("fp", "fn"):
+            failures.append({"kind": key, "category": case["category"], "name": case["name"], "score": score,
+                             "title": case["query"].get("title", "")})
+    result = _rates(totals)
+    result["categories"] = {cat: _rates(c) for cat, c in sorted(by_category.items())}
+    result["failures"] = failures
+    return result
+
+
+def _rates(c: dict) -> dict:
+    precision = c["tp"] / (c["tp"] + c["fp"]) if c["tp"] + c["fp"] else 1.0
+    recall = c["tp"] / (c["tp"] + c["fn"]) if c["tp"] + c["fn"] else 1.0
+    return dict(c, precision=round(precision, 4), recall=round(recall, 4))
+
+
+def measure(cases: list, rounds: int, cold: bool) -> dict:
+    """Latencia por llamada; en frío se vacía la caché de parseo antes de cada ronda."""
+    samples = []
+    started = time.perf_counter()
+    for _ in range(rounds):
+        if cold:
+            media_utils.parse_release.cache_clear()
+            media_utils.parse_query.cache_clear()
+        for case in cases:
+            t0 = time.perf_counter_ns()
+            score_case(case)
+            samples.append(time.perf_counter_ns() - t0)
+    elapsed = time.perf_counter() - started
+    samples.sort()
+    return {
+        "calls": len(samples),
+        "scores_per_sec": round(len(samples) / elapsed),
+        "p50_us": round(samples[len(samples) // 2] / 1000, 2),
+        "p99_us": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] / 1000, 2),
+    }
+
+
+def compare(result: dict, baseline: dict, max_slowdown: float) -> list:
+    """Regresiones respecto al baseline (lista vacía = OK)."""
+    problems = []
+    for metric in ("precision", "recall"):
+        if result["accuracy"][metric] < baseline["accuracy"][metric]:
+            problems.append(f"{metric}: {baseline['accuracy'][metric]} → {result['accuracy'][metric]}")
+    for mode in ("cold", "warm"):
+        before = baseline["speed"][mode]["scores_per_sec"]
+        after = result["speed"][mode]["scores_per_sec"]
+        if after < before * (1 - max_slowdown):
+            problems.append(f"throughput {mode}: {before}/s → {after}/s")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=CORPUS_PATH)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--output", help="Escribir el resultado JSON en este archivo")
+    parser.add_argument("--baseline", help="Resultado JSON previo con el que comparar")
+    parser.add_argument("--max-slowdown", type=float, default=0.25, help="Caída de throughput tolerada (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    cases = corpus["cases"]
+    threshold = corpus.get("threshold", 35)
+    result = {
+        "corpus": {"version": corpus.get("version", 1), "cases": len(cases), "threshold": threshold},
+        "accuracy": evaluate(cases, threshold),
+        "speed": {
+            "cold": measure(cases, args.rounds, cold=True),
+            "warm": measure(cases, args.rounds, cold=False),
+        },
+    }
+    output = json.dumps(result, indent=2, sort_keys=True, ensure_ascii=False)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            problems = compare(result, json.load(f), args.max_slowdown)
+        if problems:
+            print("✗ Regresión respecto al baseline:\n  " + "\n  ".join(problems), file=sys.stderr)
+            sys.exit(1)
+        print("✓ Sin regresiones respecto al baseline", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
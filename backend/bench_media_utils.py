@@ -0,0 +1,162 @@
+"""
+Benchmark: puntuar una búsqueda contra un corpus de nombres de release.
+
+Compara el get_match_score histórico (re-parsea nombre y título en cada llamada)
+contra ParsedRelease/ParsedQuery con caché LRU, y verifica que los puntajes
+sean idénticos en todo el corpus.
+
+Uso: python bench_media_utils.py [--names 100000] [--passes 3]
+"""
+import argparse
+import os
+import random
+import re
+import time
+
+import media_utils
+from media_utils import clean_name, clean_words, extract_se_info, get_key_words, get_match_score, get_season_range
+
+TITLES = ["Ted Lasso", "Dexter", "The Office", "Avatar", "Breaking Bad", "La Casa de Papel", "Exterminio La Evolucion",
+          "Ted", "Dune", "The Last of Us", "Stranger Things", "El Eternauta", "Shogun", "Severance", "Fallout"]
+QUALITIES = ["1080p.WEB-DL", "2160p.HDR.x265", "720p.HDTV.x264", "1080p.BluRay.DTS", "480p.DVDRip", "WEB-DL.1080p-Dual-Lat"]
+GROUPS = ["-NTb", "-RARBG", "-FLUX", "-TorBox", "", "-EDITH", "[RD+]"]
+
+
+def legacy_get_match_score(name, expected_filename="", title="", year="", season=None, episode=None, original_title=""):
+    """get_match_score tal como estaba antes de ParsedRelease (referencia)."""
+    n_s, n_e = extract_se_info(name)
+    if season is not None:
+        if n_s is None:
+            range_min, range_max = get_season_range(name)
+            if range_min is not None and not (range_min <= season <= range_max):
+                return 0
+        elif n_s != season:
+            range_min, range_max = get_season_range(name)
+            if not (range_min is not None and (range_min <= season <= range_max)):
+                return 0
+        if episode is not None and n_e is not None and n_e != episode:
+            return 0
+    elif n_s is not None:
+        return 0
+    str_year = str(year).strip() if year else ""
+    if str_year:
+        years_in_name = re.findall(r'\b(19\d{2}|20\d{2})\b', name)
+        if years_in_name and str_year not in years_in_name:
+            if season is None:
+                return 0
+            elif n_s is None and get_season_range(name) == (None, None):
+                return 0
+    n_clean = clean_name(os.path.splitext(name)[0])
+    e_clean = clean_name(os.path.splitext(expected_filename)[0]) if expected_filename else ""
+    t_clean = clean_name(title)
+    o_clean = clean_name(original_title) if original_title else ""
+    if e_clean and n_clean == e_clean: return 100
+    if t_clean and n_clean == t_clean: return 95
+    if o_clean and n_clean == o_clean: return 95
+    if season is None and t_clean and len(t_clean) <= 4:
+        if n_clean.startswith(t_clean) and len(n_clean) > len(t_clean):
+            next_char = n_clean[len(t_clean)]
+            if next_char.isdigit() and next_char not in t_clean:
+                return 0
+    score = 0
+    n_words = set(clean_words(name))
+    t_words = set(get_key_words(clean_words(title)))
+    o_words = set(get_key_words(clean_words(original_title))) if original_title else set()
+    matched_t = n_words.intersection(t_words)
+    if t_words and len(matched_t) >= len(t_words) * 0.7:
+        score += 50
+    elif t_words and len(matched_t) > 0:
+        score += 20 * (len(matched_t) / len(t_words))
+    matched_o = n_words.intersection(o_words)
+    if o_words and len(matched_o) >= len(o_words) * 0.7:
+        score += 50
+    elif o_words and len(matched_o) > 0:
+        score += 20 * (len(matched_o) / len(o_words))
+    if str_year and str_year in name:
+        score += 30
+    if season is not None and episode is not None and n_s == season and n_e == episode:
+        score += 40
+    elif season is not None and n_s == season:
+        score += 20
+        if episode is not None and n_e is None and "." in name:
+            score -= 30
+    if "sample" in n_clean or "trailer" in n_clean or "extra" in n_clean:
+        score -= 60
+    has_any_title_hint = (len(matched_t) > 0) or (len(matched_o) > 0) or (e_clean and (e_clean in n_clean or n_clean in e_clean))
+    if not has_any_title_hint:
+        return 0
+    if len(t_words) >= 2:
+        match_ratio_t = len(matched_t) / len(t_words)
+        match_ratio_o = (len(matched_o) / len(o_words)) if o_words else 0
+        if not (match_ratio_t >= 1.0 or match_ratio_o >= 0.7 or (e_clean and (e_clean in n_clean or n_clean in e_clean))):
+            return 0
+    return min(100, max(0, int(score)))
+
+
+def make_corpus(n: int, seed: int = 42) -> list:
+    rnd = random.Random(seed)
+    names = []
+    for i in range(n):
+        title = rnd.choice(TITLES).replace(" ", rnd.choice([".", " ", "_"]))
+        year = rnd.randint(1995, 2025)
+        kind = rnd.random()
+        if kind < 0.5:
+            tag = f"S{rnd.randint(1, 6):02d}E{rnd.randint(1, 12):02d}"
+        elif kind < 0.6:
+            tag = f"{rnd.randint(1, 6)}x{rnd.randint(1, 12):02d}"
+        elif kind < 0.7:
+            tag = f"S{rnd.randint(1, 3):02d}-S{rnd.randint(4, 6):02d}.Complete"
+        else:
+            tag = str(year)
+        ext = rnd.choice([".mkv", ".mp4", "", ".sample.mkv"])
+        # Sufijo único: los listados reales rara vez repiten nombres exactos
+        names.append(f"{title}.{tag}.{rnd.choice(QUALITIES)}{rnd.choice(GROUPS)}.{i}{ext}")
+    return names
+
+
+QUERIES = [
+    ("Ted Lasso S01E02.mkv", "Ted Lasso", "2020", 1, 2, ""),
+    ("Dexter.2006.mkv", "Dexter", "2006", 1, 7, ""),
+    ("Avatar.mkv", "Avatar", "2009", None, None, ""),
+    ("[RD+] TorBox", "Exterminio La Evolucion", "2025", None, None, "28 Years Later"),
+]
+
+
+def run(fn, names, queries):
+    t0 = time.perf_counter()
+    # Un nombre del listado se evalúa contra todas las búsquedas activas
+    out = [fn(n, *q) for n in names for q in queries]
+    return time.perf_counter() - t0, out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--names", type=int, default=100_000)
+    parser.add_argument("--passes", type=int, default=3, help="Pasadas sobre el mismo listado (el watcher re-evalúa cada ciclo)")
+    parser.add_argument("--cache", type=int, default=None, help="Tamaño de la LRU de parse_release (por defecto, el del corpus)")
+    args = parser.parse_args()
+    names = make_corpus(args.names)
+    print(f"Corpus: {len(names)} nombres, {len(QUERIES)} búsquedas, {args.passes} pasadas")
+
+    legacy_total = 0.0
+    for _ in range(args.passes):
+        elapsed, expected = run(legacy_get_match_score, names, QUERIES)
+        legacy_total += elapsed
+
+    media_utils.configure_parse_cache(args.cache or len(names))
+    media_utils.parse_query.cache_clear()
+    new_times = []
+    for _ in range(args.passes):
+        elapsed, got = run(get_match_score, names, QUERIES)
+        new_times.append(elapsed)
+        assert got == expected, "¡Los puntajes difieren de la implementación histórica!"
+
+    calls = len(names) * len(QUERIES)
+    print(f"Histórico:     {legacy_total:.2f}s ({legacy_total / args.passes / calls * 1e6:.2f} µs/llamada)")
+    print(f"ParsedRelease: {sum(new_times):.2f}s (1ª pasada {new_times[0]:.2f}s, siguientes {sum(new_times[1:]) / max(1, len(new_times) - 1):.2f}s)")
+    print(f"Aceleración total: x{legacy_total / sum(new_times):.1f} | puntajes idénticos en {calls} llamadas por pasada")
+    print(f"Caché: {media_utils.parse_release.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
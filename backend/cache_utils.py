@@ -0,0 +1,165 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional, Tuple
+
+FRESH = "fresh"
+STALE = "stale"
+
+
+class TTLCache:
+    """
+    Caché LRU acotada con TTL por entrada.
+
+    Cada entrada tiene un TTL "fresco" y opcionalmente una ventana extra en la que
+    todavía se puede servir como stale (stale-while-revalidate).
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Hashable, Tuple[Any, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Tuple[Any, Optional[str]]:
+        """Devuelve (valor, FRESH|STALE) o (None, None) si no hay entrada utilizable."""
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, None
+            value, fresh_until, stale_until = entry
+            if now < fresh_until:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value, FRESH
+            if now < stale_until:
+                self._data.move_to_end(key)
+                self.stale_hits += 1
+                return value, STALE
+            del self._data[key]
+            self.misses += 1
+            return None, None
+
+    def set(self, key: Hashable, value: Any, ttl: float, stale_ttl: float = 0.0):
+        now = time.time()
+        with self._lock:
+            self._data[key] = (value, now + ttl, now + ttl + stale_ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Elimina las entradas cuya clave cumple `predicate`. Devuelve cuántas borró."""
+        with self._lock:
+            keys = [k for k in self._data if predicate(k)]
+            for k in keys:
+                del self._data[k]
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        total = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.stale_hits) / total, 3) if total else 0.0,
+        }
+
+
+class SingleFlight:
+    """
+    Agrupa llamadas concurrentes idénticas: la primera ejecuta `fn` y las demás
+    esperan y reciben el mismo resultado (o la misma excepción).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: dict = {}
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = {"event": threading.Event(), "result": None, "error": None}
+                self._inflight[key] = call
+            else:
+                self.coalesced += 1
+        if not leader:
+            call["event"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+        try:
+            call["result"] = fn()
+            return call["result"]
+        except BaseException as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call["event"].set()
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight para corrutinas (un solo event loop): la primera llamada crea la
+    tarea y las demás esperan el mismo resultado. Si todos los que esperan se
+    cancelan (clientes desconectados) la tarea upstream también se cancela.
+    """
+
+    def __init__(self):
+        self._inflight: dict = {}
+        self.coalesced = 0
+        self.cancelled = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._inflight.get(key)
+        if call is None:
+            call = {"task": asyncio.ensure_future(fn()), "waiters": 0}
+            self._inflight[key] = call
+            call["task"].add_done_callback(lambda _task: self._done(key, call))
+        else:
+            self.coalesced += 1
+        call["waiters"] += 1
+        try:
+            return await asyncio.shield(call["task"])
+        except asyncio.CancelledError:
+            if call["waiters"] == 1 and not call["task"].done():
+                call["task"].cancel()
+                self.cancelled += 1
+            raise
+        finally:
+            call["waiters"] -= 1
+
+    def _done(self, key: Hashable, call: dict):
+        if self._inflight.get(key) is call:
+            del self._inflight[key]
+        if not call["task"].cancelled():
+            call["task"].exception()  # Evita el aviso de "exception was never retrieved"
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._inflight
@@ -1,10 +1,10 @@
 import os
-import yaml
 
 def load_config():
     config_path = os.getenv("CONFIG_PATH", "config.yaml")
     if not os.path.exists(config_path):
         return {}
+    import yaml  # Solo si hay config que leer (el primer arranque va directo al setup)
     with open(config_path, "r", encoding="utf-8") as f:
         return yaml.safe_load(f) or {}
 
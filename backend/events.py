@@ -0,0 +1,101 @@
+import asyncio
+import threading
+from collections import deque
+from typing import List, Optional, Tuple
+
+Event = Tuple[int, str, dict]  # (seq, tipo, datos)
+
+
+class Subscriber:
+    """
+    Buffer acotado de un cliente del stream de eventos.
+    Si el cliente no consume a tiempo se marca `overflowed` y se cierra; al
+    reconectar retoma desde su último número de secuencia.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_buffer: int):
+        self.loop = loop
+        self.max_buffer = max_buffer
+        self.buffer: deque = deque()
+        self.overflowed = False
+        self._ready = asyncio.Event()
+
+    def push(self, event: Event):
+        """Llamado desde cualquier hilo."""
+        if self.overflowed:
+            return
+        if len(self.buffer) >= self.max_buffer:
+            self.overflowed = True
+        else:
+            self.buffer.append(event)
+        try:
+            self.loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            pass  # Loop cerrado: el cliente ya se fue
+
+    async def get(self, timeout: float) -> List[Event]:
+        """Espera eventos nuevos (o `timeout` segundos) y los devuelve todos."""
+        if not self.buffer and not self.overflowed:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        self._ready.clear()
+        events = []
+        while self.buffer:
+            events.append(self.buffer.popleft())
+        return events
+
+
+class EventBus:
+    """
+    Bus de eventos en proceso (estado de trabajos, logs y notificaciones).
+    Guarda un historial circular para que los clientes reanuden desde su último `seq`.
+    """
+
+    def __init__(self, history: int = 2000, max_buffer: int = 500):
+        self.max_buffer = max_buffer
+        self._history: deque = deque(maxlen=history)
+        self._subscribers: set = set()
+        self._lock = threading.Lock()
+        self.seq = 0
+
+    def publish(self, event_type: str, data: dict) -> int:
+        with self._lock:
+            self.seq += 1
+            event = (self.seq, event_type, data)
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            sub.push(event)
+        return event[0]
+
+    def subscribe(self, since: Optional[int] = None, loop: Optional[asyncio.AbstractEventLoop] = None) -> Tuple[Subscriber, bool]:
+        """
+        Registra un cliente. Si `since` sigue en el historial se reenvían los eventos
+        posteriores; devuelve (subscriber, necesita_snapshot). Si la repetición no
+        entra holgada en el buffer del cliente se pide un snapshot: de lo contrario
+        el próximo evento lo marcaría `overflowed` y reconectaría en bucle.
+        """
+        sub = Subscriber(loop or asyncio.get_running_loop(), self.max_buffer)
+        with self._lock:
+            needs_snapshot = True
+            if since is not None:
+                oldest = self._history[0][0] if self._history else self.seq + 1
+                if oldest - 1 <= since <= self.seq and self.seq - since <= self.max_buffer // 2:
+                    needs_snapshot = False
+                    for event in self._history:
+                        if event[0] > since:
+                            sub.buffer.append(event)
+            self._subscribers.add(sub)
+        return sub, needs_snapshot
+
+    def unsubscribe(self, sub: Subscriber):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+
+event_bus = EventBus()
@@ -0,0 +1,125 @@
+"""
+Servidor local que imita la API de TorBox (solo /v1/api/torrents/mylist).
+
+Se usa en los tests del descubrimiento por API y sirve para probar el watcher a
+mano sin una cuenta real: con --mirror expone cada entrada de primer nivel de
+una carpeta local como un torrent terminado (útil junto a `rclone serve webdav`
+sobre la misma carpeta).
+
+Uso: python fake_torbox_api.py [--port 8099] [--api-key test] [--mirror /ruta]
+Luego en config.yaml: torbox.api_key: test, torbox.api_url: http://127.0.0.1:8099/v1/api
+"""
+import argparse
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+
+class FakeTorBoxAPI:
+    """Estado de los torrents falsos y el servidor HTTP que los publica."""
+
+    def __init__(self, api_key: str = "test-key", host: str = "127.0.0.1", port: int = 0, mirror: Optional[str] = None):
+        self.api_key = api_key
+        self.mirror = mirror
+        self.torrents: List[dict] = []
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1/api"
+
+    def start(self) -> "FakeTorBoxAPI":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def add_torrent(self, name: str, files: List[str], ready: bool = True) -> int:
+        """`files` son rutas relativas al torrent; ready=False simula una descarga en curso."""
+        with self._lock:
+            torrent_id = self._next_id
+            self._next_id += 1
+            self.torrents.append({
+                "id": torrent_id,
+                "name": name,
+                "download_finished": ready,
+                "download_present": ready,
+                "files": [{"id": i, "name": f"{name}/{f}", "short_name": os.path.basename(f), "size": 0}
+                          for i, f in enumerate(files)],
+            })
+            return torrent_id
+
+    def set_ready(self, torrent_id: int, ready: bool = True):
+        with self._lock:
+            for torrent in self.torrents:
+                if torrent["id"] == torrent_id:
+                    torrent["download_finished"] = torrent["download_present"] = ready
+
+    def list_torrents(self) -> List[dict]:
+        if not self.mirror:
+            with self._lock:
+                return json.loads(json.dumps(self.torrents))
+        torrents = []
+        for i, name in enumerate(sorted(os.listdir(self.mirror))):
+            full = os.path.join(self.mirror, name)
+            if os.path.isdir(full):
+                files = [os.path.relpath(os.path.join(current, f), self.mirror)
+                         for current, _, names in os.walk(full) for f in names]
+            else:
+                files = [name]
+            torrents.append({"id": i + 1, "name": name, "download_finished": True, "download_present": True,
+                             "files": [{"id": j, "name": f.replace(os.sep, "/"), "short_name": os.path.basename(f), "size": 0}
+                                       for j, f in enumerate(files)]})
+        return torrents
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                api.requests += 1
+                if self.headers.get("Authorization") != f"Bearer {api.api_key}":
+                    return self._send(403, {"success": False, "error": "BAD_TOKEN", "detail": "Token inválido.", "data": None})
+                if self.path.split("?")[0] != "/v1/api/torrents/mylist":
+                    return self._send(404, {"success": False, "error": "NOT_FOUND", "detail": self.path, "data": None})
+                self._send(200, {"success": True, "error": None, "detail": "Torrents list retrieved successfully.",
+                                 "data": api.list_torrents()})
+
+            def _send(self, status: int, body: dict):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--api-key", default="test")
+    parser.add_argument("--mirror", help="Carpeta local cuyas entradas se publican como torrents terminados")
+    args = parser.parse_args()
+    api = FakeTorBoxAPI(args.api_key, port=args.port, mirror=args.mirror)
+    print(f"[FakeTorBoxAPI] Escuchando en {api.base_url}")
+    api.server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import os
+import threading
+from typing import List, Optional, Tuple
+
+from cache_utils import FRESH, SingleFlight, TTLCache
+
+FS_CACHE_TTL = 30          # Segundos; los eventos del índice del mount/librería invalidan antes
+FS_CACHE_MAX_ENTRIES = 50000
+LISTING_MAX_ENTRIES = 2000
+
+Listing = List[Tuple[str, bool]]  # [(nombre, es_carpeta)]
+
+
+class FsCache:
+    """
+    Caché de solo lectura de stats y listados para los endpoints de navegación.
+
+    Sobre el mount FUSE de rclone cada os.path.exists / is_dir es un viaje a
+    TorBox; aquí se guardan con TTL y se invalidan con los eventos de cambio
+    del índice del mount (archivos agregados/borrados, carpetas re-listadas) y
+    del índice de la librería (carpetas de título re-escaneadas).
+    Las escrituras (crear/borrar symlinks) siguen yendo directo al disco.
+    """
+
+    def __init__(self, ttl: float = FS_CACHE_TTL, max_entries: int = FS_CACHE_MAX_ENTRIES, listing_max_entries: int = LISTING_MAX_ENTRIES):
+        self.ttl = ttl
+        self._exists = TTLCache(max_entries)            # ruta -> bool (siguiendo symlinks)
+        self._listings = TTLCache(listing_max_entries)  # carpeta -> Listing
+        self._flight = SingleFlight()
+        self.invalidations = 0
+
+    # --- Consultas ---
+
+    def exists(self, path: str) -> bool:
+        """os.path.exists cacheado (sigue symlinks: True si el destino es alcanzable)."""
+        value, state = self._exists.get(path)
+        if state == FRESH:
+            return value
+        return self._flight.do(("exists", path), lambda: self._store_exists(path))
+
+    def target_exists(self, link_path: str) -> bool:
+        """
+        Como exists() para un symlink, pero cacheado por su destino: así los eventos
+        del mount (que hablan de rutas del mount) invalidan la entrada correcta.
+        """
+        try:
+            target = os.readlink(link_path)
+        except OSError:
+            return self.exists(link_path)
+        if not os.path.isabs(target):
+            target = os.path.normpath(os.path.join(os.path.dirname(link_path), target))
+        return self.exists(target)
+
+    def listdir(self, path: str) -> Optional[Listing]:
+        """Listado [(nombre, es_carpeta)] de `path`, o None si no existe."""
+        value, state = self._listings.get(path)
+        if state == FRESH:
+            return value
+        return self._flight.do(("list", path), lambda: self._store_listing(path))
+
+    def _store_exists(self, path: str) -> bool:
+        value = os.path.exists(path)
+        self._exists.set(path, value, self.ttl)
+        return value
+
+    def _store_listing(self, path: str) -> Optional[Listing]:
+        try:
+            with os.scandir(path) as it:
+                listing = []
+                for entry in it:
+                    try:
+                        listing.append((entry.name, entry.is_dir()))
+                    except OSError:
+                        continue
+        except FileNotFoundError:
+            listing = None
+        self._listings.set(path, listing, self.ttl)
+        if listing is not None:
+            # El listado también confirma qué existe
+            self._exists.set(path, True, self.ttl)
+            for name, _ in listing:
+                self._exists.set(os.path.join(path, name), True, self.ttl)
+        return listing
+
+    # --- Invalidación ---
+
+    def invalidate(self, paths):
+        """Olvida estas rutas y el listado de su carpeta padre."""
+        for path in paths:
+            path = path.rstrip("/") or "/"
+            self._exists.invalidate(path)
+            self._listings.invalidate(path)
+            self._listings.invalidate(os.path.dirname(path))
+            self.invalidations += 1
+
+    def invalidate_tree(self, root: str):
+        """Olvida todo lo que está debajo de `root` (incluido)."""
+        root = root.rstrip("/") or "/"
+        prefix = root + os.sep
+        under = lambda key: key == root or key.startswith(prefix)
+        self.invalidations += self._exists.invalidate_where(under) + self._listings.invalidate_where(under)
+        self._listings.invalidate(os.path.dirname(root))
+
+    def on_mount_change(self, change: dict):
+        """Listener de MountIndex: cada escaneo reporta qué archivos y carpetas cambiaron."""
+        # Las carpetas nuevas/eliminadas vienen en changed_dirs y sus archivos en added/removed
+        self.invalidate(change.get("added", []) + change.get("removed", []) + change.get("changed_dirs", []))
+
+    def on_library_change(self, path: str):
+        """Listener de LibraryIndex: `path` es la carpeta de título re-escaneada o eliminada."""
+        self.invalidate_tree(path)
+
+    def clear(self):
+        self._exists.clear()
+        self._listings.clear()
+
+    def stats(self) -> dict:
+        return {
+            "ttl": self.ttl,
+            "exists": self._exists.stats(),
+            "listings": self._listings.stats(),
+            "invalidations": self.invalidations,
+            "coalesced": self._flight.coalesced,
+        }
+
+
+_fs_cache: Optional[FsCache] = None
+_fs_cache_lock = threading.Lock()
+
+
+def get_fs_cache() -> FsCache:
+    """Caché compartida del proceso."""
+    global _fs_cache
+    with _fs_cache_lock:
+        if _fs_cache is None:
+            _fs_cache = FsCache()
+        return _fs_cache
@@ -1,43 +1,339 @@
 import os
+import re
 import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from job_store import JobStore
+from library_index import get_library_index, notify_library_change
+from media_utils import extract_se_info
+from mount_index import get_mount_index
+
+HEALTH_WORKERS = 8        # Stats/listados en paralelo contra el mount
+REPAIR_MIN_SCORE = 70     # Igual que el fallback difuso del watcher: se re-enlaza sin confirmación
+VIDEO_EXTS = ('.mkv', '.mp4', '.avi', '.ts', '.webm')
+_FOLDER_RE = re.compile(r'^(?P<title>.*?)(?:\s*\((?P<year>\d{4})\))?\s*(?:\{tmdb-\d+\})?$')
+
+OK = "ok"
+BROKEN = "broken"
+REPAIRED = "repaired"
+
+
+class HealthEngine:
+    """
+    Chequeo de salud de los symlinks de la librería de Plex.
+
+    Los destinos se agrupan por carpeta padre: si el índice del mount tiene esa
+    carpeta se responde en memoria; si no, se hace un stat de la carpeta en un
+    pool de hilos y solo se lista cuando su mtime cambió respecto al último
+    chequeo (si no cambió, se reutiliza el último estado conocido).
+
+    El resultado se persiste junto a active_jobs.json y los symlinks rotos pasan
+    a una cola de reparación que los re-resuelve contra el índice del mount por
+    nombre exacto o, si no, por puntaje.
+    """
+
+    def __init__(self, base_library_path: str = "/Media", state_path: Optional[str] = None, mount_path: str = "/mnt/torbox",
+                 workers: int = HEALTH_WORKERS, auto_repair: bool = True, repair_min_score: int = REPAIR_MIN_SCORE):
+        self.base_library_path = base_library_path
+        self.mount_path = mount_path
+        self.workers = workers
+        self.auto_repair = auto_repair
+        self.repair_min_score = repair_min_score
+        self._state: dict = {}  # "link:<symlink>" -> {target, status, checked_at, ...}; "dir:<carpeta>" -> {mtime}
+        self._store = JobStore(state_path, self._state, flush_interval_ms=2000) if state_path else None
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._repair_lock = threading.Lock()
+        self._repair_queue: deque = deque()
+        self._queued: set = set()
+        self._repair_event = threading.Event()
+        self._repair_thread: Optional[threading.Thread] = None
+        self.recent_repairs: deque = deque(maxlen=50)
+        self.last_run: dict = {}
+
+    def ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            if self._store:
+                self._store.load()
+                self._store.start()
+                print(f"[Health] {sum(1 for k in self._state if k.startswith('link:'))} resultados previos cargados")
+            self._loaded = True
+
+    def _mark_dirty(self):
+        if self._store:
+            self._store.mark_dirty()
+
+    # --- Chequeo ---
+
+    def _iter_symlinks(self) -> List[Tuple[str, str]]:
+        """(symlink, destino absoluto) de toda la librería; del índice en memoria si está listo."""
+        index = get_library_index(self.base_library_path)
+        if index.is_ready():
+            links = index.iter_symlinks()
+        else:
+            links = []
+            for root, dirs, files in os.walk(self.base_library_path):
+                for file in files:
+                    path = os.path.join(root, file)
+                    if os.path.islink(path):
+                        try:
+                            links.append((path, os.readlink(path)))
+                        except OSError:
+                            continue
+        return [(path, target if os.path.isabs(target) else os.path.normpath(os.path.join(os.path.dirname(path), target)))
+                for path, target in links]
+
+    def check(self, force: bool = False) -> Optional[dict]:
+        """
+        Revisa todos los symlinks. Con `force` se ignora el estado previo y se
+        vuelve a listar cada carpeta. Devuelve el resumen, o None si ya hay un chequeo en curso.
+        """
+        if not self._run_lock.acquire(blocking=False):
+            return None
+        try:
+            self.ensure_loaded()
+            print("[Health] Iniciando revisión de salud de symlinks...")
+            if not os.path.exists(self.base_library_path):
+                print(f"[Health] Directorio base {self.base_library_path} no existe aún.")
+                return None
+
+            started = time.time()
+            by_dir: Dict[str, List[Tuple[str, str]]] = {}
+            links = self._iter_symlinks()
+            for path, target in links:
+                by_dir.setdefault(os.path.dirname(target), []).append((path, target))
+
+            counts = {"links": len(links), "dirs": len(by_dir), "from_index": 0, "skipped": 0, "listed": 0}
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="health") as pool:
+                for how in pool.map(lambda item: self._check_dir(item[0], item[1], force), by_dir.items()):
+                    counts[how] += 1
+
+            # Symlinks que ya no existen en la librería salen del estado
+            alive = {f"link:{path}" for path, _ in links} | {f"dir:{d}" for d in by_dir}
+            for key in [k for k in list(self._state) if k not in alive]:
+                self._state.pop(key, None)
+            self._mark_dirty()
+
+            broken = [path for path, _ in links if self._state.get(f"link:{path}", {}).get("status") == BROKEN]
+            if self.auto_repair:
+                for path in broken:
+                    self.enqueue_repair(path)
+
+            counts["broken"] = len(broken)
+            counts["duration"] = round(time.time() - started, 3)
+            counts["finished_at"] = time.time()
+            self.last_run = counts
+            print(f"[Health] Chequeo finalizado en {counts['duration']}s: {counts['links']} symlinks en {counts['dirs']} carpetas "
+                  f"({counts['from_index']} desde el índice, {counts['skipped']} sin cambios, {counts['listed']} listadas). "
+                  f"{len(broken)} rotos.")
+            return counts
+        finally:
+            self._run_lock.release()
+
+    def _check_dir(self, parent: str, links: List[Tuple[str, str]], force: bool) -> str:
+        """Revisa los symlinks cuyo destino está en `parent`. Devuelve cómo se resolvió."""
+        mount_index = get_mount_index(self.mount_path)
+        listing = mount_index.list_dir(parent) if mount_index.is_ready() else None
+        if listing is not None:
+            self._record(links, set(listing["files"]))
+            return "from_index"
+
+        dir_key = f"dir:{parent}"
+        try:
+            mtime = os.stat(parent).st_mtime
+        except OSError:
+            self._record(links, set())
+            self._state.pop(dir_key, None)
+            return "listed"
+
+        previous = self._state.get(dir_key)
+        if not force and previous and previous.get("mtime") == mtime and all(
+                self._state.get(f"link:{path}", {}).get("target") == target for path, target in links):
+            return "skipped"
+
+        try:
+            names = set(os.listdir(parent))
+        except OSError:
+            names = set()
+        self._record(links, names)
+        self._state[dir_key] = {"mtime": mtime}
+        return "listed"
+
+    def _record(self, links: List[Tuple[str, str]], names: set):
+        now = time.time()
+        for path, target in links:
+            key = f"link:{path}"
+            previous = self._state.get(key) or {}
+            status = OK if os.path.basename(target) in names else BROKEN
+            entry = {"target": target, "status": status, "checked_at": now}
+            if status == BROKEN:
+                entry["broken_since"] = previous.get("broken_since", now) if previous.get("target") == target else now
+                if previous.get("status") != BROKEN or previous.get("target") != target:
+                    print(f"[Health] [ALERTA] Symlink roto detectado: {path} -> {target}")
+            if previous.get("repair"):
+                entry["repair"] = previous["repair"]
+            self._state[key] = entry
+
+    # --- Reparación ---
+
+    def enqueue_repair(self, link_path: str) -> bool:
+        with self._repair_lock:
+            if link_path in self._queued:
+                return False
+            self._queued.add(link_path)
+            self._repair_queue.append(link_path)
+        self._start_repair_worker()
+        self._repair_event.set()
+        return True
+
+    def _start_repair_worker(self):
+        if self._repair_thread is None or not self._repair_thread.is_alive():
+            self._repair_thread = threading.Thread(target=self._run_repairs, daemon=True)
+            self._repair_thread.start()
+
+    def _run_repairs(self):
+        while True:
+            self._repair_event.wait()
+            with self._repair_lock:
+                if not self._repair_queue:
+                    self._repair_event.clear()
+                    continue
+                link_path = self._repair_queue.popleft()
+                self._queued.discard(link_path)
+            try:
+                self.repair(link_path)
+            except Exception as e:
+                print(f"[Health] ✗ Error reparando {link_path}: {e}")
+
+    def find_replacement(self, link_path: str, target: str) -> Optional[Tuple[str, int]]:
+        """Nuevo destino para un symlink roto: (ruta, puntaje), 100 si el nombre coincide exacto."""
+        mount_index = get_mount_index(self.mount_path)
+        if not mount_index.is_ready():
+            return None
+        for path in mount_index.lookup_all(os.path.basename(target)):
+            if path != target:
+                return path, 100
+
+        # Título y año salen de la carpeta de Plex: "Nombre (Año) {tmdb-ID}"
+        rel = os.path.relpath(link_path, self.base_library_path).split(os.sep)
+        if len(rel) < 3:
+            return None
+        folder = _FOLDER_RE.match(rel[1])
+        title, year = folder.group("title"), folder.group("year") or ""
+        season, episode = extract_se_info(os.path.basename(link_path))
+        if rel[0] == "Shows" and (season is None or episode is None):
+            return None
+        matches = mount_index.match(top_k=1, min_score=self.repair_min_score, name_filter=lambda n: n.lower().endswith(VIDEO_EXTS),
+                                    expected_filename=os.path.basename(target), title=title, year=year, season=season, episode=episode)
+        if not matches or matches[0][2] == target:
+            return None
+        return matches[0][2], matches[0][0]
+
+    def repair(self, link_path: str) -> Optional[str]:
+        """Re-apunta un symlink roto al archivo que lo reemplaza en el mount. Devuelve el nuevo destino."""
+        self.ensure_loaded()
+        key = f"link:{link_path}"
+        entry = self._state.get(key)
+        if not entry or entry.get("status") != BROKEN or not os.path.islink(link_path):
+            return None
+        found = self.find_replacement(link_path, entry["target"])
+        if found is None:
+            self._state[key] = dict(entry, repair={"status": "not_found", "at": time.time()})
+            self._mark_dirty()
+            return None
+
+        new_target, score = found
+        tmp_path = f"{link_path}.repair"
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        os.symlink(new_target, tmp_path)
+        os.replace(tmp_path, link_path)
+        notify_library_change(link_path, self.base_library_path)
+
+        record = {"path": link_path, "old_target": entry["target"], "new_target": new_target, "score": score, "at": time.time()}
+        self._state[key] = {"target": new_target, "status": REPAIRED, "checked_at": record["at"],
+                            "repair": {"status": "repaired", "at": record["at"], "old_target": entry["target"], "score": score}}
+        self.recent_repairs.append(record)
+        self._mark_dirty()
+        print(f"[Health] 🔧 Symlink reparado: {link_path} -> {new_target} (puntaje {score})")
+        return new_target
+
+    # --- Consultas ---
+
+    def results(self, status: Optional[str] = None, offset: int = 0, limit: Optional[int] = None) -> dict:
+        self.ensure_loaded()
+        links = [dict(entry, path=key[5:]) for key, entry in list(self._state.items())
+                 if key.startswith("link:") and (status is None or entry.get("status") == status)]
+        links.sort(key=lambda e: e["path"])
+        end = None if limit is None else offset + limit
+        return {"total": len(links), "links": links[offset:end]}
+
+    def summary(self) -> dict:
+        self.ensure_loaded()
+        statuses = {OK: 0, BROKEN: 0, REPAIRED: 0}
+        for key, entry in list(self._state.items()):
+            if key.startswith("link:"):
+                statuses[entry.get("status", OK)] = statuses.get(entry.get("status", OK), 0) + 1
+        with self._repair_lock:
+            queued = list(self._repair_queue)
+        return {
+            "running": self._run_lock.locked(),
+            "last_run": self.last_run,
+            "statuses": statuses,
+            "repair_queue": queued,
+            "recent_repairs": list(self.recent_repairs),
+        }
+
+    def close(self):
+        if self._store and self._loaded:
+            self._store.close()
+
+
+_engines: Dict[str, HealthEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_health_engine(base_library_path: str = "/Media", state_path: Optional[str] = None, **kwargs) -> HealthEngine:
+    """Motor de salud compartido para `base_library_path` (uno por proceso)."""
+    with _engines_lock:
+        engine = _engines.get(base_library_path)
+        if engine is None:
+            engine = HealthEngine(base_library_path, state_path, **kwargs)
+            _engines[base_library_path] = engine
+        return engine
+
 
 def check_symlinks_health(base_library_path: str = "/Media"):
     """"
-    Revisa recursivamente los symlinks en el directorio de Plex para asegurar
+    Revisa los symlinks en el directorio de Plex para asegurar
     que sus archivos fuente en /mnt/torbox (o donde sea) aún existan.
     """
-    print("Iniciando revisión de salud de symlinks (Health Check)...")
-    if not os.path.exists(base_library_path):
-        print(f"Directorio base {base_library_path} no existe aún.")
-        return
-
-    broken_links = 0
-    total_links = 0
-
-    for root, dirs, files in os.walk(base_library_path):
-        for file in files:
-            path = os.path.join(root, file)
-            if os.path.islink(path):
-                total_links += 1
-                target = os.readlink(path)
-                if not os.path.exists(target):
-                    print(f"[ALERTA] Symlink roto detectado: {path} -> {target}")
-                    broken_links += 1
-                    # Dependiendo de la lógica, aquí podríamos borrar el symlink roto:
-                    # os.remove(path)
-
-    print(f"Health Check finalizado. {total_links} symlinks revisados. {broken_links} rotos.")
-
-def start_health_monitor(interval_seconds: int = 3600, base_library_path: str = "/Media"):
+    return get_health_engine(base_library_path).check()
+
+
+def start_health_monitor(interval_seconds: int = 3600, base_library_path: str = "/Media", state_path: Optional[str] = None, **kwargs):
     """"
     Ejecuta el chequeo periódicamente en un hilo en background.
     """
+    engine = get_health_engine(base_library_path, state_path, **kwargs)
+
     def run_monitor():
+        engine.ensure_loaded()
         while True:
             time.sleep(interval_seconds)
-            check_symlinks_health(base_library_path)
-            
+            try:
+                engine.check()
+            except Exception as e:
+                print(f"[Health] ✗ Error en chequeo: {e}")
+
     thread = threading.Thread(target=run_monitor, daemon=True)
     thread.start()
     return thread
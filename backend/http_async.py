@@ -0,0 +1,134 @@
+import asyncio
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from metrics import histogram
+
+MAX_CONNECTIONS = 64
+MAX_KEEPALIVE = 32
+PER_HOST_LIMIT = 32        # Peticiones simultáneas por host (TMDB, AIOStreams...)
+DEFAULT_TIMEOUT = 10.0
+CONNECT_TIMEOUT = 5.0
+DISCONNECT_POLL_INTERVAL = 0.25
+
+UPSTREAM_SECONDS = histogram("upstream_request_seconds", "Latencia de las llamadas a TMDB/AIOStreams (sin caché)", ["upstream"])
+
+
+class ClientDisconnected(Exception):
+    """El cliente HTTP de la UI cerró la conexión antes de recibir la respuesta."""
+
+
+class AsyncHTTP:
+    """
+    Cliente HTTP async compartido para las llamadas salientes (TMDB, AIOStreams).
+
+    Un endpoint `async def` que espera a un upstream lento no ocupa un hilo del
+    threadpool de FastAPI, así los endpoints baratos siguen respondiendo.
+    Cada host tiene un semáforo propio para que un upstream lento no se quede
+    con todas las conexiones del pool.
+    """
+
+    def __init__(self, max_connections: int = MAX_CONNECTIONS, max_keepalive: int = MAX_KEEPALIVE,
+                 per_host_limit: int = PER_HOST_LIMIT, timeout: float = DEFAULT_TIMEOUT, connect_timeout: float = CONNECT_TIMEOUT):
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+        self.requests = 0
+        self.in_flight = 0
+        self.cancelled = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # El cliente y los semáforos pertenecen al event loop donde se crearon
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(limits=self.limits, timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout))
+            self._loop = loop
+            self._hosts = {}
+        return self._client
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        sem = self._hosts.get(host)
+        if sem is None:
+            sem = self._hosts[host] = asyncio.Semaphore(self.per_host_limit)
+        return sem
+
+    async def get(self, url: str, params: Optional[dict] = None, timeout: Optional[float] = None) -> httpx.Response:
+        client = self._get_client()
+        async with self._host_semaphore(url):
+            self.requests += 1
+            self.in_flight += 1
+            try:
+                request_timeout = httpx.Timeout(timeout, connect=self.connect_timeout) if timeout else httpx.USE_CLIENT_DEFAULT
+                return await client.get(url, params=params, timeout=request_timeout)
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+            except httpx.TimeoutException:
+                self.timeouts += 1
+                raise
+            except httpx.HTTPError:
+                self.errors += 1
+                raise
+            finally:
+                self.in_flight -= 1
+
+    async def get_json(self, url: str, params: Optional[dict] = None, timeout: Optional[float] = None):
+        """GET y JSON; lanza httpx.HTTPStatusError como `raise_for_status()`."""
+        r = await self.get(url, params=params, timeout=timeout)
+        r.raise_for_status()
+        return r.json()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "cancelled": self.cancelled,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "per_host_limit": self.per_host_limit,
+            "hosts": {host: self.per_host_limit - sem._value for host, sem in self._hosts.items()},
+        }
+
+
+async def cancel_on_disconnect(request, awaitable, poll_interval: float = DISCONNECT_POLL_INTERVAL):
+    """
+    Espera `awaitable` mientras el cliente siga conectado; si se desconecta antes
+    (cerró el modal, cambió la búsqueda) cancela el trabajo y lanza ClientDisconnected.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+_http: Optional[AsyncHTTP] = None
+
+
+def get_async_http() -> AsyncHTTP:
+    """Cliente async compartido del proceso."""
+    global _http
+    if _http is None:
+        _http = AsyncHTTP()
+    return _http
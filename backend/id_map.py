@@ -0,0 +1,62 @@
+import threading
+from typing import Optional
+
+from job_store import JobStore
+
+
+class IdMapStore:
+    """
+    Mapa persistente TMDB → IMDb (el mapeo no cambia nunca).
+
+    Se guarda en un JSON junto a active_jobs.json reutilizando el JobStore para
+    escrituras agrupadas y atómicas. Se carga la primera vez que se consulta.
+    """
+
+    def __init__(self, path: str):
+        self._ids: dict = {}   # "movie:123" -> {"imdb_id": "tt..."}
+        self._store = JobStore(path, self._ids, flush_interval_ms=2000)
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(media_type: str, tmdb_id) -> str:
+        return f"{media_type}:{tmdb_id}"
+
+    def ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self._store.load()
+                self._store.start()
+                self._loaded = True
+                print(f"[IdMap] {len(self._ids)} IDs TMDB→IMDb cargados")
+
+    def get_imdb_id(self, media_type: str, tmdb_id) -> Optional[str]:
+        self.ensure_loaded()
+        entry = self._ids.get(self._key(media_type, tmdb_id))
+        if entry and entry.get("imdb_id"):
+            self.hits += 1
+            return entry["imdb_id"]
+        self.misses += 1
+        return None
+
+    def put_imdb_id(self, media_type: str, tmdb_id, imdb_id: Optional[str]):
+        if not imdb_id:
+            return
+        self.ensure_loaded()
+        key = self._key(media_type, tmdb_id)
+        if self._ids.get(key, {}).get("imdb_id") == imdb_id:
+            return
+        self._ids[key] = {"imdb_id": imdb_id}
+        self._store.mark_dirty()
+
+    def close(self):
+        if self._loaded:
+            self._store.close()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._ids), "hits": self.hits, "misses": self.misses, "path": self._store.path}
+
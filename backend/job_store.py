@@ -0,0 +1,189 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterator, Optional, Tuple
+
+from metrics import histogram
+
+WRITE_SECONDS = histogram("job_store_write_seconds", "Duración de cada volcado a disco de un JobStore")
+
+
+class JobStore:
+    """
+    Persistencia de `active_jobs` con escrituras agrupadas.
+
+    Los cambios solo marcan el store como sucio; un hilo en background vuelca el
+    diccionario como mucho cada `flush_interval_ms` usando archivo temporal +
+    os.replace, así un crash nunca deja el JSON truncado.
+    """
+
+    def __init__(self, path: str, jobs: Optional[dict] = None, flush_interval_ms: int = 500):
+        self.path = path
+        self.jobs = jobs if jobs is not None else {}
+        self.flush_interval = flush_interval_ms / 1000.0
+        self._dirty = threading.Event()
+        self._write_lock = threading.Lock()
+        self._marks_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.dirty_marks = 0
+        self.writes = 0
+
+    # --- API pública ---
+
+    def mark_dirty(self):
+        """Registra que hubo cambios. Seguro de llamar desde cualquier hilo."""
+        with self._marks_lock:
+            self.dirty_marks += 1
+        self._dirty.set()
+
+    def load(self) -> dict:
+        """Carga los trabajos guardados dentro del mismo diccionario `jobs`."""
+        loaded = dict(self.iter_jobs())
+        self.jobs.clear()
+        self.jobs.update(loaded)
+        return self.jobs
+
+    def iter_jobs(self) -> Iterator[Tuple[str, dict]]:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"[Jobs] Error cargando {self.path}: {e}")
+            return
+        yield from data.items()
+
+    def flush(self) -> bool:
+        """Escribe ya si hay cambios pendientes. Devuelve True si escribió."""
+        with self._write_lock:
+            if not self._dirty.is_set():
+                return False
+            self._dirty.clear()
+            try:
+                with WRITE_SECONDS.time():
+                    self._write()
+                self.writes += 1
+                return True
+            except Exception as e:
+                # Reintentar en el próximo tick
+                self._dirty.set()
+                print(f"[Jobs] Error guardando: {e}")
+                return False
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def close(self):
+        """Detiene el hilo y vuelca los cambios pendientes (usar al apagar)."""
+        self._stop.set()
+        self.flush()
+
+    def stats(self) -> dict:
+        return {"path": self.path, "jobs": len(self.jobs), "dirty_marks": self.dirty_marks, "writes": self.writes}
+
+    # --- Internos ---
+
+    def _snapshot(self) -> dict:
+        # Otros hilos mutan `jobs` sin lock; si cambia mientras copiamos, reintentamos
+        for _ in range(5):
+            try:
+                return {job_id: dict(job) for job_id, job in list(self.jobs.items())}
+            except RuntimeError:
+                time.sleep(0.001)
+        raise RuntimeError("active_jobs cambió durante la copia")
+
+    def _write(self):
+        data = json.dumps(self._snapshot())
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self._dirty.wait(timeout=1.0):
+                continue
+            self.flush()
+            # Limitar la frecuencia de escritura: los cambios de este intervalo se juntan en la próxima
+            self._stop.wait(self.flush_interval)
+
+
+class SQLiteJobStore(JobStore):
+    """
+    Variante SQLite (WAL): una fila por trabajo, solo se reescriben los trabajos
+    que cambiaron y al reiniciar se pueden leer de a uno con `iter_jobs()`.
+    Al crear la base se importan los trabajos del JSON de `import_from` (el
+    store anterior) si existe; el JSON queda intacto.
+    """
+
+    def __init__(self, path: str, jobs: Optional[dict] = None, flush_interval_ms: int = 500, import_from: Optional[str] = None):
+        super().__init__(path, jobs, flush_interval_ms)
+        self.import_from = import_from
+        self._written: dict = {}   # job_id -> JSON ya persistido
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        # Conexión perezosa: el directorio de config puede no existir al importar
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS jobs (job_id TEXT PRIMARY KEY, data TEXT NOT NULL, updated REAL)")
+            self._conn.commit()
+            # user_version marca que la importación ya se hizo: vaciar la base luego no la repite
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] == 0:
+                empty = self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == 0
+                if self.import_from and empty:
+                    self._import_json()
+                self._conn.execute("PRAGMA user_version = 1")
+        return self._conn
+
+    def iter_jobs(self) -> Iterator[Tuple[str, dict]]:
+        with self._write_lock:
+            try:
+                rows = self._db().execute("SELECT job_id, data FROM jobs ORDER BY updated").fetchall()
+            except sqlite3.Error as e:
+                print(f"[Jobs] Error cargando {self.path}: {e}")
+                return
+        for job_id, data in rows:
+            try:
+                job = json.loads(data)
+            except ValueError:
+                continue
+            self._written[job_id] = data
+            yield job_id, job
+
+    def _import_json(self):
+        rows = [(job_id, json.dumps(job), time.time()) for job_id, job in JobStore(self.import_from).iter_jobs()]
+        with self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO jobs (job_id, data, updated) VALUES (?, ?, ?)", rows)
+        if rows:
+            print(f"[Jobs] {len(rows)} trabajos importados de {self.import_from} a {self.path}")
+
+    def _write(self):
+        snapshot = {job_id: json.dumps(job) for job_id, job in self._snapshot().items()}
+        changed = [(job_id, data, time.time()) for job_id, data in snapshot.items() if self._written.get(job_id) != data]
+        removed = [(job_id,) for job_id in self._written if job_id not in snapshot]
+        if not changed and not removed:
+            return
+        conn = self._db()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO jobs (job_id, data, updated) VALUES (?, ?, ?)", changed)
+            conn.executemany("DELETE FROM jobs WHERE job_id = ?", removed)
+        self._written = snapshot
+
+
+def create_job_store(path: str, jobs: dict, backend: str = "json", flush_interval_ms: int = 500) -> JobStore:
+    """Crea el store configurado ("json" por defecto o "sqlite")."""
+    if backend == "sqlite":
+        return SQLiteJobStore(os.path.splitext(path)[0] + ".db", jobs, flush_interval_ms, import_from=path)
+    return JobStore(path, jobs, flush_interval_ms)
@@ -0,0 +1,478 @@
+import ctypes
+import ctypes.util
+import os
+import re
+import struct
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from media_utils import extract_se_info
+
+SECTIONS = {"movie": "Movies", "tv": "Shows"}
+VIDEO_EXTS = ('.mkv', '.mp4', '.avi', '.ts', '.webm')
+_TMDB_RE = re.compile(r'\{tmdb-(\d+)\}')
+
+# inotify (linux/inotify.h)
+IN_ATTRIB = 0x004
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_IGNORED = 0x8000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF | IN_ATTRIB
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _Folder:
+    """Carpeta de un título en la librería (ej: Shows/Ted Lasso (2020) {tmdb-97546})."""
+    __slots__ = ("media_type", "name", "tmdb_id", "dirs", "files", "episodes", "dir_episodes", "video_dirs", "has_video", "version")
+
+    def __init__(self, media_type: str, name: str):
+        self.media_type = media_type
+        self.name = name
+        match = _TMDB_RE.search(name)
+        self.tmdb_id = int(match.group(1)) if match else None
+        self.dirs: List[str] = []             # rutas relativas
+        self.files: Dict[str, Optional[str]] = {}  # ruta relativa -> destino del symlink (None si no es symlink)
+        self.episodes = set()                 # {(temporada, episodio)}
+        self.dir_episodes: Dict[str, set] = {}  # carpeta relativa -> {(temporada, episodio)}
+        self.video_dirs = set()               # carpetas relativas con al menos un video
+        self.has_video = False
+        self.version = 0
+
+    def summary(self) -> dict:
+        return {"name": self.name, "tmdb_id": self.tmdb_id}
+
+
+class LibraryIndex:
+    """
+    Índice en memoria de la librería de Plex (/Media):
+    tmdb_id → carpeta → temporadas/episodios → destino de cada symlink.
+
+    Se construye una vez al arrancar y se actualiza por carpeta: al crear/borrar
+    symlinks desde la app (notify_path) y con inotify sobre la raíz para los cambios
+    externos. Si inotify no está disponible se re-escanea periódicamente.
+    Cada cambio incrementa `version` para que los clientes pidan solo lo nuevo (since).
+    """
+
+    def __init__(self, root: str = "/Media", rescan_interval: int = 300, max_tombstones: int = 1000):
+        self.root = root
+        self.rescan_interval = rescan_interval
+        self._lock = threading.RLock()
+        self._folders: Dict[Tuple[str, str], _Folder] = {}
+        self._by_tmdb: Dict[int, set] = {}
+        self._tombstones: deque = deque(maxlen=max_tombstones)  # (version, media_type, name)
+        self._tombstone_floor = 0  # Versiones anteriores a esta ya no tienen historial de borrados
+        self.version = 0
+        self.built_at = 0.0
+        self.build_duration = 0.0
+        self.rescans = 0
+        self.skipped_rescans = 0
+        self.inotify_active = False
+        self._scanned: Dict[Tuple[str, str], Optional[dict]] = {}  # Firma de cada carpeta en su último re-escaneo
+        self._dirty: set = set()
+        self._dirty_lock = threading.Lock()
+        self._dirty_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[str], None]] = []
+
+    # --- Construcción y actualización ---
+
+    def build(self):
+        started = time.time()
+        found = set()
+        for media_type, section in SECTIONS.items():
+            section_dir = os.path.join(self.root, section)
+            try:
+                with os.scandir(section_dir) as it:
+                    names = [e.name for e in it if e.is_dir()]
+            except OSError:
+                names = []
+            for name in names:
+                found.add((media_type, name))
+                self.rescan_folder(media_type, name)
+        with self._lock:
+            for key in [k for k in self._folders if k not in found]:
+                self._drop(key)
+        self.built_at = time.time()
+        self.build_duration = self.built_at - started
+        print(f"[LibraryIndex] {len(found)} títulos indexados en {self.build_duration:.2f}s")
+
+    def rescan_folder(self, media_type: str, name: str) -> Optional[_Folder]:
+        """Re-lista una carpeta de título (incluyendo temporadas); si ya no existe la saca del índice."""
+        base = os.path.join(self.root, SECTIONS[media_type], name)
+        if not os.path.isdir(base):
+            with self._lock:
+                self._drop((media_type, name))
+                self._scanned[(media_type, name)] = None
+            return None
+
+        folder = _Folder(media_type, name)
+        signature = {}
+        for current, dirs, files in os.walk(base):
+            rel = os.path.relpath(current, base)
+            rel = "" if rel == "." else rel
+            signature[rel] = self._dir_signature(current, dirs + files)
+            folder.dirs.extend(os.path.join(rel, d) for d in dirs)
+            for f in files:
+                full = os.path.join(current, f)
+                try:
+                    target = os.readlink(full) if os.path.islink(full) else None
+                except OSError:
+                    target = None
+                folder.files[os.path.join(rel, f)] = target
+                f_s, f_e = extract_se_info(f)
+                if f_s is not None and f_e is not None:
+                    folder.episodes.add((f_s, f_e))
+                    folder.dir_episodes.setdefault(rel, set()).add((f_s, f_e))
+                if f.lower().endswith(VIDEO_EXTS):
+                    folder.has_video = True
+                    folder.video_dirs.add(rel)
+
+        with self._lock:
+            self.rescans += 1
+            self._scanned[(media_type, name)] = signature
+            old = self._folders.get((media_type, name))
+            if old is not None and old.files == folder.files and old.dirs == folder.dirs:
+                return old  # Sin cambios: no se mueve la versión
+            self.version += 1
+            folder.version = self.version
+            self._folders[(media_type, name)] = folder
+            if folder.tmdb_id is not None:
+                self._by_tmdb.setdefault(folder.tmdb_id, set()).add((media_type, name))
+        self._emit(base)
+        if self.inotify_active:
+            self._watch_folder(base, folder)
+        return folder
+
+    def notify_path(self, path: str):
+        """
+        Algo cambió en `path` (symlink creado/borrado, carpeta eliminada): re-escanea
+        su carpeta de título en el momento, así los endpoints ven el cambio al volver.
+        El evento de inotify del mismo cambio se descarta en _flush_dirty por la firma.
+        """
+        key = self._folder_key(path)
+        if key is not None:
+            self.rescan_folder(*key)
+        elif os.path.normpath(path) in (os.path.normpath(self.root), *[os.path.join(self.root, s) for s in SECTIONS.values()]):
+            self.build()
+
+    @staticmethod
+    def _dir_signature(path: str, names: List[str]) -> Optional[Tuple[int, frozenset]]:
+        try:
+            return os.stat(path).st_mtime_ns, frozenset(names)
+        except OSError:
+            return None
+
+    def _unchanged_since_scan(self, key: Tuple[str, str]) -> bool:
+        """True si la carpeta sigue igual que en su último re-escaneo (mtime y entradas de cada directorio)."""
+        with self._lock:
+            if key not in self._scanned:
+                return False
+            signature = self._scanned[key]
+        base = os.path.join(self.root, SECTIONS[key[0]], key[1])
+        if signature is None:
+            return not os.path.isdir(base)
+        for rel, expected in signature.items():
+            current = os.path.join(base, rel) if rel else base
+            try:
+                names = os.listdir(current)
+            except OSError:
+                return False
+            if self._dir_signature(current, names) != expected:
+                return False
+        return True
+
+    def _folder_key(self, path: str) -> Optional[Tuple[str, str]]:
+        rel = os.path.relpath(os.path.normpath(path), self.root)
+        parts = rel.split(os.sep)
+        if len(parts) < 2 or parts[0] == "..":
+            return None
+        for media_type, section in SECTIONS.items():
+            if parts[0] == section:
+                return media_type, parts[1]
+        return None
+
+    def _drop(self, key):
+        folder = self._folders.pop(key, None)
+        if folder is None:
+            return
+        self.version += 1
+        if len(self._tombstones) == self._tombstones.maxlen:
+            self._tombstone_floor = self._tombstones[0][0]
+        self._tombstones.append((self.version, key[0], key[1]))
+        self._emit(os.path.join(self.root, SECTIONS[key[0]], key[1]))
+        if folder.tmdb_id is not None:
+            keys = self._by_tmdb.get(folder.tmdb_id)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tmdb[folder.tmdb_id]
+
+    def add_listener(self, callback: Callable[[str], None]):
+        """Registra un callback que recibe la ruta de cada carpeta de título que cambió o se eliminó."""
+        self._listeners.append(callback)
+
+    def _emit(self, path: str):
+        for listener in list(self._listeners):
+            try:
+                listener(path)
+            except Exception as e:
+                print(f"[LibraryIndex] ⚠️ Error en listener: {e}")
+
+    # --- Consultas ---
+
+    def is_ready(self) -> bool:
+        return self.built_at > 0
+
+    def get_folder(self, media_type: str, name: str) -> Optional[_Folder]:
+        with self._lock:
+            return self._folders.get((media_type, name))
+
+    def folders_for(self, tmdb_id: int) -> List[_Folder]:
+        with self._lock:
+            return [self._folders[k] for k in self._by_tmdb.get(tmdb_id, ())]
+
+    def iter_symlinks(self) -> List[Tuple[str, str]]:
+        """(ruta del symlink, destino tal cual lo devuelve readlink) de toda la librería."""
+        with self._lock:
+            folders = list(self._folders.values())
+        out = []
+        for folder in folders:
+            base = os.path.join(self.root, SECTIONS[folder.media_type], folder.name)
+            out.extend((os.path.join(base, rel), target) for rel, target in folder.files.items() if target is not None)
+        return out
+
+    def has_episode(self, name: str, season: int, episode: int) -> bool:
+        folder = self.get_folder("tv", name)
+        return folder is not None and (season, episode) in folder.episodes
+
+    def dir_summary(self, path: str) -> Optional[dict]:
+        """
+        Episodios (S, E) y presencia de video de una carpeta de título o de temporada,
+        con el mismo formato que el listado en disco de /api/symlink/exists.
+        """
+        key = self._folder_key(path)
+        folder = self.get_folder(*key) if key else None
+        if folder is None:
+            return None
+        rel = os.path.relpath(os.path.normpath(path), os.path.join(self.root, SECTIONS[key[0]], key[1]))
+        rel = "" if rel == "." else rel
+        if rel and rel not in folder.dirs:
+            return None
+        return {"episodes": folder.dir_episodes.get(rel, set()), "has_video": rel in folder.video_dirs}
+
+    def list(self, media_type: Optional[str] = None, offset: int = 0, limit: Optional[int] = None, since: Optional[int] = None) -> dict:
+        """
+        Títulos de la librería ordenados por nombre, paginados por sección.
+        Con `since` solo devuelve las carpetas cambiadas después de esa versión y las eliminadas
+        (si la versión es demasiado vieja se devuelve todo con full=True).
+        """
+        with self._lock:
+            full = since is None or since < self._tombstone_floor
+            result = {"version": self.version, "full": full, "totals": {}}
+            for mt, section in (("movie", "movies"), ("tv", "shows")):
+                if media_type and media_type != mt:
+                    continue
+                folders = [f for (k_mt, _), f in self._folders.items() if k_mt == mt and (full or f.version > since)]
+                folders.sort(key=lambda f: f.name)
+                result["totals"][section] = len(folders)
+                end = None if limit is None else offset + limit
+                result[section] = [f.summary() for f in folders[offset:end]]
+            if not full:
+                result["removed"] = [{"media_type": mt, "name": name} for v, mt, name in self._tombstones
+                                     if v > since and (not media_type or media_type == mt)]
+            return result
+
+    def structure(self, media_type: str, name: str, is_alive=None) -> Optional[List[dict]]:
+        """Árbol de una carpeta de título (mismo formato que /api/library/structure)."""
+        folder = self.get_folder(media_type, name)
+        if folder is None:
+            return None
+        base = os.path.join(self.root, SECTIONS[media_type], name)
+        tree = [{"type": "directory", "name": os.path.basename(d), "path": d, "full_path": os.path.join(base, d)} for d in folder.dirs]
+        for rel, target in folder.files.items():
+            full = os.path.join(base, rel)
+            if target is None:
+                valid = True
+            elif is_alive is not None:
+                valid = is_alive(target if os.path.isabs(target) else os.path.join(os.path.dirname(full), target))
+            else:
+                valid = os.path.exists(full)
+            tree.append({"type": "file", "name": os.path.basename(rel), "path": rel, "full_path": full,
+                         "is_symlink": target is not None, "is_valid": valid, "target": target})
+        tree.sort(key=lambda x: (0 if x["type"] == "directory" else 1, x["path"]))
+        return tree
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "root": self.root,
+                "version": self.version,
+                "movies": sum(1 for k in self._folders if k[0] == "movie"),
+                "shows": sum(1 for k in self._folders if k[0] == "tv"),
+                "build_duration": round(self.build_duration, 4),
+                "rescans": self.rescans,
+                "inotify": self.inotify_active,
+                "skipped_rescans": self.skipped_rescans,
+            }
+
+    # --- inotify ---
+
+    def start(self):
+        """Construye el índice y arranca la vigilancia (inotify o re-escaneo periódico)."""
+        self.build()
+        if self._thread is not None:
+            return
+        self._inotify = _Inotify.create()
+        if self._inotify is not None:
+            self.inotify_active = True
+            self._wd_paths: Dict[int, str] = {}
+            self._watch_tree()
+            self._thread = threading.Thread(target=self._run_inotify, daemon=True)
+            print(f"[LibraryIndex] Vigilando {self.root} con inotify ({len(self._wd_paths)} carpetas)")
+        else:
+            self._thread = threading.Thread(target=self._run_polling, daemon=True)
+            print(f"[LibraryIndex] inotify no disponible: re-escaneo cada {self.rescan_interval}s")
+        self._thread.start()
+
+    def _add_watch(self, path: str):
+        wd = self._inotify.add_watch(path, WATCH_MASK)
+        if wd >= 0:
+            self._wd_paths[wd] = path
+
+    def _watch_tree(self):
+        self._add_watch(self.root)
+        for section in SECTIONS.values():
+            section_dir = os.path.join(self.root, section)
+            if os.path.isdir(section_dir):
+                self._add_watch(section_dir)
+        with self._lock:
+            folders = list(self._folders.values())
+        for folder in folders:
+            self._watch_folder(os.path.join(self.root, SECTIONS[folder.media_type], folder.name), folder)
+
+    def _watch_folder(self, base: str, folder: _Folder):
+        self._add_watch(base)
+        for d in folder.dirs:
+            self._add_watch(os.path.join(base, d))
+
+    def _run_inotify(self):
+        flusher = threading.Thread(target=self._flush_dirty, daemon=True)
+        flusher.start()
+        while True:
+            try:
+                for wd, mask, name in self._inotify.read_events():
+                    if mask & IN_IGNORED:
+                        self._wd_paths.pop(wd, None)
+                        continue
+                    parent = self._wd_paths.get(wd)
+                    if parent is None:
+                        continue
+                    self._mark_dirty(os.path.join(parent, name) if name else parent)
+            except Exception as e:
+                print(f"[LibraryIndex] ⚠️ Error leyendo eventos inotify: {e}")
+                time.sleep(1)
+
+    def _mark_dirty(self, path: str):
+        with self._dirty_lock:
+            self._dirty.add(path)
+        self._dirty_event.set()
+
+    def _flush_dirty(self, debounce: float = 0.2):
+        """Agrupa ráfagas de eventos (ej: una temporada enlazada de golpe) en un re-escaneo por carpeta."""
+        while True:
+            self._dirty_event.wait()
+            time.sleep(debounce)
+            self._dirty_event.clear()
+            with self._dirty_lock:
+                paths, self._dirty = self._dirty, set()
+            keys, rebuild = set(), False
+            for path in paths:
+                key = self._folder_key(path)
+                if key is not None:
+                    keys.add(key)
+                else:
+                    rebuild = True
+            try:
+                if rebuild:
+                    self.build()
+                    self._watch_tree()
+                for key in keys:
+                    if self._unchanged_since_scan(key):
+                        # Ya re-escaneada después del cambio (ej: por notify_path)
+                        self.skipped_rescans += 1
+                        continue
+                    self.rescan_folder(*key)
+            except Exception as e:
+                print(f"[LibraryIndex] ⚠️ Error actualizando índice: {e}")
+
+    def _run_polling(self):
+        while True:
+            time.sleep(self.rescan_interval)
+            try:
+                self.build()
+            except Exception as e:
+                print(f"[LibraryIndex] ⚠️ Error re-escaneando librería: {e}")
+
+
+class _Inotify:
+    """Envoltorio mínimo de inotify vía ctypes (sin dependencias externas)."""
+
+    def __init__(self, libc, fd: int):
+        self._libc = libc
+        self.fd = fd
+
+    @classmethod
+    def create(cls) -> Optional["_Inotify"]:
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+        return cls(libc, fd)
+
+    def add_watch(self, path: str, mask: int) -> int:
+        return self._libc.inotify_add_watch(self.fd, os.fsencode(path), ctypes.c_uint32(mask))
+
+    def read_events(self):
+        data = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            yield wd, mask, os.fsdecode(name)
+
+
+_indexes: Dict[str, LibraryIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_library_index(root: str = "/Media") -> LibraryIndex:
+    """Devuelve el índice compartido de la librería en `root` (uno por proceso)."""
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = LibraryIndex(root)
+            _indexes[root] = index
+        return index
+
+
+def notify_library_change(path: str, root: str = "/Media"):
+    """Avisa al índice (si existe) que `path` cambió; no falla si el índice no está construido."""
+    index = _indexes.get(root)
+    if index is None or not index.is_ready():
+        return
+    try:
+        index.notify_path(path)
+    except Exception as e:
+        print(f"[LibraryIndex] ⚠️ Error actualizando {path}: {e}")
@@ -0,0 +1,91 @@
+"""
+Proveedores de listado del remoto para el índice del mount.
+
+El índice recorre por defecto el mount FUSE (un stat/scandir por directorio, cada
+uno con su PROPFIND a WebDAV y sujeto a --dir-cache-time). RcloneListProvider
+pide el árbol directamente al backend `torbox:` con operations/list vía RC: una
+sola respuesta JSON (leída en streaming) por árbol, sin pasar por el kernel ni
+por la caché de directorios del VFS. Si RC no responde, MountIndex vuelve al
+recorrido FUSE y el proveedor no se reintenta hasta pasado `retry_after`.
+"""
+import posixpath
+import time
+from typing import Dict, List, Optional, Tuple
+
+from rclone_rc import RcloneRC, RcloneRCError, get_rc_client
+
+# {dir relativo ("" = raíz): (archivos, subdirs)}, {dir relativo: ModTime del remoto}
+Listing = Tuple[Dict[str, Tuple[List[str], List[str]]], Dict[str, str]]
+
+
+class RcloneListProvider:
+    """Listados del remoto vía `operations/list` de la API RC de rclone."""
+
+    name = "rc"
+
+    def __init__(self, remote: str = "torbox:", client: Optional[RcloneRC] = None, retry_after: float = 60.0):
+        self.remote = remote
+        self.client = client
+        self.retry_after = retry_after
+        self._down_until = 0.0
+        self.lists = 0
+        self.failures = 0
+        self.last_entries = 0
+        self.last_duration = 0.0
+        self.last_error = ""
+
+    def available(self) -> bool:
+        return time.time() >= self._down_until
+
+    def list_tree(self, rel: str = "", recursive: bool = True) -> Optional[Listing]:
+        """
+        Lista `rel` (relativo a la raíz del remoto). Con recursive=True incluye
+        todos los subdirectorios; si no, solo `rel` (los ModTime de sus subdirs
+        sirven para decidir cuáles re-listar). None si RC no está disponible.
+        """
+        rel = rel.strip("/")
+        client = self.client or get_rc_client()
+        started = time.perf_counter()
+        listings: Dict[str, Tuple[List[str], List[str]]] = {rel: ([], [])}
+        modtimes: Dict[str, str] = {}
+        entries = 0
+        try:
+            for item in client.iter_list(self.remote, rel, recursive=recursive):
+                path = (item.get("Path") or item.get("Name") or "").strip("/")
+                if rel and path != rel and not path.startswith(rel + "/"):
+                    path = posixpath.join(rel, path)
+                if not path:
+                    continue
+                entries += 1
+                parent = posixpath.dirname(path)
+                files, subdirs = listings.setdefault(parent, ([], []))
+                name = item.get("Name") or posixpath.basename(path)
+                if item.get("IsDir"):
+                    subdirs.append(name)
+                    modtimes[path] = item.get("ModTime")
+                    if recursive:
+                        listings.setdefault(path, ([], []))
+                else:
+                    files.append(name)
+        except RcloneRCError as e:
+            self.failures += 1
+            self.last_error = str(e)
+            self._down_until = time.time() + self.retry_after
+            print(f"[Listing] ⚠️ operations/list no disponible, usando el mount FUSE ({self.retry_after:.0f}s): {e}")
+            return None
+        self.lists += 1
+        self.last_entries = entries
+        self.last_duration = time.perf_counter() - started
+        return listings, modtimes
+
+    def stats(self) -> dict:
+        return {
+            "provider": self.name,
+            "remote": self.remote,
+            "available": self.available(),
+            "lists": self.lists,
+            "failures": self.failures,
+            "last_entries": self.last_entries,
+            "last_duration": round(self.last_duration, 4),
+            "last_error": self.last_error,
+        }
@@ -1,22 +1,37 @@
-from typing import Optional, Tuple
-from fastapi import FastAPI, HTTPException
+from typing import List, Optional, Tuple
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import requests
-import yaml
+import httpx
 import os
-import docker
 import subprocess
+import itertools
 import time
 import threading
+from collections import deque
 from config import config, reload_config
 import config as config_module
-from watcher import start_watcher_thread
-from symlinks import create_plex_symlink
-from health import start_health_monitor
+from watcher import start_watcher_thread, start_season_watcher, get_scheduler
+from symlinks import create_plex_symlink, create_season_symlinks
+from health import get_health_engine, start_health_monitor
+from mount_index import get_mount_index, start_mount_indexer
+from fs_cache import get_fs_cache
+from rclone_rc import RcloneRCError, get_rc_client
+from rclone_obscure import obscure
+from job_store import create_job_store
+from events import event_bus
+from tmdb_client import get_tmdb_client
+from http_async import ClientDisconnected, cancel_on_disconnect, get_async_http
+from id_map import IdMapStore
+from library_index import get_library_index, notify_library_change
+from metrics import cache_collector, counter, expose, register_collector
+from streams import facets, filter_streams, get_aiostreams_client, paginate, rank_streams
+from startup import get_readiness
 
 app = FastAPI(title="PlexAioTorb Backend")
-notification_queue = [] # Cola simple para avisos al frontend
+notification_queue = deque(maxlen=100) # Últimos avisos (seq, mensaje) para el polling de respaldo del frontend
+notification_seq = itertools.count(1)
 job_logs: dict = {}      # Logs detallados por trabajo: {job_id: [str]}
 MAX_JOB_LOGS = 500       # Max líneas de log por trabajo
 
@@ -32,26 +47,97 @@ def append_job_log(job_id: str, msg: str):
     if job_id not in job_logs:
         job_logs[job_id] = []
     ts = datetime.now().strftime("%H:%M:%S")
-    job_logs[job_id].append(f"[{ts}] {msg}")
+    line = f"[{ts}] {msg}"
+    job_logs[job_id].append(line)
     # Mantener log circular para no usar demasiada RAM
     if len(job_logs[job_id]) > MAX_JOB_LOGS:
         job_logs[job_id] = job_logs[job_id][-MAX_JOB_LOGS:]
+    event_bus.publish("job_log", {"job_id": job_id, "line": line, "total": len(job_logs[job_id])})
+
+def push_notification(msg: str):
+    """Encola un aviso para el frontend y lo emite por el stream de eventos."""
+    seq = next(notification_seq)
+    notification_queue.append((seq, msg))
+    event_bus.publish("notification", {"message": msg, "seq": seq})
+
+job_store = create_job_store(
+    JOBS_FILE, active_jobs,
+    backend=config_module.config.get("jobs", {}).get("backend", "json"),
+    flush_interval_ms=config_module.config.get("jobs", {}).get("flush_interval_ms", 500)
+)
 
-def save_jobs():
-    try:
-        with open(JOBS_FILE, 'w') as f:
-            json.dump(active_jobs, f)
-    except Exception as e:
-        print(f"[Jobs] Error guardando: {e}")
+_published_jobs: dict = {}   # Último estado emitido por job para calcular diffs
+_publish_lock = threading.Lock()
+
+def public_job(job: dict) -> dict:
+    # Copia superficial: `req` se incluye (el frontend lo usa para el vínculo manual) pero al no cambiar solo viaja una vez
+    return dict(job)
+
+def publish_job_changes(job_id: Optional[str] = None):
+    """Emite por el stream los campos que cambiaron desde el último evento (de un job o de todos)."""
+    with _publish_lock:
+        if job_id is not None:
+            job = active_jobs.get(job_id)
+            current = {job_id: public_job(job)} if job is not None else {}
+            candidates = [job_id]
+        else:
+            try:
+                current = {jid: public_job(job) for jid, job in list(active_jobs.items())}
+            except RuntimeError:
+                return
+            candidates = set(current) | set(_published_jobs)
+        for jid in candidates:
+            new, old = current.get(jid), _published_jobs.get(jid)
+            if new is None:
+                if old is not None:
+                    del _published_jobs[jid]
+                    event_bus.publish("job_removed", {"job_id": jid})
+                continue
+            changes = {k: v for k, v in new.items() if old is None or old.get(k) != v}
+            if changes:
+                _published_jobs[jid] = new
+                event_bus.publish("job", {"job_id": jid, "changes": changes})
+
+# Mapa TMDB→IMDb persistente junto a active_jobs.json (evita un round-trip a TMDB por cada /api/streams)
+id_map = IdMapStore(os.path.join(os.path.dirname(JOBS_FILE), "id_map.json"))
+# Snapshot del índice del mount: tras reiniciar solo se re-listan las carpetas que cambiaron
+MOUNT_SNAPSHOT_FILE = os.path.join(os.path.dirname(JOBS_FILE), "mount_index.json.gz")
+
+# --- Métricas (/metrics) ---
+RCLONE_CHECKS = counter("rclone_monitor_checks", "Chequeos del monitor de rclone por resultado", ["result"])
+RCLONE_RESTARTS = counter("rclone_monitor_restarts", "Reinicios de rclone del monitor por resultado", ["result"])
+
+def _collect_state():
+    """Gauges leídos al exportar de los stats() que ya llevan los módulos."""
+    scheduler = get_scheduler().stats()
+    yield ("watcher_queue_depth", "gauge", "Trabajos en la cola del scheduler", [({}, scheduler["queue_depth"])])
+    yield ("watcher_max_wait_seconds", "gauge", "Espera del trabajo más antiguo en la cola", [({}, scheduler["max_wait_seconds"])])
+    mount = get_mount_index().stats()
+    yield ("mount_index_entries", "gauge", "Entradas del índice del mount",
+           [({"kind": "files"}, mount["files"]), ({"kind": "dirs"}, mount["dirs"])])
+    library = get_library_index(config_module.config.get("plex", {}).get("library_path", "/Media")).stats()
+    yield ("library_index_titles", "gauge", "Títulos del índice de la biblioteca",
+           [({"media_type": "movie"}, library["movies"]), ({"media_type": "tv"}, library["shows"])])
+    store = job_store.stats()
+    yield ("job_store_jobs", "gauge", "Trabajos en active_jobs.json", [({}, store["jobs"])])
+    yield ("job_store_writes_total", "counter", "Volcados a disco de active_jobs.json", [({}, store["writes"])])
+    yield ("job_store_dirty_marks_total", "counter", "Cambios marcados en active_jobs.json", [({}, store["dirty_marks"])])
+    http = get_async_http().stats()
+    yield ("http_in_flight", "gauge", "Peticiones async salientes en curso", [({}, http["in_flight"])])
+
+register_collector(cache_collector("tmdb", lambda: get_tmdb_client().stats()))
+register_collector(cache_collector("aiostreams", lambda: get_aiostreams_client().stats()))
+register_collector(cache_collector("fs_exists", lambda: get_fs_cache().stats()["exists"]))
+register_collector(cache_collector("fs_listings", lambda: get_fs_cache().stats()["listings"]))
+register_collector(_collect_state)
+
+def save_jobs(job_id: Optional[str] = None):
+    """Marca los trabajos como modificados; el job store los vuelca agrupados en background."""
+    job_store.mark_dirty()
+    publish_job_changes(job_id)
 
 def load_jobs():
-    global active_jobs
-    if os.path.exists(JOBS_FILE):
-        try:
-            with open(JOBS_FILE, 'r') as f:
-                active_jobs = json.load(f)
-        except Exception:
-            active_jobs = {}
+    job_store.load()
 
 app.add_middleware(
     CORSMiddleware,
@@ -61,70 +147,141 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.on_event("startup")
-def on_startup():
-    load_jobs()
-    start_health_monitor(interval_seconds=3600, base_library_path=config.get("plex", {}).get("library_path", "/Media"))
-    
-    # Iniciar monitoreo de rclone
-    start_rclone_monitor()
-    
-    # Esperar a que rclone esté montado antes de reanudar búsquedas
-    print("[Startup] Esperando a que rclone esté montado...")
-    for attempt in range(60):  # 60 intentos x 1s = 60s max
-        try:
-            result = subprocess.run(
-                ["curl", "-s", "http://127.0.0.1:5572/rc/stats"],
-                capture_output=True,
-                timeout=2,
-                text=True
-            )
-            if result.returncode == 0 and os.path.exists("/mnt/torbox"):
-                item_count = len(os.listdir("/mnt/torbox"))
-                if item_count > 0:
-                    print(f"[Startup] ✓ Rclone montado y listo ({item_count} items)")
-                    break
-                else:
-                    print(f"[Startup] RC activo pero esperando items... ({attempt}s)")
-        except:
-            pass
-        time.sleep(1)
-    else:
-        print("[Startup] ⚠️ Rclone no respondió después de 60s. Continuando sin reanudar búsquedas.")
-        return
-    
-    # Reanudar búsquedas pendientes (SOLO si rclone está montado)
-    pending_jobs = [job_id for job_id, job in active_jobs.items() 
+@app.exception_handler(ClientDisconnected)
+async def client_disconnected_handler(request: Request, exc: ClientDisconnected):
+    # Nadie va a leer la respuesta: 499 (convención de nginx) solo para los logs
+    return Response(status_code=499)
+
+MOUNT_PATH = "/mnt/torbox"
+
+def _check_config() -> Tuple[bool, str]:
+    if is_setup_complete():
+        return True, "ok"
+    return False, "sin configurar (falta /api/setup)"
+
+def _check_rclone_rc() -> Tuple[bool, str]:
+    if get_rc_client().alive():
+        return True, "ok"
+    return False, "RC no responde en 127.0.0.1:5572"
+
+def _check_mount() -> Tuple[bool, str]:
+    if not os.path.ismount(MOUNT_PATH):
+        return False, f"{MOUNT_PATH} no está montado"
+    items = len(os.listdir(MOUNT_PATH))
+    return items > 0, f"{items} entradas"
+
+def _start_mount_indexer():
+    mount_config = config_module.config.get("mount", {})
+    start_mount_indexer(
+        interval_seconds=30,
+        listing=mount_config.get("listing", "rc"),
+        remote=mount_config.get("remote", "torbox:"),
+        snapshot_path=MOUNT_SNAPSHOT_FILE,
+        snapshot_interval=mount_config.get("snapshot_interval_seconds", 300),
+    )
+    # La caché de stats/listados se invalida con los cambios del índice
+    get_mount_index().add_listener(get_fs_cache().on_mount_change)
+
+def _start_torbox_discovery():
+    torbox_config = config_module.config.get("torbox", {})
+    if torbox_config.get("api_key"):
+        # Descubrimiento por API: los jobs ven los torrents terminados sin esperar a la caché de rclone
+        from torbox_api import API_URL, TorBoxAPI, TorBoxDiscovery
+        api = TorBoxAPI(torbox_config["api_key"], torbox_config.get("api_url", API_URL))
+        get_scheduler().discovery = TorBoxDiscovery(api, interval=torbox_config.get("discovery_interval", 5))
+        print("[TorBoxAPI] Descubrimiento por API activado")
+
+def _start_library_index():
+    library_root = config_module.config.get("plex", {}).get("library_path", "/Media")
+    get_library_index(library_root).add_listener(get_fs_cache().on_library_change)
+    threading.Thread(target=get_library_index(library_root).start, daemon=True).start()
+
+def _start_health_monitor():
+    health_config = config_module.config.get("health", {})
+    start_health_monitor(
+        interval_seconds=health_config.get("interval_seconds", 3600),
+        base_library_path=config_module.config.get("plex", {}).get("library_path", "/Media"),
+        state_path=os.path.join(os.path.dirname(JOBS_FILE), "symlink_health.json"),
+        workers=health_config.get("workers", 8),
+        auto_repair=health_config.get("auto_repair", True),
+    )
+
+def resume_pending_jobs():
+    """Reanuda las búsquedas pendientes (se llama cuando RC y el mount están sanos)."""
+    pending_jobs = [job_id for job_id, job in active_jobs.items()
                     if job.get("status") not in ["Completed", "Error"]]
-    
     if pending_jobs:
         print(f"[Jobs] Reanudando {len(pending_jobs)} búsquedas pendientes...")
-        for job_id in pending_jobs:
-            job = active_jobs[job_id]
-            print(f"[Jobs] Reanudando búsqueda para: {job.get('title')}")
-            # Re-disparamos la lógica de descarga usando los datos guardados
-            if "req" in job:
-                try:
-                    # Usamos una función interna para evitar loops de red
-                    req_data = DownloadRequest(**job["req"])
-                    threading.Thread(target=initiate_download_process, args=(req_data, job_id), daemon=True).start()
-                except Exception as e:
-                    print(f"[Jobs] Error reanudando {job_id}: {e}")
+    resumed = 0
+    for job_id in pending_jobs:
+        job = active_jobs[job_id]
+        print(f"[Jobs] Reanudando búsqueda para: {job.get('title')}")
+        # Re-disparamos la lógica de descarga usando los datos guardados
+        if "req" in job:
+            try:
+                # Usamos una función interna para evitar loops de red (solo encola en el scheduler)
+                req_data = DownloadRequest(**job["req"])
+                initiate_download_process(req_data, job_id)
+                resumed += 1
+            except Exception as e:
+                print(f"[Jobs] Error reanudando {job_id}: {e}")
+    get_readiness().set("jobs_resumed", True, f"{resumed} reanudados", required=False)
+
+@app.on_event("startup")
+def on_startup():
+    readiness = get_readiness()
+    readiness.register("config", _check_config)
+    readiness.register("rclone_rc", _check_rclone_rc)
+    readiness.register("mount", _check_mount)
+    readiness.set("job_store", False, "cargando")
+    readiness.set("jobs_resumed", False, "esperando a rclone y al mount", required=False)
+
+    # Lo único síncrono: los trabajos tienen que estar en memoria antes de atender /api/downloads
+    load_jobs()
+    job_store.start()
+    readiness.set("job_store", True, f"{len(active_jobs)} trabajos")
+    threading.Thread(target=id_map.ensure_loaded, daemon=True).start()
+
+    # El resto en segundo plano: la API ya acepta peticiones
+    readiness.run_stages([
+        ("mount_index", _start_mount_indexer),
+        ("torbox_api", _start_torbox_discovery),
+        ("library_index", _start_library_index),
+        ("health_monitor", _start_health_monitor),
+        ("rclone_monitor", start_rclone_monitor),
+    ])
+    # Reanudar búsquedas pendientes SOLO cuando rclone esté montado (sin límite de espera)
+    print("[Startup] Esperando a que rclone esté montado para reanudar búsquedas...")
+    readiness.wait_until(["rclone_rc", "mount"], resume_pending_jobs)
+
+@app.get("/healthz")
+def healthz():
+    """Liveness: el proceso responde"""
+    return {"status": "ok", "uptime_seconds": round(time.time() - get_readiness().started_at, 1)}
+
+@app.get("/readyz")
+def readyz():
+    """Readiness por subsistema (config, rclone RC, mount, job store); 503 si alguno requerido no está listo"""
+    report = get_readiness().report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+@app.on_event("shutdown")
+def on_shutdown():
+    # Volcar cambios pendientes de los trabajos antes de salir
+    job_store.close()
+    id_map.close()
+    get_mount_index().save_snapshot()
+    _health_engine().close()
+
+@app.on_event("shutdown")
+async def close_http_client():
+    await get_async_http().aclose()
 
 def start_rclone_monitor():
     """Monitorea rclone y se autorecupera si falla RC o el mount FUSE."""
 
     def rc_alive(timeout: int = 3) -> bool:
-        try:
-            result = subprocess.run(
-                ["curl", "-s", "http://127.0.0.1:5572/rc/stats"],
-                capture_output=True,
-                timeout=timeout,
-                text=True
-            )
-            return result.returncode == 0
-        except Exception:
-            return False
+        return get_rc_client().alive()
 
     def mount_alive() -> Tuple[bool, str, int]:
         """Verifica que /mnt/torbox esté montado y funcional."""
@@ -218,6 +375,7 @@ def start_rclone_monitor():
                 rc_ok = rc_alive(3)
                 mount_ok, mount_reason, item_count = mount_alive()
 
+                RCLONE_CHECKS.inc(result="ok" if rc_ok and mount_ok else ("rc_down" if not rc_ok else mount_reason.split(":")[0]))
                 if rc_ok and mount_ok:
                     consecutive_failures = 0
                     loading_grace_count = 0
@@ -244,6 +402,7 @@ def start_rclone_monitor():
                     continue
 
                 repaired = restart_rclone(reason)
+                RCLONE_RESTARTS.inc(result="ok" if repaired else "failed")
                 last_restart_at = time.time()
 
                 if not repaired and consecutive_failures >= 3:
@@ -271,6 +430,7 @@ class DownloadRequest(BaseModel):
     filename: str
     season_number: Optional[int] = None
     episode_number: Optional[int] = None
+    season_pack: bool = False  # Enlazar la temporada completa desde un pack
 
 class CacheCheckRequest(BaseModel):
     filename: str
@@ -292,6 +452,11 @@ class ManualLinkRequest(BaseModel):
     season_number: Optional[int] = None
     job_id: Optional[str] = None
 
+def docker_client():
+    """Cliente de Docker; el SDK se importa recién acá (solo lo usan setup, logs y reinicios)."""
+    import docker
+    return docker.from_env()
+
 def is_setup_complete():
     return bool(config_module.config.get("tmdb", {}).get("api_key"))
 
@@ -301,22 +466,8 @@ def get_status():
     return {"configured": is_setup_complete()}
 
 def obscure_password(password: str) -> str:
-    """"Usa Rclone instalado localmente en el backend para ofuscar (el backend container de Python puede que no tenga rclone, usemos subprocess si instalamos rclone-core, o un script puro python)
-    Since we are inside Alpine/Debian, we'll implement a basic rclone obscure python logic or run rclone from docker.
-    Since backend doesn't have rclone, we'll ask the 'rclone' container to do it via Docker API."""
-    try:
-        client = docker.from_env()
-        # Ensure rclone container exists. Since it restarts unless stopped, it is running but maybe failing mount.
-        # Let's run a temporary rclone container directly to avoid finding the specific one:
-        logs = client.containers.run(
-            "rclone/rclone:latest",
-            f"obscure '{password}'",
-            remove=True
-        )
-        return logs.decode("utf-8").strip()
-    except Exception as e:
-        print(f"Error obfuscating DB password via Docker API: {e}")
-        return ""
+    """Ofusca la contraseña para rclone.conf igual que `rclone obscure` (en proceso, sin Docker)."""
+    return obscure(password)
 
 @app.post("/api/setup")
 def run_setup(req: SetupRequest):
@@ -329,6 +480,7 @@ def run_setup(req: SetupRequest):
         "plex": {"library_path": "/Media"}
     }
     config_path = os.getenv("CONFIG_PATH", "config.yaml")
+    import yaml
     with open(config_path, "w", encoding="utf-8") as f:
         yaml.dump(new_config, f)
         
@@ -376,7 +528,7 @@ pass = {obscured}
 
     # 5. Reiniciar contenedores de rclone y plex
     try:
-        client = docker.from_env()
+        client = docker_client()
         try:
             plex_c = client.containers.get("plex")
             plex_c.restart()
@@ -442,13 +594,7 @@ def update_settings(req: SettingsUpdate):
 @app.get("/api/rclone/status")
 def rclone_status():
     try:
-        rc = subprocess.run(
-            ["curl", "-s", "http://127.0.0.1:5572/rc/stats"],
-            capture_output=True,
-            timeout=2,
-            text=True
-        )
-        rc_ok = rc.returncode == 0
+        rc_ok = get_rc_client().alive()
 
         if not os.path.exists("/mnt/torbox"):
             return {"status": "disconnected", "reason": "mount_path_missing", "rc": rc_ok}
@@ -467,7 +613,7 @@ def rclone_status():
 def get_global_logs():
     """"Devuelve un arreglo combinado con los últimos logs de los contenedores Docker"""
     try:
-        client = docker.from_env()
+        client = docker_client()
         combined = []
         for c in client.containers.list(all=True):
             if any(n in c.name for n in ["plexaiotorb-backend", "plex"]):
@@ -484,16 +630,13 @@ def get_global_logs():
 
 
 @app.get("/api/tmdb/trending")
-def get_trending(media_type: str = "all", time_window: str = "day", page: int = 1):
+async def get_trending(media_type: str = "all", time_window: str = "day", page: int = 1):
     """Obtiene tendencias de TMDB (movie, tv, all)"""
     if not TMDB_API_KEY:
         raise HTTPException(status_code=500, detail="TMDB API key no configurada")
     
-    url = f"https://api.themoviedb.org/3/trending/{media_type}/{time_window}?api_key={TMDB_API_KEY}&language=es-MX&page={page}"
     try:
-        r = requests.get(url)
-        r.raise_for_status()
-        data = r.json()
+        data = await get_tmdb_client().aget(f"/trending/{media_type}/{time_window}", TMDB_API_KEY, language="es-MX", page=page)
         results = []
         for item in data.get("results", []):
             m_type = item.get("media_type") or (media_type if media_type != "all" else "movie")
@@ -517,33 +660,27 @@ def get_trending(media_type: str = "all", time_window: str = "day", page: int =
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/tmdb/genres")
-def get_genres(media_type: str = "movie"):
+async def get_genres(media_type: str = "movie"):
     """Obtiene lista de géneros de TMDB"""
     if not TMDB_API_KEY:
         raise HTTPException(status_code=500, detail="TMDB API key no configurada")
     
-    url = f"https://api.themoviedb.org/3/genre/{media_type}/list?api_key={TMDB_API_KEY}&language=es-MX"
     try:
-        r = requests.get(url)
-        r.raise_for_status()
-        return r.json()
+        return await get_tmdb_client().aget(f"/genre/{media_type}/list", TMDB_API_KEY, language="es-MX")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/tmdb/discover")
-def discover_tmdb(media_type: str = "movie", genre_id: Optional[int] = None, sort_by: str = "popularity.desc", page: int = 1):
+async def discover_tmdb(media_type: str = "movie", genre_id: Optional[int] = None, sort_by: str = "popularity.desc", page: int = 1):
     """Descubre contenido basado en filtros"""
     if not TMDB_API_KEY:
         raise HTTPException(status_code=500, detail="TMDB API key no configurada")
     
-    url = f"https://api.themoviedb.org/3/discover/{media_type}?api_key={TMDB_API_KEY}&language=es-MX&sort_by={sort_by}&page={page}"
-    if genre_id:
-        url += f"&with_genres={genre_id}"
-        
     try:
-        r = requests.get(url)
-        r.raise_for_status()
-        data = r.json()
+        data = await get_tmdb_client().aget(
+            f"/discover/{media_type}", TMDB_API_KEY,
+            language="es-MX", sort_by=sort_by, page=page, with_genres=genre_id or None
+        )
         results = []
         for item in data.get("results", []):
             title = item.get("title") or item.get("name")
@@ -564,17 +701,24 @@ def discover_tmdb(media_type: str = "movie", genre_id: Optional[int] = None, sor
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/tmdb/cache/stats")
+def tmdb_cache_stats():
+    """Contadores de hit/miss de la caché del cliente TMDB"""
+    return get_tmdb_client().stats()
+
+@app.get("/api/tmdb/id-map/stats")
+def id_map_stats():
+    """Estado del mapa persistente TMDB→IMDb"""
+    return id_map.stats()
+
 @app.get("/api/tmdb/person/{person_id}")
-def get_person_details(person_id: int):
+async def get_person_details(person_id: int):
     """Obtiene detalles bio de un actor"""
     if not TMDB_API_KEY:
         raise HTTPException(status_code=500, detail="TMDB API key no configurada")
     
-    url = f"https://api.themoviedb.org/3/person/{person_id}?api_key={TMDB_API_KEY}&language=es-MX"
     try:
-        r = requests.get(url)
-        r.raise_for_status()
-        data = r.json()
+        data = await get_tmdb_client().aget(f"/person/{person_id}", TMDB_API_KEY, language="es-MX")
         return {
             "id": data.get("id"),
             "name": data.get("name"),
@@ -588,16 +732,13 @@ def get_person_details(person_id: int):
         raise HTTPException(status_code=500, detail="Error interactuando con TMDB: " + str(e))
 
 @app.get("/api/tmdb/person/{person_id}/credits")
-def get_person_credits(person_id: int):
+async def get_person_credits(person_id: int):
     """Obtiene los creditos (peliculas/series) de un actor"""
     if not TMDB_API_KEY:
         raise HTTPException(status_code=500, detail="TMDB API key no configurada")
     
-    url = f"https://api.themoviedb.org/3/person/{person_id}/combined_credits?api_key={TMDB_API_KEY}&language=es-MX"
     try:
-        r = requests.get(url)
-        r.raise_for_status()
-        data = r.json()
+        data = await get_tmdb_client().aget(f"/person/{person_id}/combined_credits", TMDB_API_KEY, language="es-MX")
         
         results = []
         # Sort by popularity or release date
@@ -623,16 +764,13 @@ def get_person_credits(person_id: int):
         raise HTTPException(status_code=500, detail="Error interactuando con TMDB: " + str(e))
 
 @app.get("/api/search")
-def search_tmdb(q: str, page: int = 1):
+async def search_tmdb(request: Request, q: str, page: int = 1):
     """"Busca películas y series en TMDB"""
     if not TMDB_API_KEY:
         raise HTTPException(status_code=500, detail="TMDB API key no configurada")
     
-    url = f"https://api.themoviedb.org/3/search/multi?api_key={TMDB_API_KEY}&query={q}&language=es-MX&page={page}"
     try:
-        r = requests.get(url)
-        r.raise_for_status()
-        data = r.json()
+        data = await cancel_on_disconnect(request, get_tmdb_client().aget("/search/multi", TMDB_API_KEY, query=q, language="es-MX", page=page))
         results = []
         for item in data.get("results", []):
             if item.get("media_type") not in ["movie", "tv"]:
@@ -648,21 +786,21 @@ def search_tmdb(q: str, page: int = 1):
                 "poster_path": f"https://image.tmdb.org/t/p/w200{item.get('poster_path')}" if item.get('poster_path') else None
             })
         return {"results": results, "total_pages": data.get("total_pages", 1)}
+    except ClientDisconnected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail="Error interactuando con TMDB: " + str(e))
 
 @app.get("/api/details/{media_type}/{tmdb_id}")
-def get_media_details(media_type: str, tmdb_id: int):
+async def get_media_details(request: Request, media_type: str, tmdb_id: int):
     """"Obtiene detalles enriquecidos (sinopsis, cast, temporadas) de TMDB"""
     current_key = config_module.config.get("tmdb", {}).get("api_key", "")
     if not current_key:
         raise HTTPException(status_code=500, detail="TMDB API key no configurada")
         
-    url = f"https://api.themoviedb.org/3/{media_type}/{tmdb_id}?api_key={current_key}&language=es-MX&append_to_response=credits"
     try:
-        r = requests.get(url)
-        r.raise_for_status()
-        data = r.json()
+        data = await cancel_on_disconnect(request, get_tmdb_client().aget(f"/{media_type}/{tmdb_id}", current_key, language="es-MX", append_to_response="credits,external_ids"))
+        id_map.put_imdb_id(media_type, tmdb_id, (data.get("external_ids") or {}).get("imdb_id"))
         
         # Parse basic info
         release_date = data.get("release_date") or data.get("first_air_date") or ""
@@ -705,21 +843,20 @@ def get_media_details(media_type: str, tmdb_id: int):
             "vote_average": round(data.get("vote_average", 0), 1),
             "seasons": seasons
         }
+    except ClientDisconnected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail="Error obteniendo detalles de TMDB: " + str(e))
 
 @app.get("/api/season/{tmdb_id}/{season_number}")
-def get_season_details(tmdb_id: int, season_number: int):
+async def get_season_details(tmdb_id: int, season_number: int):
     """"Obtiene los episodios de una temporada específica de una serie en TMDB"""
     current_key = config_module.config.get("tmdb", {}).get("api_key", "")
     if not current_key:
         raise HTTPException(status_code=500, detail="TMDB API key no configurada")
         
-    url = f"https://api.themoviedb.org/3/tv/{tmdb_id}/season/{season_number}?api_key={current_key}&language=es-MX"
     try:
-        r = requests.get(url)
-        r.raise_for_status()
-        data = r.json()
+        data = await get_tmdb_client().aget(f"/tv/{tmdb_id}/season/{season_number}", current_key, language="es-MX")
         
         episodes = []
         for ep in data.get("episodes", []):
@@ -733,7 +870,7 @@ def get_season_details(tmdb_id: int, season_number: int):
             })
             
         return {"episodes": episodes}
-    except requests.exceptions.HTTPError as e:
+    except httpx.HTTPStatusError as e:
         if e.response.status_code == 404:
             raise HTTPException(status_code=404, detail="Temporada no encontrada en TMDB")
         raise HTTPException(status_code=500, detail="Error de TMDB: " + str(e))
@@ -749,61 +886,124 @@ class SymlinkExistsRequest(BaseModel):
     season_number: Optional[int] = None
     episode_number: Optional[int] = None
 
+class SymlinkExistsBatchRequest(BaseModel):
+    items: List[SymlinkExistsRequest]
+
+def _library_dir(req: SymlinkExistsRequest) -> str:
+    """Carpeta de Plex donde estaría el título (misma lógica que symlinks.py)."""
+    from symlinks import clean_title as clean_sym_title
+    library_base = config_module.config.get("plex", {}).get("library_path", "/Media")
+    use_original = config_module.config.get("plex", {}).get("use_original_titles", False)
+    
+    # Determinar qué título usar
+    display_title = req.original_title if (use_original and req.original_title) else req.title
+    
+    # Consistent cleaning - must match symlinks.py logic
+    clean_name = clean_sym_title(display_title)
+    
+    # Match symlinks.py folder construction
+    if req.year and req.year != "":
+        folder_name = f"{clean_name} ({req.year}) {{tmdb-{req.tmdb_id}}}"
+    else:
+        folder_name = f"{clean_name} {{tmdb-{req.tmdb_id}}}"
+    
+    sub_folder = "Movies" if req.media_type == "movie" else "Shows"
+    plex_dir = os.path.join(library_base, sub_folder, folder_name)
+
+    if req.media_type == "tv" and req.season_number is not None:
+        plex_dir = os.path.join(plex_dir, f"Season {req.season_number:02d}")
+    return plex_dir
+
+def _read_library_dir(plex_dir: str) -> Optional[dict]:
+    """Un solo listado por carpeta: episodios (S, E) presentes y si hay algún video."""
+    from media_utils import extract_se_info
+    try:
+        files = os.listdir(plex_dir)
+    except OSError:
+        return None
+    episodes = set()
+    for f in files:
+        f_s, f_e = extract_se_info(f)
+        if f_s is not None and f_e is not None:
+            episodes.add((f_s, f_e))
+    has_video = any(f.lower().endswith(('.mkv', '.mp4', '.avi', '.ts', '.webm')) for f in files)
+    return {"episodes": episodes, "has_video": has_video}
+
+def _library_index():
+    """Índice en memoria de la librería actual, o None si todavía no está construido."""
+    index = get_library_index(config_module.config.get("plex", {}).get("library_path", "/Media"))
+    return index if index.is_ready() else None
+
+def _indexed_library_dir(plex_dir: str) -> Optional[dict]:
+    """Como _read_library_dir pero desde el índice en memoria (sin tocar disco)."""
+    index = _library_index()
+    if index is None:
+        return _read_library_dir(plex_dir)
+    return index.dir_summary(plex_dir)
+
+def _symlink_exists(req: SymlinkExistsRequest, listing: Optional[dict]) -> bool:
+    if listing is None:
+        return False
+    if req.media_type == "tv" and req.episode_number is not None:
+        return (req.season_number, req.episode_number) in listing["episodes"]
+    if req.media_type == "movie":
+        # Si la carpeta de la peli existe y tiene un video adentro, es true
+        return listing["has_video"]
+    return False
+
 @app.post("/api/symlink/exists")
 def check_symlink_exists(req: SymlinkExistsRequest):
     """Comprueba súper rápido si el archivo ya existe en el disco"""
     try:
-        from symlinks import clean_title as clean_sym_title
-        library_base = config_module.config.get("plex", {}).get("library_path", "/Media")
-        use_original = config_module.config.get("plex", {}).get("use_original_titles", False)
-        
-        # Determinar qué título usar
-        display_title = req.original_title if (use_original and req.original_title) else req.title
-        
-        # Consistent cleaning - must match symlinks.py logic
-        clean_name = clean_sym_title(display_title)
-        
-        # Match symlinks.py folder construction
-        if req.year and req.year != "":
-            folder_name = f"{clean_name} ({req.year}) {{tmdb-{req.tmdb_id}}}"
-        else:
-            folder_name = f"{clean_name} {{tmdb-{req.tmdb_id}}}"
-        
-        sub_folder = "Movies" if req.media_type == "movie" else "Shows"
-        plex_dir = os.path.join(library_base, sub_folder, folder_name)
-
-        if req.media_type == "tv" and req.season_number is not None:
-            plex_dir = os.path.join(plex_dir, f"Season {req.season_number:02d}")
-
+        plex_dir = _library_dir(req)
         print(f"[CheckExists] Investigando: {plex_dir}")
-
-        if os.path.isdir(plex_dir):
-            if req.media_type == "tv" and req.episode_number is not None:
-                from media_utils import extract_se_info
-                try:
-                    files = os.listdir(plex_dir)
-                    for f in files:
-                        f_s, f_e = extract_se_info(f)
-                        if f_s == req.season_number and f_e == req.episode_number:
-                            return {"exists": True}
-                except: pass
-                return {"exists": False}
-            elif req.media_type == "movie":
-                # Si la carpeta de la peli existe y tiene un video adentro, es true
-                try:
-                    files = os.listdir(plex_dir)
-                    if any(f.lower().endswith(('.mkv', '.mp4', '.avi', '.ts', '.webm')) for f in files):
-                        return {"exists": True}
-                except: pass
-        
-        return {"exists": False}
+        return {"exists": _symlink_exists(req, _indexed_library_dir(plex_dir))}
     except Exception as e:
         print(f"Error checking symlink: {e}")
         return {"exists": False}
 
+@app.post("/api/symlink/exists/batch")
+def check_symlinks_exist_batch(req: SymlinkExistsBatchRequest):
+    """
+    Igual que /api/symlink/exists para muchos títulos/episodios a la vez
+    (ej: una temporada entera): cada carpeta de Plex se lista una sola vez.
+    """
+    listings = {}
+    results = []
+    for item in req.items:
+        try:
+            plex_dir = _library_dir(item)
+            if plex_dir not in listings:
+                listings[plex_dir] = _indexed_library_dir(plex_dir)
+            results.append(_symlink_exists(item, listings[plex_dir]))
+        except Exception as e:
+            print(f"Error checking symlink: {e}")
+            results.append(False)
+    return {"results": results, "dirs_read": len(listings)}
+
+@app.get("/metrics")
+def metrics():
+    """Métricas en formato de texto de Prometheus"""
+    return Response(expose(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/api/http/stats")
+def http_client_stats():
+    """Peticiones en curso, canceladas y timeouts del cliente HTTP async compartido"""
+    return get_async_http().stats()
+
+@app.get("/api/streams/cache/stats")
+def streams_cache_stats():
+    """Estadísticas de la caché de AIOStreams"""
+    return get_aiostreams_client().stats()
+
 @app.get("/api/streams/{media_type}/{tmdb_id}")
-def get_streams(media_type: str, tmdb_id: str):
-    """"Obtiene los streams de AIOStreams para un TMDB ID dado"""
+async def get_streams(request: Request, media_type: str, tmdb_id: str, title: str = "", original_title: str = "", year: str = "",
+                page: int = 1, page_size: int = 50, resolution: Optional[str] = None, language: Optional[str] = None,
+                codec: Optional[str] = None, cached_only: bool = False, min_score: Optional[int] = None):
+    """
+    Obtiene los streams de AIOStreams para un TMDB ID dado, ya parseados,
+    ordenados (caché > puntaje > resolución > tamaño), filtrados y paginados.
+    """
     current_key = config_module.config.get("tmdb", {}).get("api_key", "")
     current_aio = config_module.config.get("aiostreams", {}).get("url", "")
 
@@ -815,15 +1015,15 @@ def get_streams(media_type: str, tmdb_id: str):
     # Extract base TMDB ID if it's a compound ID (e.g., 60574:1:1)
     base_tmdb_id = tmdb_id.split(":")[0] if ":" in tmdb_id else tmdb_id
     
-    # 1. Obtener IMDB ID de TMDB (AIOStreams / Stremio funciona mejor con IMDB IDs)
-    imdb_id = None
-    try:
-        tmdb_url = f"https://api.themoviedb.org/3/{media_type}/{base_tmdb_id}/external_ids?api_key={current_key}"
-        tmdb_r = requests.get(tmdb_url)
-        if tmdb_r.status_code == 200:
-            imdb_id = tmdb_r.json().get("imdb_id")
-    except Exception as e:
-        print(f"Error fetching IMDB ID: {e}")
+    # 1. Obtener IMDB ID (AIOStreams / Stremio funciona mejor con IMDB IDs).
+    # Primero el mapa local; solo si no está se pregunta a TMDB y se guarda.
+    imdb_id = id_map.get_imdb_id(media_type, base_tmdb_id)
+    if not imdb_id:
+        try:
+            imdb_id = (await get_tmdb_client().aget(f"/{media_type}/{base_tmdb_id}/external_ids", current_key)).get("imdb_id")
+            id_map.put_imdb_id(media_type, base_tmdb_id, imdb_id)
+        except Exception as e:
+            print(f"Error fetching IMDB ID: {e}")
 
     # Limpiar URL base en caso de que el usuario haya pegado un link de addon completo terminando en /manifest.json
     aiostreams_base = aiostreams_base.replace("/manifest.json", "")
@@ -845,17 +1045,34 @@ def get_streams(media_type: str, tmdb_id: str):
         req_url = f"{aiostreams_base}/stream/{stremio_type}/{addon_id}.json"
         
     try:
-        r = requests.get(req_url)
-        r.raise_for_status()
-        data = r.json()
-        # Filtros adicionales pueden aplicarse aquí si se requiere (e.g. Latino/4K)
-        return {"streams": data.get("streams", [])}
+        parsed, from_cache = await cancel_on_disconnect(request, get_aiostreams_client().aget_streams(req_url))
+    except ClientDisconnected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail="Error interactuando con AIOStreams: " + str(e))
 
+    parts = tmdb_id.split(":")
+    season = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else None
+    episode = int(parts[2]) if len(parts) > 2 and parts[2].isdigit() else None
+    ranked = rank_streams(parsed, title, year, season, episode, original_title)
+    filtered = filter_streams(ranked, resolution, language, codec, cached_only, min_score)
+    result = paginate(filtered, page, page_size)
+    return {
+        "streams": result["items"],
+        "page": result["page"],
+        "page_size": result["page_size"],
+        "total": result["total"],
+        "total_unfiltered": len(ranked),
+        "has_more": result["has_more"],
+        "facets": facets(ranked),
+        "from_cache": from_cache,
+    }
+
 @app.post("/api/download")
 def download_item(req: DownloadRequest):
     """Inicia la observación del archivo"""
+    if req.season_pack:
+        req.episode_number = None
     job_id = f"{req.tmdb_id}_{req.season_number or 0}_{req.episode_number or 0}"
     
     # Responder inmediatamente sin verificar caché (se verifica en el Watcher)
@@ -881,7 +1098,7 @@ def initiate_download_process(req: DownloadRequest, job_id: str):
         if job_id in active_jobs:
             active_jobs[job_id]["status"] = status
             active_jobs[job_id]["message"] = message
-            save_jobs()
+            save_jobs(job_id)
             # También lo guardamos en el log detallado
             append_job_log(job_id, f"[STATUS] {status}: {message}")
 
@@ -902,7 +1119,7 @@ def initiate_download_process(req: DownloadRequest, job_id: str):
             msg = f"¡Listo! {req.title} ya está en Plex."
             if req.media_type == "tv":
                 msg = f"¡Listo! {req.title} T{season_number} ya está en Plex."
-            notification_queue.append(msg)
+            push_notification(msg)
             on_status_update("Completed", "Completado")
         else:
             on_status_update("Error", "Error creando enlace")
@@ -912,8 +1129,46 @@ def initiate_download_process(req: DownloadRequest, job_id: str):
         # Eliminar tras 60 segundos del tracker (más tiempo para que el usuario lo vea)
         threading.Timer(60.0, lambda: (active_jobs.pop(job_id, None), save_jobs())).start()
         
+    def on_season_found(episodes: dict, season_number: int):
+        on_status_update("Linking", f"Creando {len(episodes)} symlinks...")
+        created = create_season_symlinks(
+            episode_files=episodes,
+            title=req.title,
+            year=req.year,
+            tmdb_id=req.tmdb_id,
+            season_number=season_number,
+            base_library_path=config_module.config.get("plex", {}).get("library_path", "/Media"),
+            original_title=req.original_title,
+            use_original=config_module.config.get("plex", {}).get("use_original_titles", False)
+        )
+        if job_id in active_jobs:
+            active_jobs[job_id]["episodes"] = sorted(created)
+        if created:
+            push_notification(f"¡Listo! {req.title} T{season_number} ({len(created)} episodios) ya está en Plex.")
+            on_status_update("Completed", f"Completado: {len(created)}/{len(episodes)} episodios")
+        else:
+            on_status_update("Error", "Error creando enlaces de la temporada")
+        save_jobs()
+        threading.Timer(60.0, lambda: (active_jobs.pop(job_id, None), save_jobs())).start()
+
     # Escribir log de inicio
     append_job_log(job_id, f"Iniciando búsqueda: {req.title} ({req.year}) - {req.filename}")
+    if req.season_pack and req.season_number:
+        append_job_log(job_id, f"Buscando pack completo de la temporada {req.season_number}")
+        start_season_watcher(
+            expected_filename=req.filename,
+            title=req.title,
+            year=req.year,
+            season_number=req.season_number,
+            callback=on_season_found,
+            on_status=on_status_update,
+            original_title=req.original_title,
+            on_log=lambda msg: append_job_log(job_id, msg),
+            job_id=job_id,
+            tmdb_id=req.tmdb_id
+        )
+        return {"status": "ok", "message": f"Observando pack de la temporada {req.season_number}", "job_id": job_id}
+
     if req.season_number:
         append_job_log(job_id, f"Buscando S{req.season_number:02d}E{(req.episode_number or 0):02d}")
     
@@ -928,7 +1183,8 @@ def initiate_download_process(req: DownloadRequest, job_id: str):
         episode_number=req.episode_number,
         on_status=on_status_update,
         on_log=lambda msg: append_job_log(job_id, msg),
-        get_status=lambda: active_jobs.get(job_id, {}).get("status")
+        job_id=job_id,
+        tmdb_id=req.tmdb_id
     )
     return {"status": "ok", "message": f"Observando descarga de {req.filename}", "job_id": job_id}
 
@@ -938,7 +1194,8 @@ def delete_job(job_id: str):
     if job_id in active_jobs:
         active_jobs[job_id]["status"] = "Cancelled"
         save_jobs()
-        # Dar tiempo al hilo para que lo lea antes de sacarlo de la lista
+        get_scheduler().cancel(job_id)
+        # Dejar el estado visible un momento antes de sacarlo de la lista
         threading.Timer(2.0, lambda: (active_jobs.pop(job_id, None), save_jobs())).start()
         return {"status": "ok"}
     raise HTTPException(status_code=404, detail="Trabajo no encontrado")
@@ -971,8 +1228,7 @@ def clear_all_jobs():
     for job_id in list(active_jobs.keys()):
         if active_jobs[job_id].get("status") not in ["Completed", "Error", "Cancelled"]:
             active_jobs[job_id]["status"] = "Cancelled"
-    # Esperar un momento y luego limpiar todo
-    time.sleep(1)
+            get_scheduler().cancel(job_id)
     active_jobs.clear()
     job_logs.clear()
     save_jobs()
@@ -991,6 +1247,7 @@ def pause_job(job_id: str):
     if job_id in active_jobs:
         active_jobs[job_id]["status"] = "Paused"
         save_jobs()
+        get_scheduler().pause(job_id)
         return {"status": "ok"}
     raise HTTPException(status_code=404, detail="Trabajo no encontrado")
 
@@ -1001,6 +1258,7 @@ def resume_job(job_id: str):
         # Volver al estado de búsqueda si estaba pausado o reanudando
         active_jobs[job_id]["status"] = "Searching"
         save_jobs()
+        get_scheduler().resume(job_id)
         return {"status": "ok"}
     raise HTTPException(status_code=404, detail="Trabajo no encontrado")
 
@@ -1020,8 +1278,16 @@ class DeleteMovieRequest(BaseModel):
     folder_name: str
 
 @app.get("/api/library")
-def get_library():
-    """Rastrea el directorio /Media para devolver la lista de películas y series enlazadas localmente con sus IDs."""
+def get_library(media_type: Optional[str] = None, offset: int = 0, limit: Optional[int] = None, since: Optional[int] = None):
+    """
+    Lista de películas y series enlazadas localmente con sus IDs.
+    Se sirve desde el índice en memoria (paginable por sección; con `since` solo lo
+    cambiado desde esa versión). Mientras el índice se construye se rastrea /Media.
+    """
+    index = _library_index()
+    if index is not None:
+        return index.list(media_type, max(0, offset), limit, since)
+
     import re
     base_library = config_module.config.get("plex", {}).get("library_path", "/Media")
     movies_dir = os.path.join(base_library, "Movies")
@@ -1053,6 +1319,12 @@ def get_library():
     
     return library
 
+@app.get("/api/library/stats")
+def library_stats():
+    """Estado del índice en memoria de la librería"""
+    index = _library_index()
+    return index.stats() if index else {"ready": False}
+
 @app.get("/api/library/structure")
 def get_library_structure(media_type: str, folder_name: str):
     """Devuelve el árbol de archivos dentro de una carpeta específica."""
@@ -1062,6 +1334,13 @@ def get_library_structure(media_type: str, folder_name: str):
     # Prevenir path traversal
     safe_folder = os.path.basename(folder_name)
     target_dir = os.path.join(base_library, sub_folder, safe_folder)
+
+    index = _library_index()
+    if index is not None:
+        tree = index.structure("movie" if media_type == "movie" else "tv", safe_folder, _target_alive)
+        if tree is None:
+            raise HTTPException(status_code=404, detail="Directorio no encontrado")
+        return {"structure": tree}
     
     if not os.path.isdir(target_dir):
         raise HTTPException(status_code=404, detail="Directorio no encontrado")
@@ -1083,9 +1362,9 @@ def get_library_structure(media_type: str, folder_name: str):
             
         for f in files:
             full_path = os.path.join(root, f)
-            # os.path.lexists check if symlink is there. exists() checks if target is reachable.
-            is_valid = os.path.exists(full_path)
+            # islink() es local; la validez del destino (a través de FUSE) sale de la caché
             is_symlink = os.path.islink(full_path)
+            is_valid = get_fs_cache().target_exists(full_path) if is_symlink else True
             
             tree.append({
                 "type": "file",
@@ -1100,12 +1379,19 @@ def get_library_structure(media_type: str, folder_name: str):
     tree.sort(key=lambda x: (0 if x["type"] == "directory" else 1, x["path"]))
     return {"structure": tree}
 
+def _target_alive(target: str) -> bool:
+    """¿Existe el destino de un symlink? Desde el índice del mount si lo cubre; si no, stat cacheado."""
+    mount_index = get_mount_index()
+    if mount_index.is_ready() and target.startswith(mount_index.mount_path + os.sep):
+        return target in mount_index.lookup_all(os.path.basename(target))
+    return get_fs_cache().exists(target)
+
 @app.post("/api/library/test_symlink")
 def test_symlink(req: SymlinkTestRequest):
     """Prueba si un symlink sigue apuntando a un archivo vivo en TorBox"""
     # exists() hace transparente el symlink. Si retorna True, el target existe.
     if os.path.lexists(req.filepath):
-        is_alive = os.path.exists(req.filepath)
+        is_alive = get_fs_cache().target_exists(req.filepath) if os.path.islink(req.filepath) else True
         return {"alive": is_alive}
     raise HTTPException(status_code=404, detail="El archivo local se borró")
 
@@ -1123,7 +1409,7 @@ def symlink_info(req: SymlinkTestRequest):
             # Obtener el archivo origen del symlink
             target_path = os.readlink(req.filepath)
             target_name = os.path.basename(target_path)
-            is_alive = os.path.exists(req.filepath)
+            is_alive = get_fs_cache().target_exists(req.filepath)
             
             return {
                 "is_symlink": True,
@@ -1167,11 +1453,35 @@ def delete_symlink(req: SymlinkTestRequest):
                     break # Detener si hay otros archivos
             except Exception:
                 break
+        notify_library_change(req.filepath, config_module.config.get("plex", {}).get("library_path", "/Media"))
                 
         return {"status": "ok", "message": "Archivo eliminado correctamente"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _health_engine():
+    return get_health_engine(config_module.config.get("plex", {}).get("library_path", "/Media"))
+
+@app.get("/api/health/symlinks")
+def symlink_health(status: Optional[str] = None, offset: int = 0, limit: Optional[int] = 200):
+    """Resumen del último chequeo de salud, cola de reparación y symlinks (filtrables por estado: ok/broken/repaired)."""
+    engine = _health_engine()
+    return dict(engine.summary(), **engine.results(status, max(0, offset), limit))
+
+@app.post("/api/health/symlinks/check")
+def run_symlink_health_check(force: bool = False):
+    """Lanza un chequeo de salud en background (force=true vuelve a listar todas las carpetas)."""
+    engine = _health_engine()
+    if engine.summary()["running"]:
+        return {"status": "running"}
+    threading.Thread(target=engine.check, kwargs={"force": force}, daemon=True).start()
+    return {"status": "started"}
+
+@app.post("/api/health/symlinks/repair")
+def repair_symlink(req: SymlinkTestRequest):
+    """Encola la reparación de un symlink roto"""
+    return {"queued": _health_engine().enqueue_repair(req.filepath)}
+
 @app.post("/api/library/delete-season")
 def delete_season(req: DeleteSeasonRequest):
     """Elimina todos los archivos de una temporada completa"""
@@ -1190,6 +1500,7 @@ def delete_season(req: DeleteSeasonRequest):
         import shutil
         # Borrar todo el directorio de la temporada
         shutil.rmtree(season_dir)
+        notify_library_change(season_dir, base_library)
         print(f"[Library] Temporada {req.season_number:02d} de {req.folder_name} eliminada completamente")
         return {"status": "ok", "message": f"Temporada {req.season_number:02d} eliminada correctamente"}
     except Exception as e:
@@ -1213,6 +1524,7 @@ def delete_entire_series(req: DeleteSeriesRequest):
         import shutil
         # Borrar todo el directorio de la serie
         shutil.rmtree(series_dir)
+        notify_library_change(series_dir, base_library)
         print(f"[Library] Serie {req.folder_name} eliminada completamente")
         return {"status": "ok", "message": f"Serie {req.folder_name} eliminada correctamente"}
     except Exception as e:
@@ -1233,6 +1545,7 @@ def delete_entire_movie(req: DeleteMovieRequest):
         import shutil
         # Borrar todo el directorio de la película
         shutil.rmtree(movie_dir)
+        notify_library_change(movie_dir, base_library)
         print(f"[Library] Película {req.folder_name} eliminada completamente")
         return {"status": "ok", "message": f"Película {req.folder_name} eliminada correctamente"}
     except Exception as e:
@@ -1256,6 +1569,7 @@ def clear_entire_library():
                 os.makedirs(subfolder_path, exist_ok=True)  # Recrear carpeta vacía
                 print(f"[Library] {subfolder} eliminado completamente")
         
+        notify_library_change(base_library, base_library)
         print("[Library] ⚠️ TODA LA BIBLIOTECA HA SIDO ELIMINADA")
         return {"status": "ok", "message": "Biblioteca completamente limpiada"}
     except Exception as e:
@@ -1272,16 +1586,10 @@ def reset_rclone():
         
         # 1. Limpiar caché vía rc
         try:
-            result = subprocess.run(
-                ["rclone", "rc", "vfs/forget"],
-                capture_output=True,
-                timeout=5,
-                text=True
-            )
-            if result.returncode == 0:
-                print("[System] ✓ Cache de rclone limpiado (vfs/forget)")
-            else:
-                print(f"[System] ⚠️ vfs/forget retornó error: {result.stderr[:100]}")
+            get_rc_client().forget()
+            print("[System] ✓ Cache de rclone limpiado (vfs/forget)")
+        except RcloneRCError as e:
+            print(f"[System] ⚠️ vfs/forget retornó error: {str(e)[:100]}")
         except Exception as e:
             print(f"[System] ⚠️ Error en vfs/forget: {e}")
         
@@ -1325,8 +1633,9 @@ def reset_rclone():
 @app.post("/api/system/reset-plex")
 def reset_plex():
     """Reinicia el contenedor de Plex."""
+    import docker
     try:
-        client = docker.from_env()
+        client = docker_client()
         container = client.containers.get("plex")
         
         print("[System] Reiniciando contenedor Plex...")
@@ -1355,7 +1664,10 @@ def reset_all():
         
         # 1. Reset Rclone
         try:
-            subprocess.run(["rclone", "rc", "vfs/forget"], capture_output=True, timeout=5)
+            try:
+                get_rc_client().forget()
+            except RcloneRCError as e:
+                print(f"[System] ⚠️ vfs/forget retornó error: {str(e)[:100]}")
             subprocess.run(["umount", "-f", "/mnt/torbox"], capture_output=True, timeout=5)
             time.sleep(1)
             
@@ -1383,7 +1695,7 @@ def reset_all():
         
         # 2. Reset Plex
         try:
-            client = docker.from_env()
+            client = docker_client()
             container = client.containers.get("plex")
             container.restart()
             results.append("✓ Plex reiniciado")
@@ -1402,12 +1714,60 @@ def reset_all():
         raise HTTPException(status_code=500, detail=f"Error en reset total: {str(e)}")
 
 @app.get("/api/notifications")
-def get_notifications():
-    """Retorna y limpia la cola de avisos pendientes para el frontend"""
-    global notification_queue
-    msgs = list(notification_queue)
-    notification_queue.clear()
-    return {"messages": msgs}
+def get_notifications(since: Optional[int] = None):
+    """
+    Avisos para el polling de respaldo. Con `since` (último seq visto, por SSE o
+    por polling) devuelve solo los posteriores sin vaciar la cola, así al caer el
+    SSE no se repiten avisos ya mostrados; sin `since` retorna y limpia la cola.
+    """
+    items = list(notification_queue)
+    if since is None:
+        notification_queue.clear()
+    else:
+        items = [(seq, msg) for seq, msg in items if seq > since]
+    last_seq = items[-1][0] if items else (since or 0)
+    return {"messages": [msg for _, msg in items], "last_seq": last_seq}
+
+@app.get("/api/events")
+async def stream_events(request: Request, since: Optional[int] = None):
+    """
+    Stream SSE con diffs de trabajos, líneas nuevas de logs por trabajo y notificaciones.
+    Al reconectar, el navegador envía Last-Event-ID y se reenvía lo que se perdió;
+    si ya no está en el historial se manda un snapshot completo.
+    """
+    last_id = request.headers.get("last-event-id")
+    if last_id and last_id.isdigit():
+        since = int(last_id)
+    sub, needs_snapshot = event_bus.subscribe(since)
+
+    def format_event(seq: int, event_type: str, data: dict) -> str:
+        return f"id: {seq}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+    async def generate():
+        try:
+            yield "retry: 3000\n\n"
+            if needs_snapshot:
+                try:
+                    jobs = {jid: public_job(job) for jid, job in list(active_jobs.items())}
+                except RuntimeError:
+                    jobs = {}
+                logs_total = {jid: len(job_logs.get(jid, [])) for jid in jobs}
+                yield format_event(event_bus.seq, "snapshot", {"jobs": jobs, "logs_total": logs_total})
+            while True:
+                if await request.is_disconnected():
+                    break
+                events = await sub.get(timeout=15)
+                for seq, event_type, data in events:
+                    yield format_event(seq, event_type, data)
+                if sub.overflowed:
+                    # Cliente lento: cerrar; reconectará con Last-Event-ID
+                    break
+                if not events:
+                    yield ": keepalive\n\n"
+        finally:
+            event_bus.unsubscribe(sub)
+
+    return StreamingResponse(generate(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.get("/api/downloads/active")
 def get_active_downloads():
@@ -1420,6 +1780,22 @@ def api_check_cache(req: CacheCheckRequest):
     from watcher import check_file_exists
     path = check_file_exists(req.filename, req.title)
     return {"cached": path is not None, "path": path}
+
+@app.get("/api/watcher/stats")
+def watcher_stats():
+    """Profundidad de la cola del scheduler y tiempo de espera por trabajo"""
+    return get_scheduler().stats()
+
+@app.get("/api/torbox/index")
+def torbox_index_stats():
+    """Estado del índice compartido del mount de TorBox"""
+    return get_mount_index().stats()
+
+@app.get("/api/fs-cache/stats")
+def fs_cache_stats():
+    """Aciertos de la caché de stats/listados usada por los endpoints de navegación"""
+    return get_fs_cache().stats()
+
 @app.get("/api/torbox/list")
 def list_torbox_dir(path: str = "/"):
     """Lista el contenido de una carpeta en el montaje de torbox"""
@@ -1429,19 +1805,20 @@ def list_torbox_dir(path: str = "/"):
     if not safe_path.startswith(base):
         raise HTTPException(status_code=403, detail="Acceso denegado")
     
-    if not os.path.exists(safe_path):
-        return {"items": [], "error": "Ruta no encontrada"}
-        
     items = []
     try:
-        for entry in os.scandir(safe_path):
-            items.append({
-                "name": entry.name,
-                "is_dir": entry.is_dir(),
-                "path": os.path.relpath(entry.path, base)
-            })
+        listing = get_fs_cache().listdir(safe_path)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if listing is None:
+        return {"items": [], "error": "Ruta no encontrada"}
+    for name, is_dir in listing:
+        entry_path = os.path.join(safe_path, name)
+        items.append({
+            "name": name,
+            "is_dir": is_dir,
+            "path": os.path.relpath(entry_path, base)
+        })
         
     # Ordenar: carpetas primero
     items.sort(key=lambda x: (not x["is_dir"], x["name"].lower()))
@@ -1472,6 +1849,7 @@ def manual_link(req: ManualLinkRequest):
             active_jobs[req.job_id]["status"] = "Completed"
             active_jobs[req.job_id]["message"] = "Vínculo manual completado."
             save_jobs()
+            get_scheduler().cancel(req.job_id)
             # Programar eliminación del tracker
             threading.Timer(30.0, lambda: (active_jobs.pop(req.job_id, None), save_jobs())).start()
             
@@ -0,0 +1,115 @@
+import heapq
+import threading
+from typing import Dict, Iterable, List, Set, Tuple
+
+from media_utils import ParsedRelease, clean_words, get_key_words, parse_query, score_release
+
+Match = Tuple[int, str, str]  # (puntaje, nombre, ruta)
+
+
+def name_tokens(name: str) -> Set[str]:
+    """Palabras clave de un nombre (las mismas que get_match_score usa del lado del título)."""
+    return set(get_key_words(clean_words(name)))
+
+
+class TokenIndex:
+    """
+    Índice invertido palabra clave → nombres para matching difuso en lote.
+
+    get_match_score devuelve 0 si el nombre no comparte ninguna palabra clave con el
+    título/título original (salvo el caso del filename esperado), así que solo hace
+    falta puntuar los nombres que aparecen en las listas de esas palabras.
+    Cada nombre se parsea al insertarlo, así una búsqueda solo paga el puntaje.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._paths: Dict[str, List[str]] = {}      # nombre -> [rutas]
+        self._parsed: Dict[str, ParsedRelease] = {}
+        self._postings: Dict[str, Set[str]] = {}    # palabra -> {nombres}
+        self._lower: Dict[str, Set[str]] = {}       # nombre en minúsculas -> {nombres}
+
+    def add(self, name: str, path: str):
+        with self._lock:
+            paths = self._paths.get(name)
+            if paths is None:
+                self._paths[name] = [path]
+                parsed = self._parsed[name] = ParsedRelease(name)
+                for token in get_key_words(parsed.words):
+                    self._postings.setdefault(token, set()).add(name)
+                self._lower.setdefault(name.lower(), set()).add(name)
+            elif path not in paths:
+                paths.append(path)
+
+    def remove(self, name: str, path: str):
+        with self._lock:
+            paths = self._paths.get(name)
+            if not paths or path not in paths:
+                return
+            paths.remove(path)
+            if paths:
+                return
+            del self._paths[name]
+            parsed = self._parsed.pop(name)
+            for token in get_key_words(parsed.words):
+                names = self._postings.get(token)
+                if names:
+                    names.discard(name)
+                    if not names:
+                        del self._postings[token]
+            same = self._lower.get(name.lower())
+            if same:
+                same.discard(name)
+                if not same:
+                    del self._lower[name.lower()]
+
+    def build(self, entries: Iterable[Tuple[str, str]]):
+        """Carga (nombre, ruta) en bloque."""
+        with self._lock:
+            for name, path in entries:
+                self.add(name, path)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def candidates(self, tokens: Iterable[str]) -> Set[str]:
+        with self._lock:
+            out: Set[str] = set()
+            for token in tokens:
+                out.update(self._postings.get(token, ()))
+            return out
+
+    def match(self, expected_filename: str = "", title: str = "", year: str = "", season: int = None, episode: int = None,
+              original_title: str = "", top_k: int = 5, min_score: int = 35, name_filter=None) -> List[Match]:
+        """
+        Puntúa la búsqueda contra todo el índice y devuelve los `top_k` mejores
+        (puntaje, nombre, ruta) con puntaje >= `min_score`, de mayor a menor.
+        """
+        query = parse_query(expected_filename or "", title or "", year or "", season, episode, original_title or "")
+        tokens = set(query.t_words) | set(query.o_words)
+        if not tokens and expected_filename:
+            # Sin título utilizable: podar por las palabras del filename esperado
+            tokens = name_tokens(expected_filename.rsplit(".", 1)[0])
+
+        with self._lock:
+            names = self.candidates(tokens)
+            if expected_filename:
+                names.update(self._lower.get(expected_filename.lower(), ()))
+            names = [n for n in names if name_filter is None or name_filter(n)]
+            scored = []
+            for name in names:
+                score = score_release(self._parsed[name], query)
+                if score >= min_score:
+                    scored.append((score, name, self._paths[name][0]))
+        return heapq.nlargest(top_k, scored, key=lambda m: (m[0], m[1]))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"names": len(self._paths), "tokens": len(self._postings)}
+
+
+def match_names(names: Iterable[str], top_k: int = 5, min_score: int = 35, **query) -> List[Match]:
+    """Atajo para listas sueltas: construye un TokenIndex temporal (nombre = ruta) y busca."""
+    index = TokenIndex()
+    index.build((n, n) for n in names)
+    return index.match(top_k=top_k, min_score=min_score, **query)
@@ -1,51 +1,68 @@
 import re
 import os
+from functools import lru_cache
+
+# Patrones precompilados (se usan en cada candidato que evalúa el watcher)
+_NON_ALNUM_LOWER = re.compile(r'[^a-z0-9]')
+_NON_ALNUM = re.compile(r'[^a-zA-Z0-9]')
+_SE_STANDARD = re.compile(r'[sS](\d+)\s*[.eE\-_]\s*[eE](\d+)')
+_SE_SIMPLE = re.compile(r'[sS](\d+)[eE](\d+)')
+_SE_X = re.compile(r'(?<!\d)(\d{1,2})x(\d{1,3})(?!\d|\w)', re.I)
+_SE_BRACKET = re.compile(r'\[(?:D|S)(\d+)\.Ep(\d+)\]', re.I)
+_SE_SEASON_WORD = re.compile(r'(?:Temporada|Season|Series)\s*(\d+)', re.I)
+_SE_EPISODE_WORD = re.compile(r'(?:Capitulo|Episodio|Episode|Ep)\s*(\d+)', re.I)
+_SE_ONLY_SEASON = re.compile(r'(?<!\d)[sS](\d{1,2})(?!\d)')
+_RANGE_EXPLICIT = re.compile(r'[sS](\d+)[-_\.][sS](\d+)')
+_RANGE_MULTI = re.compile(r'[sS](\d{1,2})(?![eE\d])')
+_YEARS = re.compile(r'\b(19\d{2}|20\d{2})\b')
+
+STOPWORDS = frozenset({"the", "a", "an", "el", "la", "los", "las", "un", "una", "de", "del", "and", "or", "of"})
+PACK_KEYWORDS = ('complete', 'integral', 'completa', 'all.seasons', 'temporadas')
 
 def clean_name(name: str) -> str:
     """Elimina todo lo que no sea alfanumérico y pasa a minúsculas."""
     if not name: return ""
     # Normalizar: eliminar acentos básicos si es posible o simplemente limpiar
     name = name.lower()
-    return re.sub(r'[^a-z0-9]', '', name)
+    return _NON_ALNUM_LOWER.sub('', name)
 
 def clean_words(name: str):
     """Extrae las palabras limpias (separadas por puntos, espacios, etc)."""
     if not name: return []
-    res = re.sub(r'[^a-zA-Z0-9]', ' ', name).lower()
+    res = _NON_ALNUM.sub(' ', name).lower()
     return res.split()
 
 def get_key_words(words: list) -> list:
     """Extrae palabras clave importantes (ignorando artículos/stopwords)."""
-    stopwords = {"the", "a", "an", "el", "la", "los", "las", "un", "una", "de", "del", "and", "or", "of"}
-    return [w for w in words if w not in stopwords and len(w) >= 3]
+    return [w for w in words if w not in STOPWORDS and len(w) >= 3]
 
 def extract_se_info(text: str):
     """Extrae temporada y episodio si existen en el texto con múltiples formatos."""
     if not text: return None, None
     
     # 1. Formato Estándar: S01E01, s1e1, S01.E01, S01_E01
-    match = re.search(r'[sS](\d+)\s*[.eE\-_]\s*[eE](\d+)', text)
+    match = _SE_STANDARD.search(text)
     if match:
         return int(match.group(1)), int(match.group(2))
     
     # 2. Formato Simple: S01E01 sin separador (ya cubierto por el de arriba pero re-aseguramos)
-    match = re.search(r'[sS](\d+)[eE](\d+)', text)
+    match = _SE_SIMPLE.search(text)
     if match:
         return int(match.group(1)), int(match.group(2))
 
     # 3. Formato 1x01
-    match = re.search(r'(?<!\d)(\d{1,2})x(\d{1,3})(?!\d|\w)', text, re.I)
+    match = _SE_X.search(text)
     if match:
         return int(match.group(1)), int(match.group(2))
 
     # 3.5. Formato [D1.Ep1], [S1.Ep1], etc. (usado por algunos trackers)
-    match = re.search(r'\[(?:D|S)(\d+)\.Ep(\d+)\]', text, re.I)
+    match = _SE_BRACKET.search(text)
     if match:
         return int(match.group(1)), int(match.group(2))
 
     # 4. Formato Temporada 1 Capitulo 1 (Soporta Inglés y Español)
-    t_match = re.search(r'(?:Temporada|Season|Series)\s*(\d+)', text, re.I)
-    c_match = re.search(r'(?:Capitulo|Episodio|Episode|Ep)\s*(\d+)', text, re.I)
+    t_match = _SE_SEASON_WORD.search(text)
+    c_match = _SE_EPISODE_WORD.search(text)
     if t_match and c_match:
         return int(t_match.group(1)), int(c_match.group(1))
     
@@ -54,7 +71,7 @@ def extract_se_info(text: str):
         return int(t_match.group(1)), None
     
     # 6. Formato solo S01
-    match = re.search(r'(?<!\d)[sS](\d{1,2})(?!\d)', text)
+    match = _SE_ONLY_SEASON.search(text)
     if match:
         return int(match.group(1)), None
 
@@ -68,40 +85,107 @@ def get_season_range(text: str):
     if not text: return None, None
     
     # Rango explícito: S01-S05 o S1-S5
-    match = re.search(r'[sS](\d+)[-_\.][sS](\d+)', text)
+    match = _RANGE_EXPLICIT.search(text)
     if match:
         return int(match.group(1)), int(match.group(2))
     
     # Múltiples S sin E: S01.S02.S03 o S04 S05 etc
-    seasons = re.findall(r'[sS](\d{1,2})(?![eE\d])', text)
+    seasons = _RANGE_MULTI.findall(text)
     if len(seasons) >= 2:
         nums = [int(s) for s in seasons]
         return min(nums), max(nums)
     
     # Palabras clave de pack completo - cubren todas las temporadas el nombre principal
-    keywords = ['complete', 'integral', 'completa', 'all.seasons', 'temporadas']
     text_lower = text.lower()
-    if any(kw in text_lower for kw in keywords):
+    if any(kw in text_lower for kw in PACK_KEYWORDS):
         # No sabemos el rango exacto, asumimos que cubre cualquier temporada
         return 0, 99
     
     return None, None
 
+class ParsedRelease:
+    """
+    Nombre de release/archivo ya analizado: temporada, episodio, rango de temporadas,
+    años, forma limpia y conjunto de palabras se calculan una sola vez.
+    Usar `parse_release(name)` para obtenerlo desde la caché LRU.
+    """
+    __slots__ = ("name", "season", "episode", "_season_range", "years", "clean", "words")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.season, self.episode = extract_se_info(name)
+        self._season_range = None  # Solo se necesita al validar temporadas; se calcula al primer uso
+        self.years = _YEARS.findall(name)
+        self.clean = clean_name(os.path.splitext(name)[0])
+        self.words = frozenset(clean_words(name))
+
+    @property
+    def season_range(self):
+        if self._season_range is None:
+            self._season_range = get_season_range(self.name)
+        return self._season_range
+
+
+class ParsedQuery:
+    """Lado "lo que buscamos" del matching (título, original, año, S/E, archivo esperado)."""
+    __slots__ = ("expected_filename", "title", "original_title", "year", "season", "episode",
+                 "e_clean", "t_clean", "o_clean", "t_words", "o_words")
+
+    def __init__(self, expected_filename: str = "", title: str = "", year: str = "", season: int = None, episode: int = None, original_title: str = ""):
+        self.expected_filename = expected_filename
+        self.title = title
+        self.original_title = original_title
+        self.year = str(year).strip() if year else ""
+        self.season = season
+        self.episode = episode
+        self.e_clean = clean_name(os.path.splitext(expected_filename)[0]) if expected_filename else ""
+        self.t_clean = clean_name(title)
+        self.o_clean = clean_name(original_title) if original_title else ""
+        self.t_words = frozenset(get_key_words(clean_words(title)))
+        self.o_words = frozenset(get_key_words(clean_words(original_title))) if original_title else frozenset()
+
+
+PARSE_CACHE_SIZE = 65536
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_release(name: str) -> ParsedRelease:
+    return ParsedRelease(name)
+
+
+def configure_parse_cache(maxsize: int):
+    """Redimensiona la caché LRU de parse_release (se vacía al hacerlo)."""
+    global parse_release
+    parse_release = lru_cache(maxsize=maxsize)(ParsedRelease)
+
+
+@lru_cache(maxsize=1024)
+def parse_query(expected_filename: str = "", title: str = "", year: str = "", season: int = None, episode: int = None, original_title: str = "") -> ParsedQuery:
+    return ParsedQuery(expected_filename, title, year, season, episode, original_title)
+
+
 def get_match_score(name: str, expected_filename: str = "", title: str = "", year: str = "", season: int = None, episode: int = None, original_title: str = "") -> int:
     """Devuelve un puntaje de 0 a 100 de qué tanto se parece el nombre."""
-    n_s, n_e = extract_se_info(name)
+    return score_release(parse_release(name), parse_query(expected_filename, title, year, season, episode, original_title))
+
+
+def score_release(release: ParsedRelease, query: ParsedQuery) -> int:
+    """Igual que get_match_score pero sobre un nombre y una búsqueda ya analizados."""
+    name = release.name
+    n_s, n_e = release.season, release.episode
+    season, episode = query.season, query.episode
     
     # 1. Validación estricta de S/E si se proveen
     if season is not None:
         if n_s is None:
             # Verificar si es un pack multi-temporada que cubre esta temporada
-            range_min, range_max = get_season_range(name)
+            range_min, range_max = release.season_range
             if range_min is not None and not (range_min <= season <= range_max):
                 return 0  # Rango de temporadas conocido pero no incluye la buscada
             # Si n_s is None y no es un rango, puede ser una carpeta genérica - dejamos pasar
         elif n_s != season:
             # Antes de rechazar, verificar si es un pack multi-temporada
-            range_min, range_max = get_season_range(name)
+            range_min, range_max = release.season_range
             if range_min is not None and (range_min <= season <= range_max):
                 # Es un pack que incluye la temporada buscada ✓
                 pass
@@ -115,14 +199,14 @@ def get_match_score(name: str, expected_filename: str = "", title: str = "", yea
             return 0
             
     # 2. Validación estricta de Año
-    str_year = str(year).strip() if year else ""
+    str_year = query.year
     if str_year:
-        years_in_name = re.findall(r'\b(19\d{2}|20\d{2})\b', name)
+        years_in_name = release.years
         if years_in_name and str_year not in years_in_name:
             if season is None:
                 # Para películas: siempre fatal
                 return 0
-            elif n_s is None and get_season_range(name) == (None, None):
+            elif n_s is None and release.season_range == (None, None):
                 # Para series: si el archivo NO tiene marcador de temporada/episodio,
                 # es probablemente una película. Aplicar validación estricta de año.
                 # Ej: "Ted 2 (2015)" cuando buscamos "Ted S01E07 (2024)"
@@ -132,10 +216,10 @@ def get_match_score(name: str, expected_filename: str = "", title: str = "", yea
             # Para series, no es fatal, pero si coincide damos fe
             pass
             
-    n_clean = clean_name(os.path.splitext(name)[0])
-    e_clean = clean_name(os.path.splitext(expected_filename)[0]) if expected_filename else ""
-    t_clean = clean_name(title)
-    o_clean = clean_name(original_title) if original_title else ""
+    n_clean = release.clean
+    e_clean = query.e_clean
+    t_clean = query.t_clean
+    o_clean = query.o_clean
     
     # Match exacto es imbatible
     if e_clean and n_clean == e_clean: return 100
@@ -152,9 +236,9 @@ def get_match_score(name: str, expected_filename: str = "", title: str = "", yea
                 return 0
 
     score = 0
-    n_words = set(clean_words(name))
-    t_words = set(get_key_words(clean_words(title)))
-    o_words = set(get_key_words(clean_words(original_title))) if original_title else set()
+    n_words = release.words
+    t_words = query.t_words
+    o_words = query.o_words
     
     # Match por palabras clave del título
     matched_t = n_words.intersection(t_words)
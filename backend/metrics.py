@@ -0,0 +1,251 @@
+"""
+Métricas en memoria con salida en formato de texto de Prometheus (/metrics).
+
+Contadores, gauges e histogramas con etiquetas; cada observación es un lock y
+una suma, así se pueden llamar desde los bucles calientes (ciclo del watcher,
+llamadas RC, escaneo del mount) sin costo apreciable. Los contadores que ya
+llevan otros módulos (cachés, JobStore, cola del scheduler) se leen recién al
+exportar con register_collector() en lugar de duplicarlos.
+"""
+import bisect
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+PREFIX = "plexaiotorb_"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Tiempos de espera de archivos (segundos a horas)
+WAIT_BUCKETS = (5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200)
+
+Sample = Tuple[str, Dict[str, str], float]  # (sufijo, etiquetas, valor)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (k + '="' + str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"' for k, v in labels.items())
+    return "{" + ",".join(escaped) + "}"
+
+
+class _Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = PREFIX + name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _labels(self, key: tuple) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    @abstractmethod
+    def samples(self) -> List[Sample]:
+        """Muestras actuales para exportar (sufijo, etiquetas, valor)."""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            return [("_total", self._labels(k), v) for k, v in self._values.items()]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[tuple, float] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            return [("", self._labels(k), v) for k, v in self._values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[tuple, list] = {}  # etiquetas -> [conteos por bucket..., +Inf, suma]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def time(self, **labels) -> "_Timer":
+        """Context manager que observa la duración del bloque."""
+        return _Timer(self, labels)
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[:-1]) if series else 0
+
+    def samples(self) -> List[Sample]:
+        out = []
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        for key, series in items:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series[:-1]):
+                cumulative += count
+                out.append(("_bucket", dict(labels, le=_format_value(bound)), cumulative))
+            out.append(("_sum", labels, series[-1]))
+            out.append(("_count", labels, cumulative))
+        return out
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: Histogram, labels: dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[tuple]]] = []
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"La métrica {name} ya existe con otro tipo")
+            return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[tuple]]):
+        """
+        `collector()` devuelve tuplas (nombre, tipo, ayuda, [(etiquetas, valor)]) y se
+        llama solo al exportar; sirve para contadores que ya existen en otros módulos.
+        """
+        self._collectors.append(collector)
+
+    def expose(self) -> str:
+        # nombre -> (tipo, ayuda, [(sufijo, etiquetas, valor)]); los collectors pueden repetir familias
+        families: Dict[str, tuple] = {}
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        for metric in metrics:
+            families[metric.name] = (metric.kind, metric.help, metric.samples())
+        for collector in collectors:
+            try:
+                collected = list(collector())
+            except Exception as e:
+                print(f"[Metrics] ⚠️ Error en collector: {e}")
+                continue
+            for name, kind, help, values in collected:
+                suffix = ""
+                if kind == "counter" and name.endswith("_total"):
+                    name, suffix = name[:-len("_total")], "_total"
+                family = families.setdefault(PREFIX + name, (kind, help, []))
+                family[2].extend((suffix, labels, value) for labels, value in values)
+
+        lines = []
+        for name in sorted(families):
+            kind, help, samples = families[name]
+            if not samples:
+                continue
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}" for suffix, labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY._get_or_create(Counter, name, help, labelnames)
+
+
+def gauge(name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY._get_or_create(Gauge, name, help, labelnames)
+
+
+def histogram(name: str, help: str, labelnames: Sequence[str] = (), buckets: Optional[Sequence[float]] = None) -> Histogram:
+    return REGISTRY._get_or_create(Histogram, name, help, labelnames, buckets or DEFAULT_BUCKETS)
+
+
+def register_collector(collector: Callable[[], Iterable[tuple]]):
+    REGISTRY.register_collector(collector)
+
+
+def expose() -> str:
+    """Todas las métricas en formato de texto de Prometheus (version 0.0.4)."""
+    return REGISTRY.expose()
+
+
+def cache_collector(name: str, stats_fn: Callable[[], dict]) -> Callable[[], Iterable[tuple]]:
+    """Collector para un TTLCache (o cualquier stats() con hits/stale_hits/misses/entries)."""
+    def collect():
+        stats = stats_fn()
+        labels = {"cache": name}
+        yield ("cache_requests_total", "counter", "Consultas a cachés en memoria por resultado",
+               [(dict(labels, result=r), stats.get(k, 0)) for r, k in (("hit", "hits"), ("stale", "stale_hits"), ("miss", "misses"))])
+        yield ("cache_entries", "gauge", "Entradas en cachés en memoria", [(labels, stats.get("entries", 0))])
+    return collect
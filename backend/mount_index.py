@@ -0,0 +1,518 @@
+import gzip
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set
+
+from listing import RcloneListProvider
+from matcher import TokenIndex
+from metrics import counter, histogram
+
+SCAN_SECONDS = histogram("mount_index_scan_seconds", "Duración de cada escaneo incremental del mount")
+SNAPSHOT_FORMAT = 1
+RELISTED_DIRS = counter("mount_index_relisted_dirs", "Directorios del mount re-listados (mtime cambiado o escaneo completo)")
+
+
+class _DirEntry:
+    """Estado conocido de un directorio del mount: mtime y su último listado."""
+    __slots__ = ("mtime", "files", "subdirs")
+
+    def __init__(self, mtime: float, files: List[str], subdirs: List[str]):
+        self.mtime = mtime
+        self.files = files
+        self.subdirs = subdirs
+
+
+class MountIndex:
+    """
+    Índice compartido filename → ruta del mount de TorBox.
+
+    Guarda el mtime de cada directorio y solo vuelve a listar los que cambiaron,
+    así un refresco cuesta un stat por directorio en lugar de un os.walk completo.
+    Las búsquedas por nombre son O(1) sobre el último estado escaneado.
+
+    La raíz se re-lista siempre (ahí aparecen los torrents nuevos y su mtime no
+    es confiable vía WebDAV) y cada `full_rescan_interval` se fuerza un listado
+    completo por si algún mtime del remoto no se actualizó.
+
+    Con un `provider` (ver listing.py) los listados se piden al remoto sin pasar
+    por FUSE, con la misma lógica incremental por carpeta de primer nivel; si el
+    proveedor falla se usa el recorrido del mount.
+
+    save_snapshot()/load_snapshot() guardan el índice (tabla de carpetas con su
+    mtime y archivos) para que tras un reinicio solo se re-listen las carpetas
+    que cambiaron en lugar de recorrer todo el mount en frío.
+    """
+
+    def __init__(self, mount_path: str = "/mnt/torbox", full_rescan_interval: int = 600, provider=None):
+        self.mount_path = mount_path
+        self.full_rescan_interval = full_rescan_interval
+        self.provider = provider
+        self.last_source = ""
+        self.last_full_scan = 0.0
+        self._lock = threading.RLock()       # Protege _dirs/_files
+        self._scan_lock = threading.Lock()   # Serializa escaneos (uno a la vez)
+        self._dirs: Dict[str, _DirEntry] = {}
+        self._files: Dict[str, List[str]] = {}  # nombre en minúsculas -> [rutas completas]
+        self._invalidated: Set[str] = set()     # Carpetas de primer nivel con algo invalidado desde el último escaneo
+        self.matcher = TokenIndex()             # Palabra clave -> nombres (matching difuso)
+        self._listeners: List[Callable[[dict], None]] = []
+        self.version = 0
+        self.last_scan = 0.0
+        self.last_scan_duration = 0.0
+        self.last_relisted = 0
+        self.snapshot_path: Optional[str] = None
+        self.snapshot_loaded_at = 0.0
+        self._snapshot_version = -1
+        self._matcher_log: Optional[list] = None  # Cambios durante el armado del matcher tras cargar un snapshot
+
+    # --- Consultas ---
+
+    def lookup(self, filename: str) -> Optional[str]:
+        """Devuelve la primera ruta conocida para `filename` (sin distinguir mayúsculas)."""
+        with self._lock:
+            paths = self._files.get(filename.lower())
+            return paths[0] if paths else None
+
+    def lookup_all(self, filename: str) -> List[str]:
+        with self._lock:
+            return list(self._files.get(filename.lower(), []))
+
+    def top_level(self) -> List[str]:
+        """Entradas (archivos y carpetas) en la raíz del mount."""
+        with self._lock:
+            entry = self._dirs.get(self.mount_path)
+            if not entry:
+                return []
+            return entry.subdirs + entry.files
+
+    def top_level_dirs(self) -> List[str]:
+        with self._lock:
+            entry = self._dirs.get(self.mount_path)
+            return list(entry.subdirs) if entry else []
+
+    def invalidate(self, paths):
+        """Fuerza a re-listar estos directorios en el próximo escaneo aunque su mtime no cambie."""
+        with self._lock:
+            for path in paths:
+                path = path.rstrip("/") or "/"
+                entry = self._dirs.get(path)
+                if entry:
+                    entry.mtime = None
+                rel = os.path.relpath(path, self.mount_path)
+                if rel != "." and not rel.startswith(".."):
+                    self._invalidated.add(rel.split(os.sep)[0])
+
+    def match(self, top_k: int = 5, min_score: int = 35, name_filter=None, **query) -> list:
+        """
+        Matching difuso de una búsqueda (title, original_title, year, season, episode,
+        expected_filename) contra todos los archivos indexados. Devuelve [(puntaje, nombre, ruta)].
+        """
+        return self.matcher.match(top_k=top_k, min_score=min_score, name_filter=name_filter, **query)
+
+    def list_dir(self, path: str) -> Optional[Dict[str, List[str]]]:
+        """Último listado conocido de un directorio, o None si no está indexado."""
+        with self._lock:
+            entry = self._dirs.get(path)
+            if not entry:
+                return None
+            return {"files": list(entry.files), "subdirs": list(entry.subdirs)}
+
+    def file_count(self) -> int:
+        with self._lock:
+            return sum(len(p) for p in self._files.values())
+
+    def is_ready(self) -> bool:
+        return self.last_scan > 0
+
+    def add_listener(self, callback: Callable[[dict], None]):
+        """Registra un callback que recibe los cambios detectados en cada escaneo."""
+        self._listeners.append(callback)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "mount_path": self.mount_path,
+                "version": self.version,
+                "dirs": len(self._dirs),
+                "files": sum(len(p) for p in self._files.values()),
+                "match_tokens": self.matcher.stats()["tokens"],
+                "last_scan": self.last_scan,
+                "last_scan_duration": round(self.last_scan_duration, 4),
+                "last_relisted": self.last_relisted,
+                "source": self.last_source,
+                "snapshot_loaded_at": self.snapshot_loaded_at,
+                "matcher_warming": self._matcher_log is not None,
+                "provider": self.provider.stats() if self.provider else None,
+            }
+
+    # --- Escaneo ---
+
+    def ensure_fresh(self, max_age: float = 1.0) -> bool:
+        """
+        Refresca solo si el último escaneo es más viejo que `max_age`.
+        Los llamadores concurrentes esperan al escaneo en curso y lo reutilizan.
+        """
+        if time.time() - self.last_scan < max_age:
+            return True
+        with self._scan_lock:
+            if time.time() - self.last_scan < max_age:
+                return True
+            return self._refresh_locked(force=False)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Escanea el mount re-listando solo los directorios cuyo mtime cambió."""
+        with self._scan_lock:
+            return self._refresh_locked(force)
+
+    def _refresh_locked(self, force: bool) -> bool:
+        started = time.time()
+        change = {"added": [], "removed": [], "changed_dirs": [], "top_level_added": []}
+        if time.time() - self.last_full_scan >= self.full_rescan_interval:
+            force = True
+
+        seen = set()
+        self.last_relisted = 0
+        with self._lock:
+            invalidated, self._invalidated = self._invalidated, set()
+        if self.provider is not None and self.provider.available() and self._scan_provider(force, seen, change, invalidated):
+            self.last_source = self.provider.name
+        else:
+            seen.clear()
+            try:
+                if not os.path.isdir(self.mount_path):
+                    self._restore_invalidated(invalidated)
+                    return False
+                self._scan_dir(self.mount_path, force, seen, change)
+            except OSError as e:
+                print(f"[MountIndex] ⚠️ Error escaneando {self.mount_path}: {e}")
+                self._restore_invalidated(invalidated)
+                return False
+            self.last_source = "fuse"
+
+        # Directorios que ya no se alcanzaron desde la raíz fueron eliminados
+        with self._lock:
+            for path in [p for p in self._dirs if p not in seen]:
+                self._drop_dir(path, change)
+
+        self.last_scan = time.time()
+        if force:
+            self.last_full_scan = self.last_scan
+        self.last_scan_duration = self.last_scan - started
+        SCAN_SECONDS.observe(self.last_scan_duration)
+        RELISTED_DIRS.inc(self.last_relisted)
+        if change["added"] or change["removed"] or change["changed_dirs"]:
+            with self._lock:
+                self.version += 1
+            change["version"] = self.version
+            for listener in list(self._listeners):
+                try:
+                    listener(change)
+                except Exception as e:
+                    print(f"[MountIndex] ⚠️ Error en listener: {e}")
+        return True
+
+    def _scan_dir(self, path: str, force: bool, seen: set, change: dict):
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            try:
+                mtime = os.stat(current).st_mtime
+            except OSError:
+                continue
+            seen.add(current)
+
+            with self._lock:
+                entry = self._dirs.get(current)
+            if entry is not None and entry.mtime == mtime and not force and current != self.mount_path:
+                # Listado sin cambios: solo bajamos a los subdirectorios ya conocidos
+                stack.extend(os.path.join(current, d) for d in entry.subdirs)
+                continue
+
+            files, subdirs = [], []
+            try:
+                with os.scandir(current) as it:
+                    for e in it:
+                        try:
+                            if e.is_dir():
+                                subdirs.append(e.name)
+                            else:
+                                files.append(e.name)
+                        except OSError:
+                            continue
+            except OSError as e:
+                if current == self.mount_path:
+                    raise
+                print(f"[MountIndex] ⚠️ No se pudo listar {current}: {e}")
+                continue
+            self.last_relisted += 1
+            self._apply_listing(current, _DirEntry(mtime, files, subdirs), entry, change)
+            stack.extend(os.path.join(current, d) for d in subdirs)
+
+    def _scan_provider(self, force: bool, seen: set, change: dict, invalidated: Set[str]) -> bool:
+        """
+        Escaneo con el proveedor: la raíz se lista sola y cada carpeta de primer
+        nivel nueva, invalidada o con ModTime distinto se lista recursivamente
+        (o el árbol completo de una vez si `force`). False si el proveedor falló;
+        en ese caso no se aplicó nada y el llamador recorre el mount.
+        """
+        with self._lock:
+            root_entry = self._dirs.get(self.mount_path)
+        if force or root_entry is None:
+            result = self.provider.list_tree("", recursive=True)
+            if result is None:
+                return False
+            listings, modtimes = result
+        else:
+            result = self.provider.list_tree("", recursive=False)
+            if result is None:
+                return False
+            listings, modtimes = result
+            for name in listings[""][1]:
+                full = os.path.join(self.mount_path, name)
+                if name in invalidated or self._needs_relist(full, modtimes.get(name)):
+                    sub = self.provider.list_tree(name, recursive=True)
+                    if sub is None:
+                        return False
+                    listings.update(sub[0])
+                    modtimes.update(sub[1])
+                else:
+                    # Subárbol sin cambios: se conserva lo ya indexado
+                    self._mark_seen(full, seen)
+
+        # El ModTime del remoto (texto) nunca coincide con un st_mtime: si luego hay
+        # que volver a FUSE, esas carpetas se re-listan, que es lo seguro
+        for rel, (files, subdirs) in listings.items():
+            full = os.path.join(self.mount_path, rel) if rel else self.mount_path
+            seen.add(full)
+            with self._lock:
+                old = self._dirs.get(full)
+            self.last_relisted += 1
+            self._apply_listing(full, _DirEntry(modtimes.get(rel), files, subdirs), old, change)
+        return True
+
+    def _needs_relist(self, path: str, modtime) -> bool:
+        # invalidate() sobre una subcarpeta ya marcó su carpeta de primer nivel en `invalidated`
+        with self._lock:
+            entry = self._dirs.get(path)
+            return entry is None or entry.mtime is None or entry.mtime != modtime
+
+    def _restore_invalidated(self, invalidated: Set[str]):
+        # El escaneo falló sin re-listar nada: las invalidaciones quedan para el próximo
+        with self._lock:
+            self._invalidated |= invalidated
+
+    def _mark_seen(self, path: str, seen: set):
+        stack = [path]
+        with self._lock:
+            while stack:
+                current = stack.pop()
+                entry = self._dirs.get(current)
+                if entry is None:
+                    continue
+                seen.add(current)
+                stack.extend(os.path.join(current, d) for d in entry.subdirs)
+
+    def _apply_listing(self, path: str, new: _DirEntry, old: Optional[_DirEntry], change: dict):
+        old_files = set(old.files) if old else set()
+        new_files = set(new.files)
+        with self._lock:
+            for name in old_files - new_files:
+                self._remove_file(os.path.join(path, name), change)
+            for name in new_files - old_files:
+                full = os.path.join(path, name)
+                self._files.setdefault(name.lower(), []).append(full)
+                self._matcher_add(name, full)
+                change["added"].append(full)
+            self._dirs[path] = new
+
+        if old is None or old_files != new_files or set(old.subdirs) != set(new.subdirs):
+            change["changed_dirs"].append(path)
+            if path == self.mount_path:
+                old_top = set(old.subdirs + old.files) if old else set()
+                change["top_level_added"].extend(n for n in new.subdirs + new.files if n not in old_top)
+
+    def _remove_file(self, full_path: str, change: dict):
+        key = os.path.basename(full_path).lower()
+        paths = self._files.get(key)
+        if paths and full_path in paths:
+            paths.remove(full_path)
+            self._matcher_remove(os.path.basename(full_path), full_path)
+            if not paths:
+                del self._files[key]
+            change["removed"].append(full_path)
+
+    def _drop_dir(self, path: str, change: dict):
+        entry = self._dirs.pop(path, None)
+        if entry:
+            for name in entry.files:
+                self._remove_file(os.path.join(path, name), change)
+            change["changed_dirs"].append(path)
+
+    def _matcher_add(self, name: str, full: str):
+        if self._matcher_log is not None:
+            self._matcher_log.append((True, name, full))
+        else:
+            self.matcher.add(name, full)
+
+    def _matcher_remove(self, name: str, full: str):
+        if self._matcher_log is not None:
+            self._matcher_log.append((False, name, full))
+        else:
+            self.matcher.remove(name, full)
+
+    # --- Snapshot en disco ---
+
+    def save_snapshot(self, path: Optional[str] = None, force: bool = False) -> bool:
+        """
+        Guarda el índice en `path` (JSON gzip): una fila por carpeta con el índice
+        de su carpeta padre, su nombre, mtime, archivos y subcarpetas.
+        No escribe si nada cambió desde el último guardado salvo `force`.
+        """
+        path = path or self.snapshot_path
+        if not path or not self.is_ready():
+            return False
+        with self._lock:
+            if self.version == self._snapshot_version and not force:
+                return False
+            version = self.version
+            rows, ids = [], {}
+            for dir_path in sorted(self._dirs):  # El padre siempre ordena antes que sus hijos
+                entry = self._dirs[dir_path]
+                if dir_path == self.mount_path:
+                    parent, name = -1, ""
+                else:
+                    parent, name = ids.get(os.path.dirname(dir_path)), os.path.basename(dir_path)
+                    if parent is None:
+                        continue
+                ids[dir_path] = len(rows)
+                rows.append([parent, name, entry.mtime, entry.files, entry.subdirs])
+        data = {
+            "format": SNAPSHOT_FORMAT,
+            "mount_path": self.mount_path,
+            "saved_at": time.time(),
+            "last_full_scan": self.last_full_scan,
+            "dirs": rows,
+        }
+        tmp_path = f"{path}.tmp"
+        try:
+            with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=3) as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[MountIndex] ⚠️ No se pudo guardar el snapshot {path}: {e}")
+            return False
+        self._snapshot_version = version
+        return True
+
+    def load_snapshot(self, path: Optional[str] = None) -> bool:
+        """
+        Carga un snapshot en un índice vacío. lookup/list_dir quedan listos de
+        inmediato; el matcher difuso se arma en un hilo aparte (parsear cada
+        nombre es lo caro) y los cambios de los escaneos mientras tanto se aplican
+        al terminar. El próximo refresh solo re-lista lo que cambió.
+        """
+        path = path or self.snapshot_path
+        if not path or not os.path.exists(path):
+            return False
+        started = time.time()
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("format") != SNAPSHOT_FORMAT or data.get("mount_path") != self.mount_path:
+                print(f"[MountIndex] Snapshot {path} ignorado (formato o mount distinto)")
+                return False
+            dirs, paths = {}, []
+            for parent, name, mtime, files, subdirs in data["dirs"]:
+                dir_path = self.mount_path if parent < 0 else os.path.join(paths[parent], name)
+                paths.append(dir_path)
+                dirs[dir_path] = _DirEntry(mtime, list(files), list(subdirs))
+        except (OSError, ValueError, KeyError, TypeError, IndexError) as e:
+            print(f"[MountIndex] ⚠️ Snapshot {path} ilegible, se escanea en frío: {e}")
+            return False
+
+        entries = [(name, os.path.join(dir_path, name)) for dir_path, entry in dirs.items() for name in entry.files]
+        with self._lock:
+            if self._dirs:
+                return False  # Ya hay un escaneo real: no pisarlo con datos viejos
+            self._dirs = dirs
+            for name, full in entries:
+                self._files.setdefault(name.lower(), []).append(full)
+            self._matcher_log = []
+            # El pase completo periódico cuenta desde la carga: si se heredara el del
+            # snapshot, un reinicio tras >= full_rescan_interval re-listaría todo el mount
+            self.last_full_scan = time.time()
+            self.last_scan = data.get("saved_at", started)
+            self.version += 1
+            self._snapshot_version = self.version
+        self.snapshot_loaded_at = time.time()
+        threading.Thread(target=self._warm_matcher, args=(entries,), daemon=True).start()
+        print(f"[MountIndex] Snapshot cargado: {len(dirs)} carpetas, {len(entries)} archivos en {time.time() - started:.3f}s")
+        return True
+
+    def _warm_matcher(self, entries: list):
+        matcher = TokenIndex()
+        matcher.build(entries)
+        with self._lock:
+            for added, name, full in self._matcher_log or []:
+                if added:
+                    matcher.add(name, full)
+                else:
+                    matcher.remove(name, full)
+            self.matcher = matcher
+            self._matcher_log = None
+
+
+_indexes: Dict[str, MountIndex] = {}
+_indexes_lock = threading.Lock()
+_wakeup = threading.Event()
+
+
+def get_mount_index(mount_path: str = "/mnt/torbox") -> MountIndex:
+    """Devuelve el índice compartido para `mount_path` (uno por proceso)."""
+    with _indexes_lock:
+        index = _indexes.get(mount_path)
+        if index is None:
+            index = MountIndex(mount_path)
+            _indexes[mount_path] = index
+        return index
+
+
+def request_refresh():
+    """Despierta al indexador en background para que escanee cuanto antes."""
+    _wakeup.set()
+
+
+def start_mount_indexer(interval_seconds: int = 30, mount_path: str = "/mnt/torbox", listing: str = "fuse", remote: str = "torbox:",
+                        snapshot_path: Optional[str] = None, snapshot_interval: int = 300):
+    """
+    Mantiene el índice del mount actualizado en un hilo en background.
+    listing="rc" lista el remoto vía operations/list (con FUSE como respaldo).
+    Con `snapshot_path` carga el último snapshot antes de arrancar y lo vuelve
+    a guardar cada `snapshot_interval` segundos si hubo cambios.
+    """
+    index = get_mount_index(mount_path)
+    if listing == "rc" and index.provider is None:
+        index.provider = RcloneListProvider(remote)
+    if snapshot_path:
+        index.snapshot_path = snapshot_path
+        index.load_snapshot()
+
+    def run_indexer():
+        last_snapshot = time.time()
+        while True:
+            try:
+                index.refresh()
+                if snapshot_path and time.time() - last_snapshot >= snapshot_interval:
+                    index.save_snapshot()
+                    last_snapshot = time.time()
+            except Exception as e:
+                print(f"[MountIndex] ✗ Error en indexador: {e}")
+            _wakeup.wait(interval_seconds)
+            _wakeup.clear()
+
+    thread = threading.Thread(target=run_indexer, daemon=True)
+    thread.start()
+    print(f"[MountIndex] Indexador iniciado para {mount_path} (cada {interval_seconds}s, listado: {listing})")
+    return thread
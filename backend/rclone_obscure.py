@@ -0,0 +1,122 @@
+"""
+Equivalente en Python de `rclone obscure` / `rclone reveal`.
+
+rclone guarda las contraseñas de rclone.conf cifradas con AES-256-CTR usando
+una clave fija y un IV aleatorio de 16 bytes, y las codifica como
+base64 URL-safe sin relleno de (IV + texto cifrado). No es seguridad real
+(la clave es pública), solo evita que la contraseña quede en texto plano.
+
+AES está implementado aquí en Python puro (solo hace falta cifrar bloques para
+CTR) para no depender de Docker ni de librerías criptográficas.
+"""
+import base64
+import os
+
+# Clave fija de rclone (fs/config/obscure/obscure.go)
+CRYPT_KEY = bytes.fromhex("9c935b48730a554d6bfd7c63c886a92bd390198eb8128afbf4de162b8b95f638")
+BLOCK_SIZE = 16
+
+
+def _build_sbox() -> bytes:
+    """S-box de AES a partir del inverso en GF(2^8) y la transformación afín."""
+    sbox = bytearray(256)
+    p = q = 1
+    while True:
+        # p recorre el grupo multiplicativo con generador 3, q es su inverso
+        p = p ^ ((p << 1) & 0xFF) ^ (0x1B if p & 0x80 else 0)
+        q ^= q << 1
+        q ^= q << 2
+        q ^= q << 4
+        q &= 0xFF
+        if q & 0x80:
+            q ^= 0x09
+        x = q ^ _rotl8(q, 1) ^ _rotl8(q, 2) ^ _rotl8(q, 3) ^ _rotl8(q, 4)
+        sbox[p] = x ^ 0x63
+        if p == 1:
+            break
+    sbox[0] = 0x63
+    return bytes(sbox)
+
+
+def _rotl8(x: int, shift: int) -> int:
+    return ((x << shift) | (x >> (8 - shift))) & 0xFF
+
+
+def _xtime(a: int) -> int:
+    return ((a << 1) ^ 0x1B) & 0xFF if a & 0x80 else a << 1
+
+
+SBOX = _build_sbox()
+
+
+def _expand_key(key: bytes) -> list:
+    """Expansión de clave AES-256: 15 claves de ronda de 16 bytes."""
+    if len(key) != 32:
+        raise ValueError("AES-256 requiere una clave de 32 bytes")
+    words = [list(key[i:i + 4]) for i in range(0, 32, 4)]
+    rcon = 1
+    for i in range(8, 60):
+        temp = list(words[i - 1])
+        if i % 8 == 0:
+            temp = [SBOX[b] for b in temp[1:] + temp[:1]]
+            temp[0] ^= rcon
+            rcon = _xtime(rcon)
+        elif i % 8 == 4:
+            temp = [SBOX[b] for b in temp]
+        words.append([a ^ b for a, b in zip(words[i - 8], temp)])
+    return [sum(words[r * 4:r * 4 + 4], []) for r in range(15)]
+
+
+def _encrypt_block(round_keys: list, block: bytes) -> bytes:
+    """Cifra un bloque de 16 bytes (estado en orden de columnas, como en FIPS-197)."""
+    s = [b ^ k for b, k in zip(block, round_keys[0])]
+    for rnd in range(1, 15):
+        # SubBytes + ShiftRows
+        s = [SBOX[s[(i + 4 * (i % 4)) % 16]] for i in range(16)]
+        if rnd != 14:
+            # MixColumns
+            mixed = []
+            for c in range(4):
+                a0, a1, a2, a3 = s[4 * c:4 * c + 4]
+                t = a0 ^ a1 ^ a2 ^ a3
+                mixed += [a0 ^ t ^ _xtime(a0 ^ a1), a1 ^ t ^ _xtime(a1 ^ a2),
+                          a2 ^ t ^ _xtime(a2 ^ a3), a3 ^ t ^ _xtime(a3 ^ a0)]
+            s = mixed
+        s = [b ^ k for b, k in zip(s, round_keys[rnd])]
+    return bytes(s)
+
+
+_ROUND_KEYS = _expand_key(CRYPT_KEY)
+
+
+def _crypt(data: bytes, iv: bytes, round_keys: list = _ROUND_KEYS) -> bytes:
+    """AES-CTR (contador big-endian de 128 bits, igual que cipher.NewCTR de Go). Cifra y descifra."""
+    counter = int.from_bytes(iv, "big")
+    out = bytearray()
+    for offset in range(0, len(data), BLOCK_SIZE):
+        keystream = _encrypt_block(round_keys, counter.to_bytes(BLOCK_SIZE, "big"))
+        chunk = data[offset:offset + BLOCK_SIZE]
+        out += bytes(a ^ b for a, b in zip(chunk, keystream))
+        counter = (counter + 1) % (1 << 128)
+    return bytes(out)
+
+
+def obscure(plaintext: str, iv: bytes = None) -> str:
+    """Ofusca una contraseña como `rclone obscure` (IV aleatorio salvo que se pase uno)."""
+    if iv is None:
+        iv = os.urandom(BLOCK_SIZE)
+    if len(iv) != BLOCK_SIZE:
+        raise ValueError("El IV debe tener 16 bytes")
+    ciphertext = _crypt(plaintext.encode("utf-8"), iv)
+    return base64.urlsafe_b64encode(iv + ciphertext).decode("ascii").rstrip("=")
+
+
+def reveal(obscured: str) -> str:
+    """Inverso de obscure(): devuelve la contraseña en texto plano."""
+    try:
+        data = base64.urlsafe_b64decode(obscured + "=" * (-len(obscured) % 4))
+    except ValueError as e:
+        raise ValueError(f"Contraseña ofuscada inválida: {e}")
+    if len(data) < BLOCK_SIZE:
+        raise ValueError("Contraseña ofuscada inválida: demasiado corta")
+    return _crypt(data[BLOCK_SIZE:], data[:BLOCK_SIZE]).decode("utf-8")
@@ -0,0 +1,221 @@
+import codecs
+import json
+import threading
+import time
+from typing import Iterable, Iterator, List, Optional
+
+import httpx
+
+from metrics import counter, histogram
+
+RC_URL = "http://127.0.0.1:5572"
+LIST_TIMEOUT = 120.0  # Un listado recursivo del remoto completo puede tardar
+
+RC_SECONDS = histogram("rclone_rc_seconds", "Latencia de los comandos RC de rclone", ["command"])
+RC_ERRORS = counter("rclone_rc_errors", "Comandos RC de rclone fallidos o sin respuesta", ["command"])
+
+
+class RcloneRCError(Exception):
+    """Error devuelto por la API RC de rclone (o RC inaccesible)."""
+
+
+class RcloneRC:
+    """
+    Cliente en proceso para la API RC de rclone.
+    Reutiliza una conexión HTTP persistente en lugar de lanzar `rclone rc` por cada comando.
+    Usa httpx (ya cargado por http_async) para no sumar `requests` al arranque.
+    """
+
+    def __init__(self, base_url: str = RC_URL, timeout: float = 5.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = httpx.Client(limits=httpx.Limits(max_connections=4, max_keepalive_connections=4))
+        self.calls = 0
+        self.errors = 0
+
+    def call(self, command: str, **params) -> dict:
+        """Ejecuta un comando RC (ej: "vfs/refresh") y devuelve el JSON de respuesta."""
+        self.calls += 1
+        try:
+            with RC_SECONDS.time(command=command):
+                r = self.session.post(f"{self.base_url}/{command}", json=params, timeout=self.timeout)
+        except httpx.HTTPError as e:
+            self.errors += 1
+            RC_ERRORS.inc(command=command)
+            raise RcloneRCError(f"RC no responde en {self.base_url}: {e}") from e
+        if r.status_code != 200:
+            self.errors += 1
+            RC_ERRORS.inc(command=command)
+            try:
+                detail = r.json().get("error", r.text)
+            except ValueError:
+                detail = r.text
+            raise RcloneRCError(f"{command} falló ({r.status_code}): {str(detail)[:200]}")
+        try:
+            return r.json()
+        except ValueError:
+            return {}
+
+    def iter_list(self, fs: str, remote: str = "", recursive: bool = True, timeout: float = LIST_TIMEOUT) -> Iterator[dict]:
+        """
+        operations/list del remoto `fs` (ej: "torbox:") sin pasar por el mount FUSE.
+        Devuelve las entradas ({"Path", "Name", "IsDir", "ModTime", ...}) a medida que
+        llegan en la respuesta, sin armar el JSON completo en memoria.
+        Los Path son relativos a la raíz de `fs` (incluyen `remote`).
+        """
+        params = {"fs": fs, "remote": remote.strip("/"), "opt": {"recurse": recursive, "noMimeType": True}}
+        command = "operations/list"
+        self.calls += 1
+        started = time.perf_counter()
+        request = self.session.build_request("POST", f"{self.base_url}/{command}", json=params,
+                                             timeout=httpx.Timeout(timeout, connect=self.timeout))
+        try:
+            r = self.session.send(request, stream=True)
+        except httpx.HTTPError as e:
+            self.errors += 1
+            RC_ERRORS.inc(command=command)
+            raise RcloneRCError(f"RC no responde en {self.base_url}: {e}") from e
+        try:
+            if r.status_code != 200:
+                self.errors += 1
+                RC_ERRORS.inc(command=command)
+                r.read()
+                try:
+                    detail = r.json().get("error", r.text)
+                except ValueError:
+                    detail = r.text
+                raise RcloneRCError(f"{command} falló ({r.status_code}): {str(detail)[:200]}")
+            try:
+                yield from _iter_json_list(r.iter_bytes(chunk_size=64 * 1024))
+            except (httpx.HTTPError, httpx.StreamError, ValueError) as e:
+                self.errors += 1
+                RC_ERRORS.inc(command=command)
+                raise RcloneRCError(f"{command}: respuesta cortada o inválida: {e}") from e
+        finally:
+            r.close()
+            RC_SECONDS.observe(time.perf_counter() - started, command=command)
+
+    def alive(self) -> bool:
+        try:
+            self.call("rc/noop")
+            return True
+        except RcloneRCError:
+            return False
+
+    def refresh(self, dirs: Iterable[str] = (), recursive: bool = False) -> dict:
+        """
+        vfs/refresh de directorios concretos (rutas relativas a la raíz del remoto).
+        Sin directorios refresca solo la raíz.
+        """
+        params = {}
+        for i, d in enumerate(sorted(set(dirs))):
+            params["dir" if i == 0 else f"dir{i + 1}"] = d.strip("/")
+        if recursive:
+            params["recursive"] = "true"
+        return self.call("vfs/refresh", **params)
+
+    def forget(self, dirs: Iterable[str] = ()) -> dict:
+        params = {}
+        for i, d in enumerate(sorted(set(dirs))):
+            params["dir" if i == 0 else f"dir{i + 1}"] = d.strip("/")
+        return self.call("vfs/forget", **params)
+
+
+def _iter_json_list(chunks: Iterable[bytes], key: str = "list") -> Iterator[dict]:
+    """Parser incremental de {"list": [{...}, {...}]}: produce cada objeto apenas está completo."""
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    in_list = False
+    for chunk in chunks:
+        buf += utf8.decode(chunk)
+        if not in_list:
+            start = buf.find(f'"{key}"')
+            bracket = buf.find("[", start) if start >= 0 else -1
+            if bracket < 0:
+                continue
+            buf, in_list = buf[bracket + 1:], True
+        while True:
+            buf = buf.lstrip(" \t\r\n,")
+            if not buf:
+                break
+            if buf[0] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buf)
+            except json.JSONDecodeError:
+                break  # Objeto incompleto: esperar al próximo chunk
+            yield item
+            buf = buf[end:]
+    if in_list:
+        raise ValueError("lista sin cerrar")
+    if buf.strip():
+        raise ValueError(f"falta la clave '{key}'")
+
+
+class RefreshCoalescer:
+    """
+    Junta los pedidos de refresco de muchos jobs y los envía en una sola
+    llamada vfs/refresh como mucho cada `min_interval` segundos.
+    """
+
+    def __init__(self, client: RcloneRC, min_interval: float = 2.0):
+        self.client = client
+        self.min_interval = min_interval
+        self._pending = set()
+        self._lock = threading.Lock()
+        self.last_flush = 0.0
+        self.flushes = 0
+        self.requested = 0
+
+    def request(self, dirs: Iterable[str]):
+        with self._lock:
+            for d in dirs:
+                self.requested += 1
+                self._pending.add(d.strip("/"))
+
+    def flush(self, force: bool = False, recursive: bool = False) -> Optional[List[str]]:
+        """
+        Envía los directorios pendientes si pasó el intervalo mínimo.
+        Con recursive=True solo los subdirectorios se refrescan recursivamente.
+        Devuelve la lista refrescada, o None si no tocaba refrescar todavía.
+        """
+        with self._lock:
+            now = time.time()
+            if not self._pending or (not force and now - self.last_flush < self.min_interval):
+                return None
+            dirs = sorted(self._pending)
+            self._pending.clear()
+            self.last_flush = now
+        if recursive and any(dirs):
+            # Nunca refrescar la raíz de forma recursiva: recorrería todo el remoto
+            self.client.refresh([d for d in dirs if d], recursive=True)
+            if "" in dirs:
+                self.client.refresh([""])
+        else:
+            self.client.refresh(dirs)
+        self.flushes += 1
+        return dirs
+
+
+_client: Optional[RcloneRC] = None
+_coalescer: Optional[RefreshCoalescer] = None
+_lock = threading.Lock()
+
+
+def get_rc_client() -> RcloneRC:
+    """Cliente RC compartido del proceso."""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = RcloneRC()
+        return _client
+
+
+def get_refresh_coalescer() -> RefreshCoalescer:
+    global _coalescer
+    client = get_rc_client()
+    with _lock:
+        if _coalescer is None:
+            _coalescer = RefreshCoalescer(client)
+        return _coalescer
@@ -0,0 +1,128 @@
+"""
+Arranque por etapas y estado del proceso para /healthz y /readyz.
+
+on_startup solo hace lo imprescindible (cargar los trabajos) y delega el resto
+a etapas que corren en un hilo aparte: la API acepta peticiones enseguida
+aunque rclone todavía no esté montado. Readiness reúne el estado de cada
+subsistema (checks en vivo con una caché corta, o estados fijados por las
+etapas) y wait_until() dispara una acción una sola vez cuando un conjunto de
+checks queda OK (ej: reanudar trabajos cuando el mount está sano).
+"""
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+Check = Callable[[], Tuple[bool, str]]
+
+
+class Readiness:
+    def __init__(self):
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._checks: Dict[str, Tuple[Optional[Check], float, bool]] = {}  # nombre -> (check, ttl, requerido)
+        self._results: Dict[str, dict] = {}
+        self.stages: Dict[str, dict] = {}
+
+    def register(self, name: str, check: Check, ttl: float = 2.0, required: bool = True):
+        """Check en vivo; el resultado se reutiliza durante `ttl` segundos."""
+        with self._lock:
+            self._checks[name] = (check, ttl, required)
+
+    def set(self, name: str, ok: bool, detail: str = "", required: bool = True):
+        """Estado fijado por el código de arranque (sin check en vivo)."""
+        with self._lock:
+            self._checks[name] = (None, 0.0, required)
+            self._results[name] = {"ok": ok, "detail": detail, "checked_at": time.time()}
+
+    def check(self, name: str, fresh: bool = False) -> dict:
+        with self._lock:
+            check, ttl, _ = self._checks[name]
+            cached = self._results.get(name)
+        if check is None:
+            return cached or {"ok": False, "detail": "pendiente", "checked_at": 0.0}
+        if cached and not fresh and time.time() - cached["checked_at"] < ttl:
+            return cached
+        # El check corre fuera del lock: uno lento no bloquea a los demás
+        try:
+            ok, detail = check()
+        except Exception as e:
+            ok, detail = False, f"error: {e}"
+        result = {"ok": bool(ok), "detail": detail, "checked_at": time.time()}
+        with self._lock:
+            self._results[name] = result
+        return result
+
+    def report(self) -> dict:
+        with self._lock:
+            names = list(self._checks)
+            required = {name for name, (_, _, req) in self._checks.items() if req}
+            stages = {name: dict(stage) for name, stage in self.stages.items()}
+        checks = {}
+        for name in names:
+            result = self.check(name)
+            checks[name] = {"ok": result["ok"], "detail": result["detail"], "required": name in required}
+        return {
+            "ready": all(checks[name]["ok"] for name in required),
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "checks": checks,
+            "stages": stages,
+        }
+
+    # --- Etapas ---
+
+    def run_stages(self, stages: List[Tuple[str, Callable[[], None]]]) -> threading.Thread:
+        """Ejecuta las etapas en orden en un hilo; un error en una no frena a las siguientes."""
+        with self._lock:
+            for name, _ in stages:
+                self.stages[name] = {"status": "pending"}
+
+        def run():
+            for name, fn in stages:
+                started = time.time()
+                self.stages[name] = {"status": "running"}
+                try:
+                    fn()
+                    self.stages[name] = {"status": "done", "seconds": round(time.time() - started, 3)}
+                except Exception as e:
+                    self.stages[name] = {"status": "error", "seconds": round(time.time() - started, 3), "error": str(e)}
+                    print(f"[Startup] ✗ Etapa '{name}' falló: {e}")
+            print(f"[Startup] ✓ Etapas completadas en {time.time() - self.started_at:.1f}s")
+
+        thread = threading.Thread(target=run, name="startup-stages", daemon=True)
+        thread.start()
+        return thread
+
+    def wait_until(self, names: List[str], on_ready: Callable[[], None], interval: float = 2.0,
+                   max_interval: float = 10.0, log_every: float = 60.0) -> threading.Thread:
+        """Espera (sin límite) a que los checks `names` estén OK y llama a `on_ready` una sola vez."""
+
+        def run():
+            delay, last_log = interval, 0.0
+            while True:
+                results = {name: self.check(name, fresh=True) for name in names}
+                if all(r["ok"] for r in results.values()):
+                    break
+                if time.time() - last_log >= log_every:
+                    pending = ", ".join(f"{n} ({r['detail']})" for n, r in results.items() if not r["ok"])
+                    print(f"[Startup] Esperando: {pending}")
+                    last_log = time.time()
+                time.sleep(delay)
+                delay = min(max_interval, delay * 1.5)
+            try:
+                on_ready()
+            except Exception as e:
+                print(f"[Startup] ✗ Error al completar la espera de {', '.join(names)}: {e}")
+
+        thread = threading.Thread(target=run, name="startup-wait", daemon=True)
+        thread.start()
+        return thread
+
+
+_readiness: Optional[Readiness] = None
+
+
+def get_readiness() -> Readiness:
+    global _readiness
+    if _readiness is None:
+        _readiness = Readiness()
+    return _readiness
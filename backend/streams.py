@@ -0,0 +1,190 @@
+import re
+import threading
+from typing import List, Optional
+from urllib.parse import unquote
+
+from cache_utils import FRESH, AsyncSingleFlight, TTLCache
+from http_async import UPSTREAM_SECONDS, get_async_http
+from media_utils import extract_se_info, get_match_score, get_season_range
+
+VIDEO_EXTS = ('.mkv', '.mp4', '.avi', '.ts', '.webm')
+
+RESOLUTIONS = [
+    ("2160p", re.compile(r'2160p|\b4k\b|\buhd\b', re.I)),
+    ("1440p", re.compile(r'1440p', re.I)),
+    ("1080p", re.compile(r'1080p|\bfhd\b', re.I)),
+    ("720p", re.compile(r'720p', re.I)),
+    ("480p", re.compile(r'480p|576p|\bsd\b', re.I)),
+]
+RESOLUTION_RANK = {"2160p": 5, "1440p": 4, "1080p": 3, "720p": 2, "480p": 1}
+
+CODECS = [
+    ("AV1", re.compile(r'\bav1\b', re.I)),
+    ("HEVC", re.compile(r'[xh]\.?265|hevc', re.I)),
+    ("AVC", re.compile(r'[xh]\.?264|\bavc\b', re.I)),
+]
+
+LANGUAGES = [
+    ("latino", re.compile(r'latino|\blat\b|🇲🇽|\bmx\b', re.I)),
+    ("castellano", re.compile(r'castellano|\bcast\b|\bspa\b|spanish|español|🇪🇸', re.I)),
+    ("english", re.compile(r'english|\beng\b|🇬🇧|🇺🇸', re.I)),
+    ("multi", re.compile(r'\bmulti\b|\bdual\b', re.I)),
+]
+
+# Cuánto se reutiliza una respuesta de AIOStreams. Las vacías duran menos porque
+# el torrent puede aparecer en cualquier momento.
+STREAMS_TTL = 300
+EMPTY_STREAMS_TTL = 60
+
+
+def stream_filename(stream: dict) -> Optional[str]:
+    """Nombre de archivo del stream: behaviorHints.filename o el último segmento de la URL con extensión de video."""
+    filename = (stream.get("behaviorHints") or {}).get("filename")
+    if filename:
+        return filename
+    url = stream.get("url") or ""
+    for seg in reversed(url.split("/")):
+        seg = unquote(seg)
+        if seg.lower().endswith(VIDEO_EXTS):
+            return seg
+    return None
+
+
+def parse_stream(stream: dict) -> dict:
+    """Reduce un stream de AIOStreams a los campos que usa el frontend más los metadatos parseados."""
+    name = stream.get("name") or ""
+    description = stream.get("description") or stream.get("title") or ""
+    filename = stream_filename(stream)
+    text = " ".join(p for p in (filename, name, description) if p)
+    hints = stream.get("behaviorHints") or {}
+
+    resolution = next((label for label, rx in RESOLUTIONS if rx.search(text)), None)
+    codec = next((label for label, rx in CODECS if rx.search(text)), None)
+    languages = [label for label, rx in LANGUAGES if rx.search(text)]
+    season, episode = extract_se_info(filename or description)
+    # Pack de temporada: la descripción (nombre del torrent) trae temporada sin episodio o un rango
+    d_season, d_episode = extract_se_info(description)
+    pack = (d_season is not None and d_episode is None) or get_season_range(description) != (None, None)
+
+    return {
+        "name": name,
+        "description": description,
+        "url": stream.get("url"),
+        "behaviorHints": {"filename": filename, "videoSize": hints.get("videoSize")},
+        "filename": filename,
+        "size": hints.get("videoSize") or 0,
+        "cached": "⚡" in name,
+        "resolution": resolution,
+        "codec": codec,
+        "languages": languages,
+        "season": season,
+        "episode": episode,
+        "pack": pack,
+    }
+
+
+def rank_streams(parsed: List[dict], title: str = "", year: str = "", season: int = None, episode: int = None, original_title: str = "") -> List[dict]:
+    """
+    Puntúa cada stream con get_match_score (si hay título) y ordena:
+    en caché primero, luego puntaje, resolución y tamaño.
+    """
+    ranked = []
+    for s in parsed:
+        s = dict(s)
+        if title or original_title:
+            s["score"] = get_match_score(s["filename"] or s["description"], "", title, year, season, episode, original_title)
+        else:
+            s["score"] = None
+        ranked.append(s)
+    ranked.sort(key=lambda s: (s["cached"], s["score"] or 0, RESOLUTION_RANK.get(s["resolution"], 0), s["size"]), reverse=True)
+    return ranked
+
+
+def filter_streams(streams: List[dict], resolution: Optional[str] = None, language: Optional[str] = None,
+                   codec: Optional[str] = None, cached_only: bool = False, min_score: Optional[int] = None) -> List[dict]:
+    out = []
+    for s in streams:
+        if resolution and s["resolution"] != resolution:
+            continue
+        if language and language not in s["languages"]:
+            continue
+        if codec and (s["codec"] or "").lower() != codec.lower():
+            continue
+        if cached_only and not s["cached"]:
+            continue
+        if min_score is not None and s["score"] is not None and s["score"] < min_score:
+            continue
+        out.append(s)
+    return out
+
+
+def facets(streams: List[dict]) -> dict:
+    """Conteos por resolución/idioma/códec para poblar filtros en el frontend."""
+    res, langs, codecs = {}, {}, {}
+    for s in streams:
+        if s["resolution"]:
+            res[s["resolution"]] = res.get(s["resolution"], 0) + 1
+        if s["codec"]:
+            codecs[s["codec"]] = codecs.get(s["codec"], 0) + 1
+        for lang in s["languages"]:
+            langs[lang] = langs.get(lang, 0) + 1
+    return {"resolutions": res, "languages": langs, "codecs": codecs, "cached": sum(1 for s in streams if s["cached"])}
+
+
+def paginate(items: list, page: int = 1, page_size: int = 50) -> dict:
+    page = max(1, page)
+    page_size = max(1, min(page_size, 500))
+    start = (page - 1) * page_size
+    chunk = items[start:start + page_size]
+    return {"items": chunk, "page": page, "page_size": page_size, "total": len(items), "has_more": start + len(chunk) < len(items)}
+
+
+class AIOStreamsClient:
+    """
+    Cliente AIOStreams con conexiones keep-alive y caché de corta duración por addon id.
+    Guarda los streams ya parseados para no repetir el trabajo en cada consulta.
+    """
+
+    def __init__(self, max_entries: int = 256, timeout: float = 30.0, ttl: float = STREAMS_TTL):
+        self.timeout = timeout
+        self.ttl = ttl
+        self.cache = TTLCache(max_entries)
+        self._aflight = AsyncSingleFlight()
+        self.upstream_requests = 0
+
+    async def aget_streams(self, req_url: str):
+        """Devuelve (streams_parseados, desde_cache). Lanza las excepciones de httpx."""
+        value, state = self.cache.get(req_url)
+        if state == FRESH:
+            return value, True
+        return await self._aflight.do(req_url, lambda: self._afetch(req_url)), False
+
+    async def _afetch(self, req_url: str) -> List[dict]:
+        self.upstream_requests += 1
+        with UPSTREAM_SECONDS.time(upstream="aiostreams"):
+            data = await get_async_http().get_json(req_url, timeout=self.timeout)
+        parsed = [parse_stream(s) for s in data.get("streams", [])]
+        self.cache.set(req_url, parsed, self.ttl if parsed else EMPTY_STREAMS_TTL)
+        return parsed
+
+    def invalidate(self):
+        self.cache.clear()
+
+    def stats(self) -> dict:
+        stats = self.cache.stats()
+        stats.update({"upstream_requests": self.upstream_requests, "coalesced": self._aflight.coalesced,
+                      "cancelled": self._aflight.cancelled})
+        return stats
+
+
+_client: Optional[AIOStreamsClient] = None
+_lock = threading.Lock()
+
+
+def get_aiostreams_client() -> AIOStreamsClient:
+    """Cliente AIOStreams compartido del proceso."""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = AIOStreamsClient()
+        return _client
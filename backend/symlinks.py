@@ -1,5 +1,12 @@
 import os
 import re
+import time
+
+from library_index import notify_library_change
+from metrics import counter, histogram
+
+SYMLINKS = counter("symlinks_created", "Symlinks de Plex creados por tipo (single, season) y resultado", ["kind", "result"])
+SYMLINK_SECONDS = histogram("create_plex_symlink_seconds", "Duración de create_plex_symlink")
 
 def clean_title(title: str) -> str:
     """Limpia el título para que sea compatible con Plex.
@@ -27,24 +34,11 @@ def clean_title(title: str) -> str:
     
     return clean
 
-def create_plex_symlink(source_file_path: str, media_type: str, title: str, year: str, tmdb_id: int, base_library_path: str = "/Media", season_number: int = None, original_title: str = None, use_original: bool = None):
-    """"
-    Crea la estructura de carpetas de Plex y el symlink al archivo descargado.
-    Expected structure for movies: /Media/Movies/Nombre (Año) {tmdb-ID}/Archivo.ext
-    Expected structure for TV: /Media/Shows/Nombre (Año) {tmdb-ID}/Season X/Archivo.ext
-    
-    Args:
-        source_file_path: Ruta del archivo en TorBox
-        media_type: 'movie' o 'tv'
-        title: Título traducido (puede contener caracteres especiales)
-        year: Año de la película/serie
-        tmdb_id: ID de TMDB
-        base_library_path: Ruta base de la librería Plex
-        season_number: Número de temporada (para series)
-        original_title: Título original en inglés (ej: "Bad Boys Ride or Die")
-        use_original: Si True, usar original_title en lugar de title. Si None, intentar usar config.
+def plex_media_dir(media_type: str, title: str, year: str, tmdb_id: int, base_library_path: str = "/Media", original_title: str = None, use_original: bool = None):
+    """
+    Carpeta de Plex para un título: /Media/Movies|Shows/Nombre (Año) {tmdb-ID}.
+    Devuelve (target_dir, clean_name, file_year).
     """
-    
     # Determinar si usar título original o traducido
     display_title = title
     if use_original is None:
@@ -80,7 +74,28 @@ def create_plex_symlink(source_file_path: str, media_type: str, title: str, year
     # Usamos las carpetas declaradas localmente por el usuario
     sub_folder = "Movies" if media_type == "movie" else "Shows"
     
-    target_dir = os.path.join(base_library_path, sub_folder, folder_name)
+    return os.path.join(base_library_path, sub_folder, folder_name), clean_name, file_year
+
+def create_plex_symlink(source_file_path: str, media_type: str, title: str, year: str, tmdb_id: int, base_library_path: str = "/Media", season_number: int = None, original_title: str = None, use_original: bool = None):
+    """"
+    Crea la estructura de carpetas de Plex y el symlink al archivo descargado.
+    Expected structure for movies: /Media/Movies/Nombre (Año) {tmdb-ID}/Archivo.ext
+    Expected structure for TV: /Media/Shows/Nombre (Año) {tmdb-ID}/Season X/Archivo.ext
+    
+    Args:
+        source_file_path: Ruta del archivo en TorBox
+        media_type: 'movie' o 'tv'
+        title: Título traducido (puede contener caracteres especiales)
+        year: Año de la película/serie
+        tmdb_id: ID de TMDB
+        base_library_path: Ruta base de la librería Plex
+        season_number: Número de temporada (para series)
+        original_title: Título original en inglés (ej: "Bad Boys Ride or Die")
+        use_original: Si True, usar original_title en lugar de title. Si None, intentar usar config.
+    """
+    
+    started = time.perf_counter()
+    target_dir, clean_name, file_year = plex_media_dir(media_type, title, year, tmdb_id, base_library_path, original_title, use_original)
     
     # Extraer la temporada real del nombre del archivo por si TorBox devolvió un archivo cruzado o un pack
     if media_type == "tv":
@@ -140,14 +155,55 @@ def create_plex_symlink(source_file_path: str, media_type: str, title: str, year
             os.remove(symlink_path)
             
         os.symlink(source_file_path, symlink_path)
+        notify_library_change(symlink_path, base_library_path)
         print(f"✓ Symlink creado exitosamente")
         print(f"  Carpeta: {target_dir}")
         print(f"  Archivo: {filename}")
         print(f"  → {symlink_path}")
+        SYMLINKS.inc(kind="single", result="ok")
+        SYMLINK_SECONDS.observe(time.perf_counter() - started)
         return symlink_path
         
     except Exception as e:
+        SYMLINKS.inc(kind="single", result="error")
         print(f"✗ Error creando estructura o symlink para Plex: {e}")
         import traceback
         traceback.print_exc()
         return None
+
+def create_season_symlinks(episode_files: dict, title: str, year: str, tmdb_id: int, season_number: int, base_library_path: str = "/Media", original_title: str = None, use_original: bool = None) -> dict:
+    """
+    Enlaza una temporada completa en un solo lote.
+    `episode_files` es {episodio: ruta_en_torbox}; devuelve {episodio: ruta_del_symlink}.
+
+    Se crea la carpeta "Season XX" una vez y se lista una vez para detectar
+    symlinks previos, en lugar de repetir makedirs/extract_se_info por episodio.
+    """
+    show_dir, _, _ = plex_media_dir("tv", title, year, tmdb_id, base_library_path, original_title, use_original)
+    target_dir = os.path.join(show_dir, f"Season {season_number:02d}")
+    created = {}
+    try:
+        os.makedirs(target_dir, exist_ok=True)
+        existing = set(os.listdir(target_dir))
+    except Exception as e:
+        print(f"✗ Error creando carpeta de temporada {target_dir}: {e}")
+        return created
+
+    for episode, source in sorted(episode_files.items()):
+        _, file_ext = os.path.splitext(source)
+        filename = f"S{season_number:02d}E{episode:02d}{file_ext}"
+        symlink_path = os.path.join(target_dir, filename)
+        try:
+            if filename in existing:
+                os.remove(symlink_path)
+            os.symlink(source, symlink_path)
+            created[episode] = symlink_path
+        except Exception as e:
+            print(f"✗ Error creando symlink {filename}: {e}")
+
+    SYMLINKS.inc(len(created), kind="season", result="ok")
+    SYMLINKS.inc(len(episode_files) - len(created), kind="season", result="error")
+    if created:
+        notify_library_change(target_dir, base_library_path)
+    print(f"✓ Temporada {season_number} enlazada: {len(created)}/{len(episode_files)} episodios en {target_dir}")
+    return created
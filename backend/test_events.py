@@ -0,0 +1,55 @@
+import asyncio
+
+from events import EventBus
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_resume_from_seq_in_history_replays_missing_events():
+    async def scenario():
+        bus = EventBus(history=50, max_buffer=20)
+        for i in range(5):
+            bus.publish("job", {"i": i})
+        sub, needs_snapshot = bus.subscribe(since=2)
+        assert not needs_snapshot
+        assert [seq for seq, _, _ in await sub.get(timeout=0.1)] == [3, 4, 5]
+
+        bus.publish("job", {"i": 5})
+        assert [data["i"] for _, _, data in await sub.get(timeout=0.1)] == [5]
+        bus.unsubscribe(sub)
+        assert bus.subscriber_count() == 0
+
+    run(scenario())
+
+
+def test_resume_needs_snapshot_when_seq_left_history_or_replay_too_big():
+    async def scenario():
+        bus = EventBus(history=10, max_buffer=8)
+        for i in range(30):
+            bus.publish("job", {"i": i})
+        # seq 5 ya salió del historial (quedan 21..30)
+        sub, needs_snapshot = bus.subscribe(since=5)
+        assert needs_snapshot and not sub.buffer
+        # seq 21 está en el historial pero reenviar 9 eventos no entra en el buffer
+        assert bus.subscribe(since=21)[1]
+        assert not bus.subscribe(since=27)[1]
+        assert bus.subscribe()[1]  # Cliente nuevo
+
+    run(scenario())
+
+
+def test_slow_subscriber_overflows_and_stops_receiving():
+    async def scenario():
+        bus = EventBus(history=50, max_buffer=3)
+        sub, _ = bus.subscribe()
+        for i in range(5):
+            bus.publish("job", {"i": i})
+        assert sub.overflowed
+        events = await sub.get(timeout=0.1)
+        assert [data["i"] for _, _, data in events] == [0, 1, 2]
+        bus.publish("job", {"i": 5})
+        assert await sub.get(timeout=0.01) == []
+
+    run(scenario())
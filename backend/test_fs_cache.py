@@ -0,0 +1,50 @@
+import os
+
+from fs_cache import FsCache
+from mount_index import MountIndex
+
+
+def test_exists_and_listing_are_cached(tmp_path):
+    cache = FsCache(ttl=60)
+    (tmp_path / "Show").mkdir()
+    (tmp_path / "Show" / "S01E01.mkv").write_bytes(b"")
+    link = tmp_path / "link.mkv"
+    os.symlink(tmp_path / "Show" / "S01E01.mkv", link)
+
+    assert cache.listdir(str(tmp_path / "Show")) == [("S01E01.mkv", False)]
+    # El listado ya confirmó el archivo: el symlink se resuelve sin stat
+    assert cache.target_exists(str(link))
+    (tmp_path / "Show" / "S01E01.mkv").unlink()
+    assert cache.target_exists(str(link))
+    assert cache.listdir(str(tmp_path / "missing")) is None
+
+    stats = cache.stats()
+    assert stats["exists"]["hits"] == 2 and stats["listings"]["misses"] == 2
+
+    cache.invalidate([str(tmp_path / "Show" / "S01E01.mkv")])
+    assert not cache.target_exists(str(link))
+    assert cache.listdir(str(tmp_path / "Show")) == []
+
+
+def test_mount_and_library_events_invalidate(tmp_path):
+    mount = tmp_path / "torbox"
+    (mount / "Pack").mkdir(parents=True)
+    index = MountIndex(str(mount))
+    cache = FsCache(ttl=60)
+    index.add_listener(cache.on_mount_change)
+    index.refresh()
+
+    target = str(mount / "Pack" / "Movie.mkv")
+    assert not cache.exists(target)
+    assert cache.listdir(str(mount / "Pack")) == []
+    (mount / "Pack" / "Movie.mkv").write_bytes(b"")
+    index.refresh(force=True)
+    assert cache.exists(target)
+    assert cache.listdir(str(mount / "Pack")) == [("Movie.mkv", False)]
+
+    folder = tmp_path / "Media" / "Movies" / "Movie (2020) {tmdb-1}"
+    folder.mkdir(parents=True)
+    assert cache.listdir(str(folder)) == []
+    (folder / "Movie (2020).mkv").write_bytes(b"")
+    cache.on_library_change(str(folder))
+    assert cache.listdir(str(folder)) == [("Movie (2020).mkv", False)]
@@ -0,0 +1,76 @@
+import os
+import threading
+import time
+
+from health import BROKEN, OK, REPAIRED, HealthEngine
+from job_store import JobStore
+from mount_index import get_mount_index
+
+
+def make_library(tmp_path):
+    mount = tmp_path / "torbox"
+    (mount / "Avatar.2009.1080p").mkdir(parents=True)
+    (mount / "Avatar.2009.1080p" / "Avatar.2009.1080p.mkv").write_bytes(b"")
+    (mount / "Dune.2021.2160p").mkdir()
+    (mount / "Dune.2021.2160p" / "Dune.2021.2160p.mkv").write_bytes(b"")
+    library = tmp_path / "Media" / "Movies"
+    for folder, target in (("Avatar (2009) {tmdb-19995}", "Avatar.2009.1080p/Avatar.2009.1080p.mkv"),
+                           ("Dune (2021) {tmdb-438631}", "Dune.2021.2160p/Dune.2021.2160p.mkv")):
+        (library / folder).mkdir(parents=True)
+        os.symlink(mount / target, library / folder / f"{folder.split(' {')[0]}.mkv")
+    return mount, tmp_path / "Media"
+
+
+def test_check_skips_unchanged_dirs_and_persists(tmp_path):
+    mount, media = make_library(tmp_path)
+    state = tmp_path / "health.json"
+    engine = HealthEngine(str(media), str(state), mount_path=str(mount), auto_repair=False)
+    first = engine.check()
+    assert (first["links"], first["listed"], first["broken"]) == (2, 2, 0)
+    assert engine.check()["skipped"] == 2
+
+    (mount / "Dune.2021.2160p" / "Dune.2021.2160p.mkv").unlink()
+    os.utime(mount / "Dune.2021.2160p", (1, 1))
+    result = engine.check()
+    assert (result["skipped"], result["listed"], result["broken"]) == (1, 1, 1)
+    engine.close()
+
+    reloaded = HealthEngine(str(media), str(state), mount_path=str(mount))
+    assert reloaded.summary()["statuses"][BROKEN] == 1
+    assert reloaded.results(OK)["links"][0]["path"].endswith("Avatar (2009).mkv")
+
+
+def test_broken_link_is_repaired_from_mount_index(tmp_path):
+    mount, media = make_library(tmp_path)
+    index = get_mount_index(str(mount))
+    engine = HealthEngine(str(media), mount_path=str(mount), auto_repair=False)
+
+    # El torrent se re-agregó con otro nombre
+    os.rename(mount / "Dune.2021.2160p", mount / "Dune.Part.One.2021.2160p.WEB-DL")
+    os.rename(mount / "Dune.Part.One.2021.2160p.WEB-DL" / "Dune.2021.2160p.mkv",
+              mount / "Dune.Part.One.2021.2160p.WEB-DL" / "Dune.Part.One.2021.2160p.WEB-DL.mkv")
+    index.refresh(force=True)
+    result = engine.check()
+    assert (result["from_index"], result["broken"]) == (1, 1)
+
+    link = media / "Movies" / "Dune (2021) {tmdb-438631}" / "Dune (2021).mkv"
+    new_target = engine.repair(str(link))
+    assert new_target == str(mount / "Dune.Part.One.2021.2160p.WEB-DL" / "Dune.Part.One.2021.2160p.WEB-DL.mkv")
+    assert os.readlink(link) == new_target
+    assert engine.results(REPAIRED)["total"] == 1
+    assert engine.check()["broken"] == 0
+
+
+def test_concurrent_callers_wait_for_the_state_load(tmp_path, monkeypatch):
+    state_path = tmp_path / "symlink_health.json"
+    state_path.write_text('{"link:/Media/a.mkv": {"status": "ok"}}')
+    original_load = JobStore.load
+    monkeypatch.setattr(JobStore, "load", lambda self: (time.sleep(0.2), original_load(self))[1])
+    engine = HealthEngine(str(tmp_path), state_path=str(state_path))
+
+    loader = threading.Thread(target=engine.ensure_loaded)
+    loader.start()
+    time.sleep(0.05)
+    engine.ensure_loaded()
+    assert "link:/Media/a.mkv" in engine._state
+    loader.join()
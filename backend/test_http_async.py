@@ -0,0 +1,84 @@
+import asyncio
+
+import httpx
+import pytest
+
+from cache_utils import AsyncSingleFlight
+from http_async import ClientDisconnected, cancel_on_disconnect, get_async_http
+from test_tmdb_client import FakeTMDB, start_fake_tmdb
+from tmdb_client import TMDBClient
+
+
+class FakeRequest:
+    def __init__(self, disconnect_after: float):
+        self.disconnect_at = asyncio.get_running_loop().time() + disconnect_after
+
+    async def is_disconnected(self) -> bool:
+        return asyncio.get_running_loop().time() >= self.disconnect_at
+
+
+def test_async_single_flight_coalesces_and_cancels():
+    async def scenario():
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "ok"
+
+        assert await asyncio.gather(*[flight.do("k", slow) for _ in range(5)]) == ["ok"] * 5
+        assert len(calls) == 1 and flight.coalesced == 4
+
+        # Si el único que espera se cancela, la tarea upstream también
+        waiter = asyncio.ensure_future(flight.do("k2", lambda: asyncio.sleep(10)))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0)
+        assert flight.cancelled == 1 and not flight.in_flight("k2")
+
+    asyncio.run(scenario())
+
+
+def test_tmdb_aget_shares_cache_and_raises_httpx_errors():
+    server, url = start_fake_tmdb()
+    FakeTMDB.delay = 0.1
+
+    async def scenario():
+        client = TMDBClient(url)
+        results = await asyncio.gather(*[client.aget("/movie/1", "key") for _ in range(10)])
+        assert all(r["path"] == "/3/movie/1" for r in results)
+        assert FakeTMDB.hits["/3/movie/1"] == 1
+        assert await client.aget("/movie/1", "key") == results[0] and client.stats()["hits"] == 1
+        with pytest.raises(httpx.HTTPStatusError) as e:
+            await client.aget("/tv/404", "key")
+        assert e.value.response.status_code == 404
+        await get_async_http().aclose()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        server.shutdown()
+
+
+def test_cancel_on_disconnect():
+    async def scenario():
+        assert await cancel_on_disconnect(FakeRequest(10), asyncio.sleep(0.01, result="done"), poll_interval=0.005) == "done"
+
+        cancelled = asyncio.Event()
+
+        async def upstream():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with pytest.raises(ClientDisconnected):
+            await cancel_on_disconnect(FakeRequest(0.02), upstream(), poll_interval=0.005)
+        await asyncio.sleep(0)
+        assert cancelled.is_set()
+
+    asyncio.run(scenario())
@@ -0,0 +1,38 @@
+import json
+
+from id_map import IdMapStore
+
+
+def test_round_trip_and_persistence(tmp_path):
+    path = str(tmp_path / "id_map.json")
+    store = IdMapStore(path)
+    assert store.get_imdb_id("movie", 603) is None
+    store.put_imdb_id("movie", 603, "tt0133093")
+    store.put_imdb_id("tv", "1399", "tt0944947")
+    assert store.get_imdb_id("movie", "603") == "tt0133093"  # int y str son la misma clave
+    assert store.get_imdb_id("tv", 603) is None                # El tipo de medio separa las claves
+    assert store.stats()["entries"] == 2 and store.hits == 1 and store.misses == 2
+    store.close()
+
+    assert json.load(open(path)) == {"movie:603": {"imdb_id": "tt0133093"}, "tv:1399": {"imdb_id": "tt0944947"}}
+    reloaded = IdMapStore(path)
+    assert reloaded.get_imdb_id("tv", 1399) == "tt0944947"
+    reloaded.close()
+
+
+def test_missing_imdb_id_does_not_poison_the_map(tmp_path):
+    path = str(tmp_path / "id_map.json")
+    store = IdMapStore(path)
+    store.put_imdb_id("movie", 1, None)
+    store.put_imdb_id("movie", 1, "")
+    assert store.get_imdb_id("movie", 1) is None and store.stats()["entries"] == 0
+
+    store.put_imdb_id("movie", 2, "tt0000002")
+    store.put_imdb_id("movie", 2, None)  # Una respuesta sin imdb_id no borra lo conocido
+    assert store.get_imdb_id("movie", 2) == "tt0000002"
+
+    # Repetir el mismo valor no marca cambios
+    marks = store._store.dirty_marks
+    store.put_imdb_id("movie", 2, "tt0000002")
+    assert store._store.dirty_marks == marks
+    store.close()
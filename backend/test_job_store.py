@@ -0,0 +1,84 @@
+import json
+import os
+
+from job_store import JobStore, SQLiteJobStore, create_job_store
+
+
+def test_json_store_flushes_atomically(tmp_path):
+    path = str(tmp_path / "active_jobs.json")
+    jobs = {}
+    store = JobStore(path, jobs)
+    assert not store.flush()  # Sin cambios no escribe
+
+    jobs["a"] = {"status": "Searching"}
+    store.mark_dirty()
+    store.mark_dirty()
+    assert store.flush() and not store.flush()
+    assert store.stats()["dirty_marks"] == 2 and store.writes == 1
+    assert json.load(open(path)) == {"a": {"status": "Searching"}}
+    assert not os.path.exists(path + ".tmp")
+
+    # Si la escritura falla, el archivo anterior queda intacto y se reintenta
+    jobs["b"] = {"status": "Error", "bad": object()}
+    store.mark_dirty()
+    assert not store.flush()
+    assert json.load(open(path)) == {"a": {"status": "Searching"}}
+    del jobs["b"]
+    assert store.flush()
+
+    reloaded = JobStore(path)
+    assert reloaded.load() == {"a": {"status": "Searching"}}
+
+
+def test_sqlite_store_only_writes_changed_and_removed_rows(tmp_path):
+    path = str(tmp_path / "active_jobs.db")
+    jobs = {"a": {"status": "Searching"}, "b": {"status": "Searching"}}
+    store = SQLiteJobStore(path, jobs)
+    store.mark_dirty()
+    store.flush()
+
+    def rows():
+        return dict(store._db().execute("SELECT job_id, updated FROM jobs").fetchall())
+
+    before = rows()
+    jobs["a"]["status"] = "Completed"
+    del jobs["b"]
+    jobs["c"] = {"status": "Searching"}
+    store.mark_dirty()
+    store.flush()
+    after = rows()
+    assert set(after) == {"a", "c"}
+    assert after["a"] > before["a"]
+
+    # Sin diferencias no se toca la base
+    store.mark_dirty()
+    store.flush()
+    assert rows() == after
+
+    reloaded = SQLiteJobStore(path)
+    assert dict(reloaded.iter_jobs()) == {"a": {"status": "Completed"}, "c": {"status": "Searching"}}
+
+
+def test_switching_to_sqlite_imports_the_json_once(tmp_path):
+    json_path = str(tmp_path / "active_jobs.json")
+    with open(json_path, "w") as f:
+        json.dump({"a": {"status": "Searching"}}, f)
+
+    jobs = {}
+    store = create_job_store(json_path, jobs, backend="sqlite")
+    assert isinstance(store, SQLiteJobStore) and store.path == str(tmp_path / "active_jobs.db")
+    assert store.load() == {"a": {"status": "Searching"}}
+
+    # Con la base ya poblada el JSON no se vuelve a leer
+    del jobs["a"]
+    jobs["b"] = {"status": "Searching"}
+    store.mark_dirty()
+    store.flush()
+    assert create_job_store(json_path, {}, backend="sqlite").load() == {"b": {"status": "Searching"}}
+    assert json.load(open(json_path)) == {"a": {"status": "Searching"}}  # El JSON queda intacto
+
+    # Aunque la base quede vacía, el JSON viejo no se re-importa
+    jobs.clear()
+    store.mark_dirty()
+    store.flush()
+    assert create_job_store(json_path, {}, backend="sqlite").load() == {}
@@ -0,0 +1,102 @@
+import os
+import time
+
+import pytest
+
+from library_index import LibraryIndex
+
+
+def make_library(tmp_path):
+    root = tmp_path / "Media"
+    season = root / "Shows" / "Ted Lasso (2020) {tmdb-97546}" / "Season 01"
+    season.mkdir(parents=True)
+    for ep in (1, 2):
+        os.symlink(f"/mnt/torbox/pack/Ted.Lasso.S01E0{ep}.mkv", season / f"S01E0{ep}.mkv")
+    movie = root / "Movies" / "Avatar (2009) {tmdb-19995}"
+    movie.mkdir(parents=True)
+    os.symlink("/mnt/torbox/Avatar.2009.mkv", movie / "Avatar (2009).mkv")
+    index = LibraryIndex(str(root))
+    index.build()
+    return index, root
+
+
+def test_build_and_queries(tmp_path):
+    index, root = make_library(tmp_path)
+    listing = index.list()
+    assert listing["full"] and listing["totals"] == {"movies": 1, "shows": 1}
+    assert listing["shows"] == [{"name": "Ted Lasso (2020) {tmdb-97546}", "tmdb_id": 97546}]
+    assert index.has_episode("Ted Lasso (2020) {tmdb-97546}", 1, 2)
+    assert [f.name for f in index.folders_for(19995)] == ["Avatar (2009) {tmdb-19995}"]
+
+    show = root / "Shows" / "Ted Lasso (2020) {tmdb-97546}"
+    assert index.dir_summary(str(show / "Season 01")) == {"episodes": {(1, 1), (1, 2)}, "has_video": True}
+    assert index.dir_summary(str(show)) == {"episodes": set(), "has_video": False}
+    assert index.dir_summary(str(show / "Season 02")) is None
+
+    tree = index.structure("movie", "Avatar (2009) {tmdb-19995}", is_alive=lambda target: True)
+    assert tree[0]["target"] == "/mnt/torbox/Avatar.2009.mkv" and tree[0]["is_valid"]
+
+
+def test_incremental_updates_and_since(tmp_path):
+    index, root = make_library(tmp_path)
+    version = index.version
+    show = root / "Shows" / "Ted Lasso (2020) {tmdb-97546}"
+
+    # Re-escanear sin cambios no mueve la versión
+    index.notify_path(str(show / "Season 01" / "S01E01.mkv"))
+    assert index.version == version
+
+    os.symlink("/mnt/torbox/pack/Ted.Lasso.S01E03.mkv", show / "Season 01" / "S01E03.mkv")
+    index.notify_path(str(show / "Season 01" / "S01E03.mkv"))
+    delta = index.list(since=version)
+    assert not delta["full"] and delta["movies"] == [] and delta["removed"] == []
+    assert delta["shows"][0]["name"] == show.name
+
+    version = index.version
+    movie = root / "Movies" / "Avatar (2009) {tmdb-19995}"
+    for f in movie.iterdir():
+        f.unlink()
+    movie.rmdir()
+    index.notify_path(str(movie))
+    delta = index.list(since=version)
+    assert delta["removed"] == [{"media_type": "movie", "name": movie.name}]
+    assert index.folders_for(19995) == []
+
+
+def test_inotify_picks_up_external_changes(tmp_path):
+    index, root = make_library(tmp_path)
+    index.start()
+    if not index.inotify_active:
+        pytest.skip("inotify no disponible")
+    movie = root / "Movies" / "Dune (2021) {tmdb-438631}"
+    movie.mkdir()
+    os.symlink("/mnt/torbox/Dune.2021.mkv", movie / "Dune (2021).mkv")
+    deadline = time.time() + 5
+    while time.time() < deadline and index.get_folder("movie", movie.name) is None:
+        time.sleep(0.05)
+    folder = index.get_folder("movie", movie.name)
+    assert folder is not None and folder.has_video
+
+
+def test_explicit_notify_is_synchronous_and_deduped_with_inotify(tmp_path):
+    index, root = make_library(tmp_path)
+    index.start()
+    if not index.inotify_active:
+        pytest.skip("inotify no disponible")
+    time.sleep(0.3)
+    before = index.rescans
+    movie = next((root / "Movies").iterdir())
+    os.symlink("/mnt/torbox/Extra.mkv", movie / "Extra.mkv")
+    index.notify_path(str(movie / "Extra.mkv"))
+    assert "Extra.mkv" in index.get_folder("movie", movie.name).files  # Visible al volver de notify_path
+
+    time.sleep(0.5)
+    assert index.rescans - before == 1  # El evento de inotify no vuelve a recorrer la carpeta
+    assert index.stats()["skipped_rescans"] >= 1
+
+    # Un cambio externo posterior sí se re-escanea
+    os.symlink("/mnt/torbox/Extra2.mkv", movie / "Extra2.mkv")
+    deadline = time.time() + 5
+    while time.time() < deadline and "Extra2.mkv" not in index.get_folder("movie", movie.name).files:
+        time.sleep(0.05)
+    assert "Extra2.mkv" in index.get_folder("movie", movie.name).files
@@ -0,0 +1,109 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from listing import RcloneListProvider
+from mount_index import MountIndex
+from rclone_rc import RcloneRC, _iter_json_list
+
+
+class FakeListRC(BaseHTTPRequestHandler):
+    """operations/list falso que lista un directorio local como lo haría rclone (Path relativo a la raíz)."""
+    protocol_version = "HTTP/1.1"
+    root = ""
+    calls = []
+
+    def do_POST(self):
+        params = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        FakeListRC.calls.append((params["remote"], params["opt"]["recurse"]))
+        base = os.path.join(self.root, params["remote"])
+        items = []
+        for current, dirs, files in os.walk(base):
+            for name in dirs + files:
+                full = os.path.join(current, name)
+                items.append({"Path": os.path.relpath(full, self.root), "Name": name, "IsDir": name in dirs,
+                              "ModTime": str(os.stat(full).st_mtime_ns)})
+            if not params["opt"]["recurse"]:
+                break
+        data = json.dumps({"list": items}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_fake_rc(root):
+    FakeListRC.root, FakeListRC.calls = str(root), []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeListRC)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_iter_json_list_across_chunk_boundaries():
+    body = json.dumps({"list": [{"Path": "Película ñ/a.mkv", "IsDir": False}, {"Path": "b", "IsDir": True}]}).encode()
+    chunks = [body[i:i + 3] for i in range(0, len(body), 3)]  # Corta objetos y caracteres UTF-8
+    assert [item["Path"] for item in _iter_json_list(chunks)] == ["Película ñ/a.mkv", "b"]
+    assert list(_iter_json_list([b'{"list": []}'])) == []
+
+
+def test_index_via_rc_is_incremental(tmp_path):
+    remote = tmp_path / "remote"
+    (remote / "Show.S01").mkdir(parents=True)
+    (remote / "Show.S01" / "Show.S01E01.mkv").write_bytes(b"")
+    (remote / "Movie.2020.mkv").write_bytes(b"")
+    server, url = start_fake_rc(remote)
+    try:
+        mount = str(tmp_path / "mnt")  # El mount FUSE ni siquiera existe
+        index = MountIndex(mount, provider=RcloneListProvider(client=RcloneRC(url)))
+        assert index.refresh()
+        assert index.stats()["source"] == "rc"
+        assert FakeListRC.calls == [("", True)]
+        assert index.lookup("show.s01e01.mkv") == os.path.join(mount, "Show.S01", "Show.S01E01.mkv")
+
+        # Sin cambios: solo la raíz
+        FakeListRC.calls.clear()
+        index.refresh()
+        assert FakeListRC.calls == [("", False)]
+
+        # Carpeta nueva: raíz + esa carpeta, y la carpeta invalidada también
+        changes = []
+        index.add_listener(changes.append)
+        (remote / "New.S02").mkdir()
+        (remote / "New.S02" / "New.S02E01.mkv").write_bytes(b"")
+        index.invalidate([os.path.join(mount, "Show.S01")])
+        FakeListRC.calls.clear()
+        index.refresh()
+        assert sorted(FakeListRC.calls) == [("", False), ("New.S02", True), ("Show.S01", True)]
+        assert changes[-1]["top_level_added"] == ["New.S02"]
+        assert index.lookup("New.S02E01.mkv")
+
+        # Invalidar una subcarpeta re-lista solo su carpeta de primer nivel, una vez
+        (remote / "Show.S01" / "Subs").mkdir()
+        index.refresh()
+        index.invalidate([os.path.join(mount, "Show.S01", "Subs") + "/"])
+        FakeListRC.calls.clear()
+        index.refresh()
+        index.refresh()
+        assert FakeListRC.calls == [("", False), ("Show.S01", True), ("", False)]
+
+        (remote / "Movie.2020.mkv").unlink()
+        index.refresh()
+        assert index.lookup("Movie.2020.mkv") is None
+    finally:
+        server.shutdown()
+
+
+def test_falls_back_to_fuse_when_rc_is_down(tmp_path):
+    (tmp_path / "Movie.2020.mkv").write_bytes(b"")
+    provider = RcloneListProvider(client=RcloneRC("http://127.0.0.1:9", timeout=0.5), retry_after=60)
+    index = MountIndex(str(tmp_path), provider=provider)
+    assert index.refresh()
+    assert index.stats()["source"] == "fuse" and index.lookup("movie.2020.mkv")
+    assert provider.failures == 1 and not provider.available()
+    index.refresh()
+    assert provider.failures == 1  # No se reintenta RC hasta retry_after
@@ -0,0 +1,47 @@
+import os
+
+from bench_media_utils import QUERIES, make_corpus
+from matcher import TokenIndex, match_names
+from media_utils import get_match_score
+from mount_index import MountIndex
+from watcher import WatchJob
+
+
+def test_pruned_match_equals_brute_force():
+    names = make_corpus(5000, seed=3)
+    index = TokenIndex()
+    index.build((n, "/mnt/" + n) for n in names)
+    for q in QUERIES:
+        expected = sorted(((get_match_score(n, *q), n) for n in names), reverse=True)
+        expected = [m for m in expected if m[0] >= 35][:10]
+        got = index.match(*q, top_k=10)
+        assert [(s, n) for s, n, _ in got] == expected, q
+
+
+def test_remove_and_exact_name():
+    index = TokenIndex()
+    index.add("Ted.Lasso.S01E02.mkv", "/a/Ted.Lasso.S01E02.mkv")
+    index.add("Ted.Lasso.S01E02.mkv", "/b/Ted.Lasso.S01E02.mkv")
+    assert index.match(title="Ted Lasso", season=1, episode=2)[0][2] == "/a/Ted.Lasso.S01E02.mkv"
+    index.remove("Ted.Lasso.S01E02.mkv", "/a/Ted.Lasso.S01E02.mkv")
+    assert index.match(title="Ted Lasso", season=1, episode=2)[0][2] == "/b/Ted.Lasso.S01E02.mkv"
+    index.remove("Ted.Lasso.S01E02.mkv", "/b/Ted.Lasso.S01E02.mkv")
+    assert index.match(title="Ted Lasso", season=1, episode=2) == []
+    assert index.stats() == {"names": 0, "tokens": 0}
+    assert match_names(["Avatar.2009.mkv", "Avatar.Fire.and.Ash.2025.mkv"], title="Avatar", year="2009")[0][1] == "Avatar.2009.mkv"
+
+
+def test_watch_job_falls_back_to_fuzzy_match(tmp_path):
+    release = tmp_path / "Ted.Lasso.S01.1080p"
+    release.mkdir()
+    (release / "Ted.Lasso.S01E02.Renamed.1080p.WEB.mkv").write_bytes(b"")
+    (release / "Ted.Lasso.S01E02.sample.mkv").write_bytes(b"")
+    (release / "Ted.Lasso.S01E02.nfo").write_bytes(b"")
+    index = MountIndex(str(tmp_path))
+    index.refresh()
+
+    job = WatchJob("j1", "Ted.Lasso.S01E02.1080p.WEB.x264.mkv", title="Ted Lasso", year="2020", season=1, episode=2, mount_path=str(tmp_path))
+    assert job.resolve(index) == os.path.join(str(release), "Ted.Lasso.S01E02.Renamed.1080p.WEB.mkv")
+
+    other = WatchJob("j2", "Ted.Lasso.S01E03.mkv", title="Ted Lasso", season=1, episode=3, mount_path=str(tmp_path))
+    assert other.resolve(index) is None
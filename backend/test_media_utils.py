@@ -0,0 +1,33 @@
+from bench_media_utils import QUERIES, legacy_get_match_score, make_corpus
+from media_utils import get_match_score, is_valid_match, parse_query, parse_release, score_release
+
+
+def test_known_matches():
+    assert is_valid_match("Dexter.S01E07.2006.WEB-DL.1080p-Dual-Lat.mkv", "Dexter S01E07.mkv", "Dexter", "2006", 1, 7)
+    assert is_valid_match("Avatar.2009.1080p.mkv", "Avatar.mkv", "Avatar", "2009")
+    assert not is_valid_match("Avatar.Fire.and.Ash.2025.1080p.CAMRip.mkv", "Avatar.mkv", "Avatar", "2009")
+    assert not is_valid_match("ted.S01E01.mkv", "", "Ted Lasso", "2020", 1, 1)
+    assert get_match_score("Ted.Lasso.S01-S03.Complete", "", "Ted Lasso", "2020", 2, 5) > 0
+
+
+def test_scores_match_legacy_implementation():
+    for name in make_corpus(3000, seed=7):
+        for q in QUERIES:
+            assert get_match_score(name, *q) == legacy_get_match_score(name, *q), (name, q)
+
+
+def test_release_is_parsed_once():
+    name = "Some.Show.S02E03.1080p.mkv"
+    release = parse_release(name)
+    assert parse_release(name) is release
+    assert (release.season, release.episode, release.years) == (2, 3, [])
+    assert score_release(release, parse_query("", "Some Show", "", 2, 3)) == get_match_score(name, "", "Some Show", "", 2, 3)
+
+
+def test_labeled_corpus_does_not_regress():
+    from bench_matcher import evaluate, load_corpus
+    corpus = load_corpus()
+    result = evaluate(corpus["cases"], corpus["threshold"])
+    # Valores actuales del corpus (bench_matcher.py muestra los fallos conocidos)
+    assert result["precision"] >= 0.96
+    assert result["recall"] >= 0.85
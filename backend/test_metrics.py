@@ -0,0 +1,64 @@
+import re
+
+import pytest
+
+from cache_utils import TTLCache
+from metrics import Registry, cache_collector, Counter, Histogram, _Metric
+
+
+def test_counter_and_histogram_exposition():
+    registry = Registry()
+    calls = registry._get_or_create(Counter, "test_calls", "Llamadas", ["command"])
+    latency = registry._get_or_create(Histogram, "test_seconds", "Latencia", ["command"], (0.1, 1.0))
+    assert registry._get_or_create(Counter, "test_calls", "Llamadas", ["command"]) is calls
+
+    calls.inc(command="core/stats")
+    calls.inc(2, command="vfs/refresh")
+    for value in (0.05, 0.5, 3.0):
+        latency.observe(value, command="vfs/refresh")
+
+    text = registry.expose()
+    assert "# TYPE plexaiotorb_test_calls counter" in text
+    assert 'plexaiotorb_test_calls_total{command="vfs/refresh"} 2' in text
+    # Buckets acumulados y +Inf igual a _count
+    assert 'plexaiotorb_test_seconds_bucket{command="vfs/refresh",le="0.1"} 1' in text
+    assert 'plexaiotorb_test_seconds_bucket{command="vfs/refresh",le="1"} 2' in text
+    assert 'plexaiotorb_test_seconds_bucket{command="vfs/refresh",le="+Inf"} 3' in text
+    assert 'plexaiotorb_test_seconds_count{command="vfs/refresh"} 3' in text
+    assert latency.count(command="vfs/refresh") == 3
+
+    # Cada línea es HELP/TYPE o `nombre{etiquetas} valor`
+    sample = re.compile(r'^[a-z_]+(\{[a-z_]+="[^"]*"(,[a-z_]+="[^"]*")*\})? [-+0-9.eInf]+$')
+    for line in text.strip().splitlines():
+        assert line.startswith("# ") or sample.match(line), line
+
+
+def test_timer_and_label_escaping():
+    registry = Registry()
+    latency = registry._get_or_create(Histogram, "block_seconds", "Bloque", ["name"])
+    with latency.time(name='a"b'):
+        pass
+    assert latency.count(name='a"b') == 1
+    assert 'name="a\\"b"' in registry.expose()
+
+
+def test_collectors_merge_families():
+    registry = Registry()
+    tmdb, streams = TTLCache(), TTLCache()
+    tmdb.set("k", 1, ttl=60)
+    tmdb.get("k")
+    streams.get("missing")
+    registry.register_collector(cache_collector("tmdb", tmdb.stats))
+    registry.register_collector(cache_collector("aiostreams", streams.stats))
+    registry.register_collector(lambda: 1 / 0)  # Un collector roto no rompe /metrics
+
+    text = registry.expose()
+    assert text.count("# TYPE plexaiotorb_cache_requests counter") == 1
+    assert 'plexaiotorb_cache_requests_total{cache="tmdb",result="hit"} 1' in text
+    assert 'plexaiotorb_cache_requests_total{cache="aiostreams",result="miss"} 1' in text
+    assert 'plexaiotorb_cache_entries{cache="tmdb"} 1' in text
+
+
+def test_metric_base_is_abstract():
+    with pytest.raises(TypeError):
+        _Metric("x", "sin samples")
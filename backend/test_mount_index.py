@@ -0,0 +1,162 @@
+import gzip
+import os
+import time
+
+from mount_index import MountIndex
+
+
+SHOWS = ["Ted.Lasso", "Severance", "Andor", "Shogun", "Silo"]
+
+
+def make_mount(tmp_path, folders=5):
+    mount = tmp_path / "torbox"
+    for show in SHOWS[:folders]:
+        folder = mount / f"{show}.S01.1080p"
+        (folder / "Subs").mkdir(parents=True)
+        (folder / f"{show}.S01E01.1080p.mkv").write_bytes(b"")
+        (folder / "Subs" / "en.srt").write_bytes(b"")
+    (mount / "Movie.2020.1080p.mkv").write_bytes(b"")
+    return mount
+
+
+def wait_warm(index, timeout=5):
+    deadline = time.time() + timeout
+    while index.stats()["matcher_warming"] and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def bump_mtime(path):
+    # Asegura un mtime distinto aunque el filesystem tenga poca resolución
+    st = os.stat(path)
+    os.utime(path, (st.st_atime, st.st_mtime + 10))
+
+
+def test_incremental_rescan_only_relists_changed_dirs(tmp_path):
+    mount = make_mount(tmp_path)
+    index = MountIndex(str(mount))
+    index.refresh()
+    assert index.last_relisted == 1 + 2 * len(SHOWS)  # Raíz + cada carpeta y su Subs
+
+    index.refresh()
+    assert index.last_relisted == 1  # Sin cambios: solo la raíz
+
+    (mount / "Andor.S01.1080p" / "Andor.S01E02.1080p.mkv").write_bytes(b"")
+    bump_mtime(mount / "Andor.S01.1080p")
+    index.refresh()
+    assert index.last_relisted == 2
+    assert index.lookup("Andor.S01E02.1080p.mkv") == str(mount / "Andor.S01.1080p" / "Andor.S01E02.1080p.mkv")
+
+
+def test_lookup_tracks_added_and_removed_files(tmp_path):
+    mount = make_mount(tmp_path, folders=2)
+    index = MountIndex(str(mount))
+    index.refresh()
+    assert index.lookup("EN.SRT") is not None
+    assert sorted(index.lookup_all("en.srt")) == sorted(str(mount / f"{show}.S01.1080p" / "Subs" / "en.srt") for show in SHOWS[:2])
+
+    (mount / "Severance.S01.1080p" / "Subs" / "en.srt").unlink()
+    bump_mtime(mount / "Severance.S01.1080p" / "Subs")
+    (mount / "Extra.2021.mkv").write_bytes(b"")
+    changes = []
+    index.add_listener(changes.append)
+    index.refresh()
+    assert index.lookup_all("en.srt") == [str(mount / "Ted.Lasso.S01.1080p" / "Subs" / "en.srt")]
+    assert index.lookup("extra.2021.mkv") == str(mount / "Extra.2021.mkv")
+    assert changes[-1]["top_level_added"] == ["Extra.2021.mkv"]
+
+    # Carpeta borrada: sus archivos salen del índice
+    for f in (mount / "Ted.Lasso.S01.1080p" / "Subs").iterdir():
+        f.unlink()
+    (mount / "Ted.Lasso.S01.1080p" / "Subs").rmdir()
+    (mount / "Ted.Lasso.S01.1080p" / "Ted.Lasso.S01E01.1080p.mkv").unlink()
+    (mount / "Ted.Lasso.S01.1080p").rmdir()
+    bump_mtime(mount)
+    index.refresh()
+    assert index.lookup("Ted.Lasso.S01E01.1080p.mkv") is None and index.lookup_all("en.srt") == []
+    assert index.list_dir(str(mount / "Ted.Lasso.S01.1080p")) is None
+
+
+def test_invalidate_forces_relist_without_mtime_change(tmp_path):
+    mount = make_mount(tmp_path, folders=2)
+    index = MountIndex(str(mount))
+    index.refresh()
+    folder = mount / "Severance.S01.1080p"
+    st = os.stat(folder)
+    # Archivo nuevo que el mtime no delata (como un listado viejo de la caché de rclone)
+    (folder / "Severance.S01E02.1080p.mkv").write_bytes(b"")
+    os.utime(folder, ns=(st.st_atime_ns, st.st_mtime_ns))
+    index.refresh()
+    assert index.lookup("Severance.S01E02.1080p.mkv") is None
+
+    index.invalidate([str(folder) + "/"])
+    index.refresh()
+    assert index.last_relisted == 2
+    assert index.lookup("Severance.S01E02.1080p.mkv")
+
+
+def test_snapshot_round_trip_and_incremental_restart(tmp_path):
+    mount = make_mount(tmp_path)
+    snapshot = str(tmp_path / "mount_index.json.gz")
+    index = MountIndex(str(mount))
+    index.refresh()
+    assert index.save_snapshot(snapshot)
+    assert not index.save_snapshot(snapshot)  # Sin cambios no se reescribe
+
+    restarted = MountIndex(str(mount))
+    assert restarted.load_snapshot(snapshot)
+    assert restarted.is_ready()
+    assert restarted.lookup("shogun.s01e01.1080p.mkv") == str(mount / "Shogun.S01.1080p" / "Shogun.S01E01.1080p.mkv")
+    assert restarted.list_dir(str(mount / "Ted.Lasso.S01.1080p")) == {"files": ["Ted.Lasso.S01E01.1080p.mkv"], "subdirs": ["Subs"]}
+    assert restarted.stats()["files"] == index.stats()["files"]
+    wait_warm(restarted)
+    assert restarted.match(title="Andor", season=1, episode=1, top_k=1)[0][1] == "Andor.S01E01.1080p.mkv"
+
+    # Solo se re-listan la raíz (siempre) y la carpeta que cambió mientras estaba apagado
+    (mount / "Silo.S01.1080p" / "Silo.S01E02.1080p.mkv").write_bytes(b"")
+    restarted.refresh()
+    assert restarted.last_relisted == 2
+    assert restarted.lookup("Silo.S01E02.1080p.mkv")
+
+
+def test_old_full_scan_in_snapshot_does_not_force_a_full_relist(tmp_path):
+    mount = make_mount(tmp_path, folders=2)
+    snapshot = str(tmp_path / "mount_index.json.gz")
+    index = MountIndex(str(mount), full_rescan_interval=600)
+    index.refresh()
+    index.last_full_scan -= 700  # El último pase completo fue hace más de full_rescan_interval
+    index.save_snapshot(snapshot)
+
+    restarted = MountIndex(str(mount), full_rescan_interval=600)
+    assert restarted.load_snapshot(snapshot)
+    restarted.refresh()
+    assert restarted.last_relisted == 1  # Solo la raíz, que se lista siempre
+
+
+def test_snapshot_rejected_when_unusable(tmp_path):
+    mount = make_mount(tmp_path, folders=1)
+    snapshot = str(tmp_path / "snap.json.gz")
+    index = MountIndex(str(mount))
+    index.refresh()
+    index.save_snapshot(snapshot)
+
+    assert not MountIndex(str(tmp_path / "otro")).load_snapshot(snapshot)
+    with gzip.open(snapshot, "wt") as f:
+        f.write("{roto")
+    assert not MountIndex(str(mount)).load_snapshot(snapshot)
+    assert not MountIndex(str(mount)).load_snapshot(str(tmp_path / "no-existe.json.gz"))
+
+
+def test_changes_during_matcher_warmup_are_replayed(tmp_path):
+    mount = make_mount(tmp_path, folders=2)
+    index = MountIndex(str(mount))
+    index.refresh()
+    entries = [(name, os.path.join(d, name)) for d in (str(mount), str(mount / "Ted.Lasso.S01.1080p"))
+               for name in index.list_dir(d)["files"]]
+
+    # Simula un escaneo que borra un archivo mientras el matcher se está armando
+    index._matcher_log = []
+    (mount / "Movie.2020.1080p.mkv").unlink()
+    index.refresh()
+    index._warm_matcher(entries)
+    assert index.match(expected_filename="Movie.2020.1080p.mkv", title="Movie", year="2020") == []
+    assert index.match(title="Ted Lasso", season=1, episode=1, top_k=1)
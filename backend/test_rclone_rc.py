@@ -0,0 +1,79 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from rclone_rc import RcloneRC, RcloneRCError, RefreshCoalescer
+
+
+class FakeRC(BaseHTTPRequestHandler):
+    """Servidor RC falso: registra cada comando y cuenta conexiones TCP."""
+    protocol_version = "HTTP/1.1"
+    calls = []
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        FakeRC.connections += 1
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        params = json.loads(self.rfile.read(length) or b"{}")
+        FakeRC.calls.append((self.path.lstrip("/"), params))
+        status, body = (200, {"result": {}}) if self.path != "/fail" else (500, {"error": "boom"})
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_fake_rc():
+    FakeRC.calls, FakeRC.connections = [], 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeRC)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_refresh_reuses_connection():
+    server, url = start_fake_rc()
+    try:
+        client = RcloneRC(url)
+        for _ in range(5):
+            client.refresh(["Show.S01", ""])
+        assert FakeRC.connections == 1
+        assert FakeRC.calls[0] == ("vfs/refresh", {"dir": "", "dir2": "Show.S01"})
+    finally:
+        server.shutdown()
+
+
+def test_coalescer_merges_requests_per_interval():
+    server, url = start_fake_rc()
+    try:
+        coalescer = RefreshCoalescer(RcloneRC(url), min_interval=60)
+        for name in ["A", "B", "A", ""]:
+            coalescer.request([name])
+        assert coalescer.flush() == ["", "A", "B"]
+        coalescer.request(["C"])
+        assert coalescer.flush() is None  # Dentro del intervalo: queda pendiente
+        assert coalescer.flush(force=True) == ["C"]
+        assert [c[0] for c in FakeRC.calls] == ["vfs/refresh", "vfs/refresh"]
+    finally:
+        server.shutdown()
+
+
+def test_errors_raise_rc_error():
+    server, url = start_fake_rc()
+    try:
+        client = RcloneRC(url)
+        try:
+            client.call("fail")
+            assert False, "debió fallar"
+        except RcloneRCError as e:
+            assert "boom" in str(e)
+    finally:
+        server.shutdown()
+    assert not RcloneRC("http://127.0.0.1:1", timeout=0.5).alive()
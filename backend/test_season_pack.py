@@ -0,0 +1,52 @@
+import os
+
+from mount_index import MountIndex
+from symlinks import create_season_symlinks
+from watcher import SeasonPackJob
+
+
+def make_mount(tmp_path):
+    mount = tmp_path / "torbox"
+    pack = mount / "Ted.Lasso.S02.1080p.ATVP.WEB-DL"
+    (pack / "Extras").mkdir(parents=True)
+    for ep in range(1, 13):
+        (pack / f"Ted.Lasso.S02E{ep:02d}.1080p.mkv").write_bytes(b"")
+    (pack / "Ted.Lasso.S02E01.sample.mkv").write_bytes(b"")
+    (pack / "Ted.Lasso.S02.nfo").write_bytes(b"")
+    (pack / "Extras" / "Ted.Lasso.S02E99.Behind.mkv").write_bytes(b"")
+    other = mount / "Ted.Lasso.S01.1080p"
+    other.mkdir()
+    (other / "Ted.Lasso.S01E01.mkv").write_bytes(b"")
+    index = MountIndex(str(mount))
+    index.refresh()
+    return index, str(pack)
+
+
+def test_resolves_pack_by_folder_name(tmp_path):
+    index, pack = make_mount(tmp_path)
+    job = SeasonPackJob("j", "Ted.Lasso.S02.1080p.mkv", title="Ted Lasso", year="2020", season=2, mount_path=index.mount_path)
+    assert job.resolve(index) == pack
+    assert sorted(job.episodes) == list(range(1, 13))
+    assert job.episodes[1] == os.path.join(pack, "Ted.Lasso.S02E01.1080p.mkv")
+
+    missing = SeasonPackJob("k", "x.mkv", title="Ted Lasso", year="2020", season=3, mount_path=index.mount_path)
+    assert missing.resolve(index) is None
+
+
+def test_resolves_pack_from_expected_episode_file(tmp_path):
+    index, pack = make_mount(tmp_path)
+    job = SeasonPackJob("j", "Ted.Lasso.S02E05.1080p.mkv", title="Otro Título", season=2, mount_path=index.mount_path)
+    assert job.resolve(index) == pack
+
+
+def test_create_season_symlinks_batch(tmp_path):
+    index, pack = make_mount(tmp_path)
+    job = SeasonPackJob("j", "", title="Ted Lasso", year="2020", season=2, mount_path=index.mount_path)
+    job.resolve(index)
+    library = tmp_path / "Media"
+    created = create_season_symlinks(job.episodes, "Ted Lasso", "2020", 97546, 2, str(library), use_original=False)
+    season_dir = library / "Shows" / "Ted Lasso (2020) {tmdb-97546}" / "Season 02"
+    assert len(created) == 12
+    assert os.readlink(season_dir / "S02E03.mkv") == job.episodes[3]
+    # Re-enlazar reemplaza los symlinks existentes
+    assert len(create_season_symlinks(job.episodes, "Ted Lasso", "2020", 97546, 2, str(library), use_original=False)) == 12
@@ -0,0 +1,42 @@
+import threading
+
+from startup import Readiness
+
+
+def test_report_requires_only_required_checks():
+    readiness = Readiness()
+    calls = []
+    readiness.register("rc", lambda: calls.append(1) or (True, "ok"), ttl=60)
+    readiness.set("jobs", False, "cargando")
+    readiness.set("extra", False, "pendiente", required=False)
+    assert not readiness.report()["ready"]
+
+    readiness.set("jobs", True, "3 trabajos")
+    report = readiness.report()
+    assert report["ready"] and report["checks"]["extra"]["required"] is False
+    assert len(calls) == 1  # El resultado del check se cachea durante el ttl
+
+
+def test_failing_check_and_stage_do_not_break_the_rest():
+    readiness = Readiness()
+    readiness.register("roto", lambda: 1 / 0)
+    assert readiness.check("roto")["detail"].startswith("error")
+
+    ran = []
+    readiness.run_stages([("mala", lambda: 1 / 0), ("buena", lambda: ran.append("buena"))]).join(5)
+    assert ran == ["buena"]
+    assert readiness.stages["mala"]["status"] == "error" and readiness.stages["buena"]["status"] == "done"
+
+
+def test_wait_until_fires_once_when_checks_pass():
+    readiness = Readiness()
+    state = {"mount": False}
+    readiness.register("mount", lambda: (state["mount"], ""), ttl=0)
+    fired = []
+    done = threading.Event()
+    thread = readiness.wait_until(["mount"], lambda: fired.append(1) or done.set(), interval=0.01, max_interval=0.02)
+    assert not done.wait(0.1)
+    state["mount"] = True
+    assert done.wait(5)
+    thread.join(5)
+    assert fired == [1]
@@ -0,0 +1,83 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from http_async import get_async_http
+from streams import AIOStreamsClient, facets, filter_streams, paginate, parse_stream, rank_streams
+
+RAW_STREAMS = [
+    {"name": "[TB] AIOStreams 720p", "description": "Ted.Lasso.S01E02.720p.WEB.x264-ENG",
+     "url": "http://aio/play/Ted.Lasso.S01E02.720p.WEB.x264.mkv", "behaviorHints": {"videoSize": 1_000}},
+    {"name": "[TB⚡] AIOStreams 2160p", "description": "🇲🇽 Latino",
+     "url": "http://aio/play/x", "behaviorHints": {"filename": "Ted.Lasso.S01E02.2160p.HEVC.Latino.mkv", "videoSize": 9_000}},
+    {"name": "[TB] AIOStreams 1080p", "description": "Ted.S01E02.1080p.x265",
+     "url": "http://aio/play/Ted.S01E02.1080p.x265.mkv", "behaviorHints": {"videoSize": 4_000}},
+]
+
+
+def test_parse_stream_extracts_metadata():
+    s = parse_stream(RAW_STREAMS[1])
+    assert s["filename"] == "Ted.Lasso.S01E02.2160p.HEVC.Latino.mkv"
+    assert (s["resolution"], s["codec"], s["cached"]) == ("2160p", "HEVC", True)
+    assert "latino" in s["languages"]
+    assert (s["season"], s["episode"]) == (1, 2)
+
+    s = parse_stream(RAW_STREAMS[0])
+    assert s["filename"] == "Ted.Lasso.S01E02.720p.WEB.x264.mkv"
+    assert (s["resolution"], s["codec"], s["cached"]) == ("720p", "AVC", False)
+
+
+def test_rank_filter_and_paginate():
+    parsed = [parse_stream(s) for s in RAW_STREAMS]
+    ranked = rank_streams(parsed, title="Ted Lasso", season=1, episode=2)
+    # En caché primero; "Ted.S01E02" no es "Ted Lasso" y queda al final con puntaje 0
+    assert [s["resolution"] for s in ranked] == ["2160p", "720p", "1080p"]
+    assert ranked[-1]["score"] == 0
+
+    assert len(filter_streams(ranked, min_score=35)) == 2
+    assert [s["resolution"] for s in filter_streams(ranked, language="latino")] == ["2160p"]
+    assert len(filter_streams(ranked, cached_only=True)) == 1
+    assert facets(ranked)["codecs"] == {"HEVC": 2, "AVC": 1}
+
+    page = paginate(ranked, page=2, page_size=2)
+    assert len(page["items"]) == 1 and page["total"] == 3 and not page["has_more"]
+
+
+class FakeAIOStreams(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    hits = 0
+
+    def do_GET(self):
+        FakeAIOStreams.hits += 1
+        data = json.dumps({"streams": RAW_STREAMS}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_client_caches_by_addon_id():
+    FakeAIOStreams.hits = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeAIOStreams)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}/stream/series"
+
+    async def scenario():
+        client = AIOStreamsClient()
+        streams, from_cache = await client.aget_streams(f"{base}/tt123:1:2.json")
+        assert len(streams) == 3 and not from_cache
+        streams, from_cache = await client.aget_streams(f"{base}/tt123:1:2.json")
+        assert from_cache
+        await client.aget_streams(f"{base}/tt123:1:3.json")
+        assert FakeAIOStreams.hits == 2
+        await get_async_http().aclose()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        server.shutdown()
@@ -0,0 +1,108 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import httpx
+import pytest
+
+from http_async import get_async_http
+from tmdb_client import TMDBClient, cache_group
+
+
+class FakeTMDB(BaseHTTPRequestHandler):
+    """TMDB falso: cuenta peticiones por path y responde lento para forzar concurrencia."""
+    protocol_version = "HTTP/1.1"
+    hits = {}
+    delay = 0.0
+    version = 1
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        FakeTMDB.hits[path] = FakeTMDB.hits.get(path, 0) + 1
+        time.sleep(FakeTMDB.delay)
+        if path.endswith("/404"):
+            status, body = 404, {"status_message": "not found"}
+        else:
+            status, body = 200, {"path": path, "version": FakeTMDB.version}
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_fake_tmdb():
+    FakeTMDB.hits, FakeTMDB.delay, FakeTMDB.version = {}, 0.0, 1
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeTMDB)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/3"
+
+
+def run_with_fake_tmdb(scenario):
+    """Corre `scenario(url)` en un event loop nuevo contra un TMDB falso."""
+    server, url = start_fake_tmdb()
+
+    async def main():
+        try:
+            await scenario(url)
+        finally:
+            await get_async_http().aclose()
+
+    try:
+        asyncio.run(main())
+    finally:
+        server.shutdown()
+
+
+def test_cache_hits_and_groups():
+    async def scenario(url):
+        client = TMDBClient(url)
+        for _ in range(3):
+            assert (await client.aget("/genre/movie/list", "key", language="es-MX"))["path"] == "/3/genre/movie/list"
+        assert FakeTMDB.hits["/3/genre/movie/list"] == 1
+        assert client.stats()["hits"] == 2
+
+    run_with_fake_tmdb(scenario)
+    assert cache_group("/tv/1/season/2") == "season"
+    assert cache_group("/movie/1/external_ids") == "external_ids"
+
+
+def test_concurrent_requests_are_coalesced():
+    async def scenario(url):
+        FakeTMDB.delay = 0.3
+        client = TMDBClient(url)
+        await asyncio.gather(*[client.aget("/trending/all/day", "key") for _ in range(10)])
+        assert FakeTMDB.hits["/3/trending/all/day"] == 1
+        assert client.stats()["coalesced"] == 9
+
+    run_with_fake_tmdb(scenario)
+
+
+def test_stale_while_revalidate():
+    async def scenario(url):
+        client = TMDBClient(url, ttls={"search": (0.05, 60)})
+        assert (await client.aget("/search/multi", "key", query="x"))["version"] == 1
+        FakeTMDB.version = 2
+        await asyncio.sleep(0.1)
+        # Entrada vencida: se sirve la vieja y se revalida en background
+        assert (await client.aget("/search/multi", "key", query="x"))["version"] == 1
+        await asyncio.sleep(0.3)
+        assert (await client.aget("/search/multi", "key", query="x"))["version"] == 2
+
+    run_with_fake_tmdb(scenario)
+
+
+def test_http_errors_propagate():
+    async def scenario(url):
+        with pytest.raises(httpx.HTTPStatusError) as e:
+            await TMDBClient(url).aget("/tv/1/season/404", "key")
+        assert e.value.response.status_code == 404
+
+    run_with_fake_tmdb(scenario)
@@ -0,0 +1,99 @@
+import os
+import threading
+
+import pytest
+
+import watcher
+from fake_torbox_api import FakeTorBoxAPI
+from torbox_api import TorBoxAPI, TorBoxAPIError, TorBoxDiscovery
+from watcher import FixedPollingPolicy, SeasonPackJob, WatchJob, WatcherScheduler
+
+
+@pytest.fixture
+def fake_api():
+    api = FakeTorBoxAPI("key").start()
+    yield api
+    api.stop()
+
+
+def test_discovery_maps_files_to_mount_paths(fake_api):
+    fake_api.add_torrent("Show.S01.1080p", ["Show.S01E01.mkv", "Subs/Show.S01E01.srt"])
+    pending = fake_api.add_torrent("Movie.2020.2160p", ["Movie.2020.2160p.mkv"], ready=False)
+    discovery = TorBoxDiscovery(TorBoxAPI("key", fake_api.base_url), mount_path="/mnt/torbox", interval=60)
+
+    assert discovery.poll()
+    assert discovery.lookup("show.s01e01.mkv") == "/mnt/torbox/Show.S01.1080p/Show.S01E01.mkv"
+    assert discovery.lookup("Movie.2020.2160p.mkv") is None  # Todavía descargando
+    assert discovery.top_level_dirs() == ["Show.S01.1080p"]
+    assert discovery.list_dir("/mnt/torbox/Show.S01.1080p") == {"files": ["Show.S01E01.mkv"], "subdirs": ["Subs"]}
+
+    # Dentro del intervalo no se vuelve a pedir la lista
+    fake_api.set_ready(pending)
+    assert discovery.poll() and fake_api.requests == 1
+    assert discovery.poll(force=True)
+    assert discovery.lookup("Movie.2020.2160p.mkv") == "/mnt/torbox/Movie.2020.2160p/Movie.2020.2160p.mkv"
+
+    fake_api.torrents.clear()
+    discovery.poll(force=True)
+    assert discovery.lookup("show.s01e01.mkv") is None and discovery.top_level_dirs() == []
+
+
+def test_bad_token_raises(fake_api):
+    with pytest.raises(TorBoxAPIError):
+        TorBoxAPI("wrong", fake_api.base_url).my_torrents()
+
+
+def test_scheduler_finds_through_api_once_the_mount_shows_it(tmp_path, fake_api, monkeypatch):
+    refreshes = []
+    monkeypatch.setattr(watcher, "cleanup_rclone_cache", lambda **kw: refreshes.append(kw.get("dirs")) or None)
+    monkeypatch.setattr(watcher, "SURFACE_RETRY_SECONDS", 0.05)
+    mount = tmp_path  # Vacío: los archivos aparecen en el mount recién después de la API
+    scheduler = WatcherScheduler()
+    scheduler.discovery = TorBoxDiscovery(TorBoxAPI("key", fake_api.base_url), mount_path=str(mount), interval=0.05)
+
+    results, done = {}, threading.Event()
+
+    def collect(job_id):
+        def callback(found, season=None):
+            results[job_id] = found
+            if len(results) == 2:
+                done.set()
+        return callback
+
+    policy = lambda: FixedPollingPolicy(10)  # Solo los reintentos rápidos de _surface pueden encontrarlo a tiempo
+    movie = scheduler.submit(WatchJob("movie", "Movie.2020.1080p.mkv", mount_path=str(mount), initial_delay=0,
+                                      callback=collect("movie"), policy=policy()))
+    pack = scheduler.submit(SeasonPackJob("pack", "", title="Ted Lasso", year="2020", season=2, mount_path=str(mount),
+                                          initial_delay=0, callback=collect("pack"), policy=policy()))
+    fake_api.add_torrent("Movie.2020.1080p", ["Movie.2020.1080p.mkv"])
+    fake_api.add_torrent("Ted.Lasso.S02.1080p", [f"Ted.Lasso.S02E{ep:02d}.mkv" for ep in range(1, 4)])
+    scheduler.discovery.poll(force=True)
+
+    # La API los ve pero el mount no: sin symlinks rotos, los jobs siguen en cola
+    assert not done.wait(0.3)
+    assert scheduler.get("movie") is movie and scheduler.get("pack") is pack
+    assert movie.surface_attempts >= 1 and pack.surface_attempts >= 1
+
+    (mount / "Movie.2020.1080p").mkdir()
+    (mount / "Movie.2020.1080p" / "Movie.2020.1080p.mkv").write_bytes(b"")
+    (mount / "Ted.Lasso.S02.1080p").mkdir()
+    for ep in range(1, 4):
+        (mount / "Ted.Lasso.S02.1080p" / f"Ted.Lasso.S02E{ep:02d}.mkv").write_bytes(b"")
+    assert done.wait(5)
+
+    assert results["movie"] == str(mount / "Movie.2020.1080p" / "Movie.2020.1080p.mkv")
+    assert sorted(results["pack"]) == [1, 2, 3]
+    # Sin vfs/refresh por ciclo: solo el refresco puntual de cada carpeta encontrada
+    assert set(map(tuple, refreshes)) == {("", "Movie.2020.1080p"), ("", "Ted.Lasso.S02.1080p")}
+
+
+def test_scheduler_falls_back_to_mount_when_api_fails(tmp_path, monkeypatch):
+    refreshes = []
+    monkeypatch.setattr(watcher, "cleanup_rclone_cache", lambda **kw: refreshes.append(kw.get("dirs")) or None)
+    (tmp_path / "Movie.2020.mkv").write_bytes(b"")
+    scheduler = WatcherScheduler()
+    scheduler.discovery = TorBoxDiscovery(TorBoxAPI("key", "http://127.0.0.1:9/v1/api", timeout=0.5), mount_path=str(tmp_path))
+    job = scheduler.submit(WatchJob("m", "Movie.2020.mkv", mount_path=str(tmp_path), initial_delay=0))
+    assert job.done.wait(5)
+    assert job.found_path == str(tmp_path / "Movie.2020.mkv")
+    assert refreshes and scheduler.discovery.errors == 1
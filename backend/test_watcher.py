@@ -0,0 +1,143 @@
+import threading
+
+import pytest
+
+import watcher
+from mount_index import get_mount_index
+from watcher import AdaptivePollingPolicy, FixedPollingPolicy, PollingPolicy, SeasonPackJob, WatchJob, WatcherScheduler
+
+
+def make_job(job_id, filename, mount, results, **kwargs):
+    done = threading.Event()
+
+    def callback(path, season=None):
+        results.append((job_id, path))
+        done.set()
+
+    job = WatchJob(job_id, filename, mount_path=mount, callback=callback, initial_delay=0,
+                   policy=FixedPollingPolicy(0.05), **kwargs)
+    job.finished = done
+    return job
+
+
+def test_duplicate_requests_share_one_flight(tmp_path, monkeypatch):
+    refreshes = []
+    monkeypatch.setattr(watcher, "cleanup_rclone_cache", lambda **kw: refreshes.append(kw) or None)
+    mount = str(tmp_path)
+    scheduler = WatcherScheduler()
+    results = []
+
+    a = scheduler.submit(make_job("1_1_1", "Show.S01E01.1080p.mkv", mount, results, season=1, episode=1, tmdb_id=1))
+    b = scheduler.submit(make_job("2_1_1", "show.s01e01.1080p.mkv", mount, results))           # mismo filename
+    c = scheduler.submit(make_job("3_1_1", "Show.S01E01.720p.mkv", mount, results, season=1, episode=1, tmdb_id="1"))  # otro stream
+    other = scheduler.submit(make_job("9_1_1", "Other.S01E01.mkv", mount, results))
+
+    assert b.leader is a and c.leader is a and other.leader is None
+    assert a.aliases == ["show.s01e01.1080p.mkv", "Show.S01E01.720p.mkv"]
+    assert scheduler.stats()["flights"] == 2 and scheduler.coalesced == 2
+
+    # Aparece la release del seguidor `c`: los tres reciben la misma ruta
+    (tmp_path / "Show.S01E01.720p.mkv").write_bytes(b"")
+    for job in (a, b, c):
+        assert job.finished.wait(5)
+    expected = str(tmp_path / "Show.S01E01.720p.mkv")
+    assert sorted(results) == [("1_1_1", expected), ("2_1_1", expected), ("3_1_1", expected)]
+    # Los seguidores nunca se sondean: un solo refresco por ciclo para todo el grupo
+    assert scheduler.get("2_1_1") is None and scheduler.get("9_1_1") is other
+    scheduler.cancel("9_1_1")
+    assert b.cycles == c.cycles == 0 and scheduler.cycles <= len(refreshes) <= scheduler.cycles + 1
+
+
+def test_reclick_reuses_job_and_cancel_promotes_follower(tmp_path, monkeypatch):
+    monkeypatch.setattr(watcher, "cleanup_rclone_cache", lambda **kw: None)
+    mount = str(tmp_path)
+    scheduler = WatcherScheduler()
+    results = []
+
+    first = scheduler.submit(make_job("1_0_0", "Movie.2020.mkv", mount, results, tmdb_id=1))
+    again = make_job("1_0_0", "Movie.2020.mkv", mount, results, tmdb_id=1)
+    assert scheduler.submit(again) is first and first.callback is again.callback
+    assert scheduler.queue_depth() == 1
+
+    follower = scheduler.submit(make_job("x", "Movie.2020.mkv", mount, results))
+    assert scheduler.cancel("1_0_0")
+    assert follower.leader is None and scheduler.stats()["flights"] == 1
+
+    (tmp_path / "Movie.2020.mkv").write_bytes(b"")
+    assert follower.finished.wait(5)
+    assert results == [("x", str(tmp_path / "Movie.2020.mkv"))]
+
+
+def test_season_packs_do_not_join_episode_flights(tmp_path):
+    scheduler = WatcherScheduler()
+    episode = WatchJob("e", "Show.S02E01.mkv", season=2, episode=1, mount_path=str(tmp_path), tmdb_id=5, initial_delay=60)
+    pack = SeasonPackJob("p", "Show.S02E01.mkv", season=2, mount_path=str(tmp_path), tmdb_id=5, initial_delay=60)
+    scheduler.submit(episode)
+    assert scheduler.submit(pack).leader is None
+    assert scheduler.stats()["flights"] == 2
+    scheduler.cancel("e")
+    scheduler.cancel("p")
+
+
+def test_polling_policy_is_abstract():
+    with pytest.raises(TypeError):
+        PollingPolicy()
+
+
+def test_adaptive_policy_backs_off_to_the_cap_and_resets():
+    policy = AdaptivePollingPolicy(fast_interval=1.0, fast_window=180.0, max_interval=60.0, factor=2.0, jitter=0.0)
+    assert [policy.next_delay(t) for t in (0, 60, 179)] == [1.0, 1.0, 1.0]
+    assert policy.phase == "fast"
+
+    # Pasada la ventana rápida: backoff exponencial hasta max_interval
+    delays = [policy.next_delay(180 + i) for i in range(8)]
+    assert delays[:6] == [2.0, 4.0, 8.0, 16.0, 32.0, 60.0]
+    assert delays[6:] == [60.0, 60.0]
+    assert policy.phase == "backoff"
+
+    # reset(): vuelve a la fase rápida por otra ventana completa desde ese momento
+    policy.reset(elapsed=400)
+    assert policy.phase == "fast" and policy.resets == 1
+    assert policy.next_delay(500) == 1.0
+    assert policy.next_delay(580) == 2.0
+    assert set(policy.phases) == {"fast", "backoff"}
+    assert policy.phases["fast"]["cycles"] == 0  # record_cycle lo llama el scheduler
+
+
+def test_adaptive_policy_jitter_stays_within_bounds():
+    policy = AdaptivePollingPolicy(fast_interval=1.0, fast_window=0.0, max_interval=10.0, factor=1.5, jitter=0.2)
+    for i in range(50):
+        delay = policy.next_delay(i)
+        assert 1.0 <= delay <= 10.0
+    assert policy.delay == 10.0
+
+
+def test_cancelled_subscribers_release_their_filenames(tmp_path, monkeypatch):
+    monkeypatch.setattr(watcher, "cleanup_rclone_cache", lambda **kw: None)
+    mount = str(tmp_path)
+    scheduler = WatcherScheduler()
+    results = []
+
+    leader = scheduler.submit(make_job("a", "Show.S01E01.1080p.mkv", mount, results, season=1, episode=1, tmdb_id=7))
+    follower = scheduler.submit(make_job("b", "Show.S01E01.720p.mkv", mount, results, season=1, episode=1, tmdb_id=7))
+    assert follower.leader is leader and leader.aliases == ["Show.S01E01.720p.mkv"]
+
+    # Cancelar al seguidor saca su release del grupo
+    scheduler.cancel("b")
+    assert leader.aliases == [] and not leader.followers
+    assert ("WatchJob", "file", "show.s01e01.720p.mkv") not in scheduler._flights
+    (tmp_path / "Show.S01E01.720p.mkv").write_bytes(b"")
+    assert leader.resolve(get_mount_index(mount)) is None
+
+    # Al cancelar al líder, el heredero no hereda la release del cancelado
+    c = scheduler.submit(make_job("c", "Show.S01E01.2160p.mkv", mount, results, season=1, episode=1, tmdb_id=7))
+    d = scheduler.submit(make_job("d", "Show.S01E01.2160p.mkv", mount, results, season=1, episode=1, tmdb_id=7))
+    assert c.leader is leader and d.leader is leader
+    scheduler.cancel("a")
+    assert c.leader is None and d.leader is c and c.aliases == []
+    assert ("WatchJob", "file", "show.s01e01.1080p.mkv") not in scheduler._flights
+    assert scheduler._flights[("WatchJob", "media", "7", 1, 1)] is c
+
+    (tmp_path / "Show.S01E01.2160p.mkv").write_bytes(b"")
+    assert d.finished.wait(5)
+    assert sorted(results) == [("c", str(tmp_path / "Show.S01E01.2160p.mkv")), ("d", str(tmp_path / "Show.S01E01.2160p.mkv"))]
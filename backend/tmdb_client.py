@@ -0,0 +1,117 @@
+import asyncio
+import threading
+from typing import Optional
+
+from cache_utils import FRESH, STALE, AsyncSingleFlight, TTLCache
+from http_async import UPSTREAM_SECONDS, get_async_http
+
+TMDB_API_BASE = "https://api.themoviedb.org/3"
+
+# (TTL fresco, ventana stale) en segundos por tipo de endpoint
+CACHE_TTLS = {
+    "genre": (24 * 3600, 7 * 24 * 3600),
+    "trending": (3600, 6 * 3600),
+    "discover": (1800, 3 * 3600),
+    "search": (600, 1800),
+    "details": (6 * 3600, 24 * 3600),
+    "season": (6 * 3600, 24 * 3600),
+    "person": (24 * 3600, 7 * 24 * 3600),
+    "external_ids": (7 * 24 * 3600, 30 * 24 * 3600),
+    "default": (600, 1800),
+}
+
+
+def cache_group(path: str) -> str:
+    """Clasifica un path de TMDB para elegir su TTL (ej: /genre/movie/list -> genre)."""
+    parts = path.strip("/").split("/")
+    if parts[0] in ("genre", "trending", "discover", "search", "person"):
+        return parts[0]
+    if parts[-1] == "external_ids":
+        return "external_ids"
+    if parts[0] == "tv" and "season" in parts:
+        return "season"
+    if parts[0] in ("movie", "tv"):
+        return "details"
+    return "default"
+
+
+class TMDBClient:
+    """
+    Cliente TMDB compartido: conexiones keep-alive (cliente async del proceso),
+    caché LRU+TTL por endpoint, coalescencia de peticiones idénticas concurrentes
+    y stale-while-revalidate.
+    """
+
+    def __init__(self, base_url: str = TMDB_API_BASE, max_entries: int = 2048, timeout: float = 10.0, ttls: Optional[dict] = None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.ttls = dict(CACHE_TTLS, **(ttls or {}))
+        self.cache = TTLCache(max_entries)
+        self._aflight = AsyncSingleFlight()
+        self._background: set = set()
+        self.upstream_requests = 0
+        self.revalidations = 0
+
+    async def aget(self, path: str, api_key: str, **params) -> dict:
+        """
+        GET a TMDB con caché, sin bloquear el event loop. Lanza
+        httpx.HTTPStatusError ante respuestas de error.
+        """
+        group = cache_group(path)
+        key = self._key(path, params)
+        value, state = self.cache.get(key)
+        if state == FRESH:
+            return value
+        if state == STALE:
+            if not self._aflight.in_flight(key):
+                self.revalidations += 1
+                task = asyncio.ensure_future(self._arevalidate(key, path, api_key, params, group))
+                self._background.add(task)
+                task.add_done_callback(self._background.discard)
+            return value
+        return await self._aflight.do(key, lambda: self._afetch_and_store(key, path, api_key, params, group))
+
+    @staticmethod
+    def _key(path: str, params: dict):
+        return path, tuple(sorted((k, str(v)) for k, v in params.items() if v is not None))
+
+    def invalidate(self, path_prefix: str = "") -> int:
+        return self.cache.invalidate_where(lambda k: k[0].startswith(path_prefix))
+
+    def stats(self) -> dict:
+        stats = self.cache.stats()
+        stats.update({
+            "upstream_requests": self.upstream_requests,
+            "coalesced": self._aflight.coalesced,
+            "revalidations": self.revalidations,
+        })
+        return stats
+
+    async def _afetch_and_store(self, key, path: str, api_key: str, params: dict, group: str) -> dict:
+        self.upstream_requests += 1
+        query = {k: v for k, v in params.items() if v is not None}
+        query["api_key"] = api_key
+        with UPSTREAM_SECONDS.time(upstream="tmdb"):
+            data = await get_async_http().get_json(f"{self.base_url}/{path.lstrip('/')}", params=query, timeout=self.timeout)
+        ttl, stale_ttl = self.ttls.get(group, self.ttls["default"])
+        self.cache.set(key, data, ttl, stale_ttl)
+        return data
+
+    async def _arevalidate(self, key, path: str, api_key: str, params: dict, group: str):
+        try:
+            await self._aflight.do(key, lambda: self._afetch_and_store(key, path, api_key, params, group))
+        except Exception as e:
+            print(f"[TMDB] ⚠️ Error revalidando {path}: {e}")
+
+
+_client: Optional[TMDBClient] = None
+_lock = threading.Lock()
+
+
+def get_tmdb_client() -> TMDBClient:
+    """Cliente TMDB compartido del proceso."""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = TMDBClient()
+        return _client
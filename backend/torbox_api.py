@@ -0,0 +1,192 @@
+"""
+Descubrimiento de descargas nuevas con la API REST de TorBox.
+
+El mount solo muestra un torrent recién terminado cuando rclone vuelve a listar
+el directorio (dir-cache-time / vfs/refresh) y WebDAV lo reporta. La lista de
+torrents de la API (`/torrents/mylist`) ya trae cada torrent listo con sus
+archivos, así que el watcher puede encontrarlo en cuanto TorBox lo termina.
+
+TorBoxDiscovery mapea esos archivos a rutas del mount y expone la misma
+interfaz de consulta que MountIndex (lookup, match, top_level_dirs, list_dir),
+así WatchJob/SeasonPackJob.resolve funcionan sin cambios sobre cualquiera de
+los dos. Es opcional: solo se activa con `torbox.api_key` en config.yaml.
+"""
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+import requests
+
+from matcher import TokenIndex
+
+API_URL = "https://api.torbox.app/v1/api"
+
+
+class TorBoxAPIError(Exception):
+    """Error de la API de TorBox (HTTP, token inválido o respuesta con success=false)."""
+
+
+class TorBoxAPI:
+    """Cliente mínimo de la API de TorBox: solo lo que usa el descubrimiento."""
+
+    def __init__(self, api_key: str, base_url: str = API_URL, timeout: float = 10.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"Bearer {api_key}"
+        self.requests = 0
+
+    def my_torrents(self) -> List[dict]:
+        """Torrents de la cuenta con sus archivos (sin la caché de la API)."""
+        self.requests += 1
+        try:
+            r = self.session.get(f"{self.base_url}/torrents/mylist", params={"bypass_cache": "true"}, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise TorBoxAPIError(f"API de TorBox no responde: {e}") from e
+        try:
+            body = r.json()
+        except ValueError:
+            body = {}
+        if r.status_code != 200 or not body.get("success"):
+            detail = body.get("detail") or body.get("error") or r.text
+            raise TorBoxAPIError(f"torrents/mylist falló ({r.status_code}): {str(detail)[:200]}")
+        return body.get("data") or []
+
+
+class TorBoxDiscovery:
+    """
+    Vista de los archivos listos en TorBox según la API, con rutas del mount.
+
+    poll() hace como mucho una petición por `interval` y todos los jobs del ciclo
+    del scheduler comparten la respuesta. Los archivos de la API vienen como
+    "Nombre del torrent/ruta/archivo.mkv"; los torrents de un solo archivo sin
+    carpeta se ubican bajo el nombre del torrent si difiere del archivo.
+    """
+
+    def __init__(self, api: TorBoxAPI, mount_path: str = "/mnt/torbox", interval: float = 5.0):
+        self.api = api
+        self.mount_path = mount_path
+        self.interval = interval
+        self._lock = threading.RLock()
+        self._poll_lock = threading.Lock()
+        self._entries: Set[str] = set()
+        self._files: Dict[str, List[str]] = {}                  # nombre en minúsculas -> [rutas]
+        self._dirs: Dict[str, Tuple[Set[str], Set[str]]] = {}  # carpeta -> (archivos, subdirs)
+        self.matcher = TokenIndex()
+        self.version = 0
+        self.last_poll = 0.0
+        self.last_ok = False
+        self.last_error = ""
+        self.polls = 0
+        self.errors = 0
+
+    # --- Consultas (misma interfaz que MountIndex) ---
+
+    def lookup(self, filename: str) -> Optional[str]:
+        with self._lock:
+            paths = self._files.get(filename.lower())
+            return paths[0] if paths else None
+
+    def match(self, top_k: int = 5, min_score: int = 35, name_filter=None, **query) -> list:
+        return self.matcher.match(top_k=top_k, min_score=min_score, name_filter=name_filter, **query)
+
+    def top_level_dirs(self) -> List[str]:
+        with self._lock:
+            entry = self._dirs.get(self.mount_path)
+            return sorted(entry[1]) if entry else []
+
+    def list_dir(self, path: str) -> Optional[Dict[str, List[str]]]:
+        with self._lock:
+            entry = self._dirs.get(path)
+            if not entry:
+                return None
+            return {"files": sorted(entry[0]), "subdirs": sorted(entry[1])}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "mount_path": self.mount_path,
+                "interval": self.interval,
+                "files": len(self._entries),
+                "version": self.version,
+                "polls": self.polls,
+                "api_requests": self.api.requests,
+                "errors": self.errors,
+                "last_ok": self.last_ok,
+                "last_poll": self.last_poll,
+                "last_error": self.last_error,
+            }
+
+    # --- Sondeo ---
+
+    def poll(self, force: bool = False) -> bool:
+        """
+        Actualiza la vista si pasó `interval` desde la última consulta.
+        Devuelve True si la vista refleja una respuesta válida de la API.
+        """
+        with self._poll_lock:
+            if not force and time.time() - self.last_poll < self.interval:
+                return self.last_ok
+            self.last_poll = time.time()
+            try:
+                torrents = self.api.my_torrents()
+            except TorBoxAPIError as e:
+                self.errors += 1
+                self.last_ok = False
+                self.last_error = str(e)
+                print(f"[TorBoxAPI] ⚠️ {e}")
+                return False
+            self.polls += 1
+            self.last_ok = True
+            self._apply(self.map_torrents(torrents))
+            return True
+
+    def map_torrents(self, torrents: List[dict]) -> Set[str]:
+        """Rutas del mount de los archivos de los torrents ya disponibles."""
+        paths = set()
+        for torrent in torrents:
+            if not (torrent.get("download_present") or torrent.get("download_finished")):
+                continue
+            torrent_name = (torrent.get("name") or "").strip("/")
+            for f in torrent.get("files") or []:
+                rel = (f.get("name") or f.get("short_name") or "").strip("/")
+                if not rel:
+                    continue
+                if "/" not in rel and torrent_name and rel != torrent_name:
+                    rel = f"{torrent_name}/{rel}"
+                paths.add(os.path.join(self.mount_path, *rel.split("/")))
+        return paths
+
+    def _apply(self, paths: Set[str]):
+        with self._lock:
+            added, removed = paths - self._entries, self._entries - paths
+            if not added and not removed:
+                return
+            for full in removed:
+                name = os.path.basename(full)
+                same = self._files.get(name.lower())
+                if same and full in same:
+                    same.remove(full)
+                    if not same:
+                        del self._files[name.lower()]
+                self.matcher.remove(name, full)
+            for full in added:
+                name = os.path.basename(full)
+                self._files.setdefault(name.lower(), []).append(full)
+                self.matcher.add(name, full)
+            self._entries = paths
+            self._dirs = self._build_dirs(paths)
+            self.version += 1
+        if added:
+            print(f"[TorBoxAPI] {len(added)} archivos nuevos en TorBox")
+
+    def _build_dirs(self, paths: Set[str]) -> Dict[str, Tuple[Set[str], Set[str]]]:
+        dirs: Dict[str, Tuple[Set[str], Set[str]]] = {self.mount_path: (set(), set())}
+        for full in paths:
+            parent = os.path.dirname(full)
+            dirs.setdefault(parent, (set(), set()))[0].add(os.path.basename(full))
+            while parent != self.mount_path and parent.startswith(self.mount_path):
+                dirs.setdefault(os.path.dirname(parent), (set(), set()))[1].add(os.path.basename(parent))
+                parent = os.path.dirname(parent)
+        return dirs
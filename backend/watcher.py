@@ -2,8 +2,31 @@ import re
 import os
 import time
 import threading
-import subprocess
+import heapq
+import random
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
+from mount_index import get_mount_index
+from media_utils import clean_words, extract_se_info, get_key_words, get_match_score
+from rclone_rc import RcloneRCError, get_refresh_coalescer
+from metrics import WAIT_BUCKETS, counter, histogram
+
+MAX_REFRESH_DIRS_PER_JOB = 5  # Carpetas candidatas (además de la raíz) a refrescar por job
+FUZZY_MIN_SCORE = 70  # Puntaje mínimo para aceptar un archivo renombrado (is_valid_match usa 35; aquí se enlaza sin confirmación)
+VIDEO_EXTS = ('.mkv', '.mp4', '.avi', '.ts', '.webm')
+PACK_SKIP_DIRS = {"extras", "featurettes", "sample", "samples", "specials"}
+SURFACE_RETRY_SECONDS = 2.0  # Reintento tras un hallazgo de la API que el mount todavía no muestra
+SURFACE_FAST_WINDOW = 60.0   # Pasada esta ventana sin que aparezca vuelve a mandar la política de sondeo
+
+CYCLE_SECONDS = histogram("watcher_cycle_seconds", "Duración de cada ciclo del scheduler del watcher")
+JOB_EVENTS = counter("watcher_jobs", "Trabajos del watcher por evento (submitted, coalesced, found, timeout, cancelled)", ["event"])
+TIME_TO_FOUND = histogram("watcher_time_to_found_seconds", "Tiempo desde que se encola un trabajo hasta encontrar el archivo", buckets=WAIT_BUCKETS)
+FIND_FILE_SECONDS = histogram("find_file_seconds", "Duración de find_file_path por resultado", ["result"])
+WAIT_SECONDS = histogram("watch_for_file_wait_seconds", "Espera bloqueante de watch_for_file por resultado", ["result"], buckets=WAIT_BUCKETS)
+RCLONE_REFRESHES = counter("rclone_refresh", "Llamadas a cleanup_rclone_cache por resultado (refreshed, skipped, error)", ["result"])
+FOUND_SOURCE = counter("watcher_found", "Archivos encontrados por origen (api de TorBox o índice del mount)", ["source"])
+RCLONE_REFRESH_DIRS = counter("rclone_refresh_dirs", "Directorios enviados a vfs/refresh")
 
 def log(msg: str, on_log: Optional[callable] = None):
     """Escribe en stdout y en la cola de logs del frontend si está disponible."""
@@ -18,9 +41,15 @@ def find_file_path(expected_filename: str, title: str = "", mount_path: str = "/
     """
     Busca un archivo en TorBox usando BÚSQUEDA EXACTA ÚNICA del filename.
     No intenta alternativas, solo busca exactamente lo que pide.
+    La búsqueda se resuelve en el índice compartido del mount (O(1)); el índice
+    se refresca como mucho una vez por segundo sin importar cuántos jobs lo consulten.
     """
-    expected_lower = expected_filename.lower()
-    
+    started = time.perf_counter()
+    found = _find_file_path(expected_filename, title, mount_path, on_log)
+    FIND_FILE_SECONDS.observe(time.perf_counter() - started, result="found" if found else "missing")
+    return found
+
+def _find_file_path(expected_filename: str, title: str, mount_path: str, on_log: Optional[callable]) -> Optional[str]:
     # Verificar que el mount point existe
     if not os.path.exists(mount_path):
         log(f"[Watcher] 🔴 CRÍTICO: Mount point NO EXISTE: {mount_path}", on_log)
@@ -28,44 +57,37 @@ def find_file_path(expected_filename: str, title: str = "", mount_path: str = "/
         log(f"[Watcher] 🔴 O intenta montar: rclone mount remote:/ /mnt/torbox --daemon", on_log)
         return None
 
+    index = get_mount_index(mount_path)
     try:
-        # Listar raíz para diagnóstico
-        try:
-            root_items = os.listdir(mount_path)
-            log(f"[Watcher] ✓ Mount activo. Items en {mount_path}: {len(root_items)} elementos", on_log)
-            
-            # Si hay pocos items, listarlos todos
-            if len(root_items) < 20:
-                log(f"[Watcher] Contenido: {root_items}", on_log)
-            else:
-                # Mostrar primeros 10
-                log(f"[Watcher] Primeros 10 items: {root_items[:10]}", on_log)
-                
-                # Buscar items que contengan palabras clave del título
-                title_words = title.lower().split()[:2] if title else []
-                if title_words:
-                    matching = [item for item in root_items if any(word in item.lower() for word in title_words)]
-                    if matching:
-                        log(f"[Watcher] Items que coinciden con '{title}': {matching[:5]}", on_log)
-        except PermissionError:
-            log(f"[Watcher] 🔴 CRÍTICO: Permiso denegado en {mount_path}. Verifica permisos", on_log)
+        if not index.ensure_fresh(max_age=1.0) and not index.is_ready():
+            log(f"[Watcher] 🔴 Error listando {mount_path}. Verifica permisos y el estado de rclone", on_log)
             return None
-        except Exception as e:
-            log(f"[Watcher] 🔴 Error listando {mount_path}: {e}", on_log)
-            return None
-        
-        # Búsqueda recursiva exhaustiva por el filename exacto
-        found_count = 0
-        for root, dirs, files in os.walk(mount_path):
-            for f in files:
-                found_count += 1
-                if f.lower() == expected_lower:
-                    full_path = os.path.join(root, f)
-                    log(f"[Watcher] ✓ ENCONTRADO: {full_path}", on_log)
-                    return full_path
-        
-        log(f"[Watcher] Se exploraron {found_count} archivos, ninguno coincide con '{expected_filename}'", on_log)
-            
+
+        # Diagnóstico de la raíz a partir del índice
+        root_items = index.top_level()
+        log(f"[Watcher] ✓ Mount activo. Items en {mount_path}: {len(root_items)} elementos", on_log)
+
+        # Si hay pocos items, listarlos todos
+        if len(root_items) < 20:
+            log(f"[Watcher] Contenido: {root_items}", on_log)
+        else:
+            # Mostrar primeros 10
+            log(f"[Watcher] Primeros 10 items: {root_items[:10]}", on_log)
+
+            # Buscar items que contengan palabras clave del título
+            title_words = title.lower().split()[:2] if title else []
+            if title_words:
+                matching = [item for item in root_items if any(word in item.lower() for word in title_words)]
+                if matching:
+                    log(f"[Watcher] Items que coinciden con '{title}': {matching[:5]}", on_log)
+
+        full_path = index.lookup(expected_filename)
+        if full_path:
+            log(f"[Watcher] ✓ ENCONTRADO: {full_path}", on_log)
+            return full_path
+
+        log(f"[Watcher] Índice con {index.file_count()} archivos, ninguno coincide con '{expected_filename}'", on_log)
+
     except Exception as e:
         log(f"[Watcher] 🔴 ERROR fatal en búsqueda: {e}", on_log)
 
@@ -76,6 +98,751 @@ def check_file_exists(expected_filename: str, title: str = "", mount_path: str =
     """Versión sincrónica de una sola pasada para checking rápido."""
     return find_file_path(expected_filename, title, mount_path, season=season, episode=episode)
 
+class PollingPolicy(ABC):
+    """
+    Decide cuánto esperar entre chequeos de un job.
+    Lleva la cuenta de ciclos y tiempo por fase para poder ajustar la política con datos reales.
+    """
+
+    def __init__(self):
+        self.phase = "fast"
+        self.phase_started = time.time()
+        self.phases: dict = {}   # fase -> {"cycles": n, "seconds": t}
+        self.resets = 0
+
+    @abstractmethod
+    def next_delay(self, elapsed: float) -> float:
+        """Segundos hasta el próximo chequeo, dado el tiempo transcurrido desde que empezó el job."""
+
+    def reset(self, elapsed: float = None):
+        """Vuelve a la fase rápida (ej: aparecieron entradas nuevas en el mount)."""
+        self.resets += 1
+
+    def record_cycle(self):
+        self.phases.setdefault(self.phase, {"cycles": 0, "seconds": 0.0})["cycles"] += 1
+
+    def _enter_phase(self, phase: str) -> bool:
+        """Cambia de fase acumulando el tiempo de la anterior. Devuelve True si cambió."""
+        if phase == self.phase:
+            return False
+        self._close_phase()
+        self.phase = phase
+        return True
+
+    def _close_phase(self):
+        now = time.time()
+        stats = self.phases.setdefault(self.phase, {"cycles": 0, "seconds": 0.0})
+        stats["seconds"] += now - self.phase_started
+        self.phase_started = now
+
+    def summary(self) -> str:
+        self._close_phase()
+        parts = [f"{name}={st['cycles']} ciclos/{int(st['seconds'])}s" for name, st in self.phases.items()]
+        return ", ".join(parts) + f", resets={self.resets}"
+
+
+class FixedPollingPolicy(PollingPolicy):
+    """Intervalo constante (comportamiento histórico: 1s)."""
+
+    def __init__(self, interval: float = 1.0):
+        super().__init__()
+        self.interval = interval
+
+    def next_delay(self, elapsed: float) -> float:
+        return self.interval
+
+
+class AdaptivePollingPolicy(PollingPolicy):
+    """
+    Chequeo rápido durante los primeros minutos tras disparar el stream (cuando
+    TorBox suele tener el archivo), luego backoff exponencial con jitter hasta `max_interval`.
+    """
+
+    def __init__(self, fast_interval: float = 1.0, fast_window: float = 180.0,
+                 max_interval: float = 60.0, factor: float = 1.5, jitter: float = 0.2):
+        super().__init__()
+        self.fast_interval = fast_interval
+        self.fast_window = fast_window
+        self.max_interval = max_interval
+        self.factor = factor
+        self.jitter = jitter
+        self.anchor = 0.0          # elapsed del último reset
+        self.delay = fast_interval
+
+    def next_delay(self, elapsed: float) -> float:
+        if elapsed - self.anchor < self.fast_window:
+            self._enter_phase("fast")
+            self.delay = self.fast_interval
+            return self.fast_interval
+        self._enter_phase("backoff")
+        self.delay = min(self.max_interval, self.delay * self.factor)
+        spread = self.delay * self.jitter
+        return min(self.max_interval, max(self.fast_interval, self.delay + random.uniform(-spread, spread)))
+
+    def reset(self, elapsed: float = None):
+        super().reset(elapsed)
+        if elapsed is not None:
+            self.anchor = elapsed
+        self.delay = self.fast_interval
+        self._enter_phase("fast")
+
+
+class WatchJob:
+    """
+    Búsqueda pendiente de un archivo en el mount.
+    Cancelación y pausa son eventos: el scheduler los consulta sin hacer polling del estado del job.
+    """
+
+    def __init__(
+        self,
+        job_id: str,
+        expected_filename: str,
+        title: str = "",
+        year: str = "",
+        season: int = None,
+        episode: int = None,
+        original_title: str = "",
+        mount_path: str = "/mnt/torbox",
+        timeout_seconds: int = 7200,
+        callback: Optional[callable] = None,
+        on_status: Optional[callable] = None,
+        on_log: Optional[callable] = None,
+        initial_delay: float = 3.0,
+        policy: Optional[PollingPolicy] = None,
+        tmdb_id: str = "",
+    ):
+        self.job_id = job_id
+        self.expected_filename = expected_filename
+        self.title = title
+        self.year = year
+        self.season = season
+        self.episode = episode
+        self.original_title = original_title
+        self.mount_path = mount_path
+        self.timeout_seconds = timeout_seconds
+        self.callback = callback
+        self.on_status = on_status
+        self.on_log = on_log
+        self.policy = policy or AdaptivePollingPolicy()
+        self.tmdb_id = str(tmdb_id or "")
+
+        # Single-flight: el líder hace el sondeo y reparte el resultado a sus seguidores
+        self.aliases: list = []   # Otros filenames esperados de los seguidores (otra release del mismo episodio)
+        self.leader: Optional["WatchJob"] = None
+        self.followers: dict = {}  # job_id -> WatchJob
+
+        self.submitted_at = time.time()
+        self.next_check = self.submitted_at + initial_delay  # Dar tiempo a que rclone monte el archivo
+        self.cycles = 0
+        self.surface_attempts = 0  # Hallazgos de la API que el mount aún no mostraba
+        self.surfacing_since = 0.0
+        self.found_path: Optional[str] = None
+        self.cancel_event = threading.Event()
+        self.resume_event = threading.Event()
+        self.resume_event.set()  # set = no pausado
+        self.done = threading.Event()
+
+    @property
+    def paused(self) -> bool:
+        return not self.resume_event.is_set()
+
+    def expired(self, now: float) -> bool:
+        return now - self.submitted_at >= self.timeout_seconds
+
+    @property
+    def filenames(self) -> list:
+        return [self.expected_filename] + self.aliases
+
+    def flight_keys(self) -> list:
+        """
+        Claves con las que se agrupan pedidos duplicados: el filename normalizado y,
+        si se conoce, (tmdb_id, temporada, episodio). Incluyen el tipo de job para
+        no mezclar packs de temporada con episodios sueltos.
+        """
+        kind = type(self).__name__
+        keys = []
+        name = os.path.basename(self.expected_filename or "").strip().lower()
+        if name:
+            keys.append((kind, "file", name))
+        if self.tmdb_id:
+            keys.append((kind, "media", self.tmdb_id, self.season, self.episode))
+        return keys
+
+    def share_result(self, leader: "WatchJob"):
+        """Copia el resultado del líder de su grupo (seguidores de un single-flight)."""
+        self.found_path = leader.found_path
+
+    def visible_in_mount(self, found_path: str) -> bool:
+        """El resultado ya existe en el mount (requisito para crear el symlink)."""
+        return os.path.exists(found_path)
+
+    def resolve(self, index) -> Optional[str]:
+        """
+        Busca el archivo esperado en el índice del mount: primero match exacto de
+        filename y, si no aparece, el mejor candidato difuso (TorBox a veces renombra la release).
+        """
+        for name in self.filenames:
+            path = index.lookup(name)
+            if path:
+                return path
+        if not (self.title or self.original_title):
+            return None
+        matches = index.match(
+            expected_filename=self.expected_filename, title=self.title, original_title=self.original_title,
+            year=self.year, season=self.season, episode=self.episode,
+            top_k=1, min_score=FUZZY_MIN_SCORE, name_filter=lambda n: n.lower().endswith(VIDEO_EXTS),
+        )
+        if matches:
+            score, name, path = matches[0]
+            log(f"[Watcher] ≈ Coincidencia difusa ({score}): '{name}' para '{self.expected_filename}'", self.on_log)
+            return path
+        return None
+
+    def refresh_dirs(self, index) -> list:
+        """
+        Directorios del remoto donde puede aparecer la release: la raíz (donde TorBox
+        crea los torrents nuevos) y las carpetas de primer nivel que comparten
+        palabras clave con el título o el filename esperado.
+        """
+        keywords = set(get_key_words(clean_words(self.title)))
+        keywords.update(get_key_words(clean_words(self.original_title)))
+        for name in self.filenames:
+            keywords.update(get_key_words(clean_words(os.path.splitext(name)[0])))
+        dirs = [""]
+        if keywords:
+            for name in index.top_level_dirs():
+                if keywords.intersection(clean_words(name)):
+                    dirs.append(name)
+                    if len(dirs) > MAX_REFRESH_DIRS_PER_JOB:
+                        break
+        return dirs
+
+    def status(self, status: str, msg: str):
+        if self.on_status:
+            self.on_status(status, msg)
+
+    def notify_found(self):
+        msg = f"¡Encontrado! {os.path.basename(self.found_path)}"
+        log(f"[Watcher] {msg}", self.on_log)
+        self.status("Found", msg)
+        if self.callback:
+            self.callback(self.found_path, self.season)
+
+    def info(self, now: float) -> dict:
+        return {
+            "job_id": self.job_id,
+            "expected_filename": self.expected_filename,
+            "wait_seconds": round(now - self.submitted_at, 1),
+            "next_check_in": round(max(0.0, self.next_check - now), 1),
+            "cycles": self.cycles,
+            "phase": self.policy.phase,
+            "paused": self.paused,
+            "coalesced_into": self.leader.job_id if self.leader else None,
+            "followers": len(self.followers),
+        }
+
+
+class SeasonPackJob(WatchJob):
+    """
+    Búsqueda de una temporada completa.
+
+    Resuelve la carpeta del pack (por el filename esperado o por puntaje del nombre
+    de la carpeta) y mapea todos sus episodios a SxxEyy a partir del listado que ya
+    tiene el índice del mount, así el costo crece con las carpetas y no con los episodios.
+    El callback recibe ({episodio: ruta}, temporada).
+    """
+
+    MAX_PACK_CANDIDATES = 3
+
+    def __init__(self, job_id: str, expected_filename: str, title: str = "", year: str = "", season: int = None, **kwargs):
+        super().__init__(job_id, expected_filename, title, year, season, None, **kwargs)
+        self.episodes: dict = {}
+
+    def resolve(self, index) -> Optional[str]:
+        candidates = []
+        exact = next(filter(None, (index.lookup(name) for name in self.filenames if name)), None)
+        if exact and os.path.dirname(exact) != index.mount_path:
+            candidates.append(os.path.dirname(exact))
+        else:
+            scored = []
+            for name in index.top_level_dirs():
+                score = get_match_score(name, "", self.title, self.year, self.season, None, self.original_title)
+                if score >= 35:
+                    scored.append((score, name))
+            scored.sort(reverse=True)
+            candidates = [os.path.join(index.mount_path, name) for _, name in scored[:self.MAX_PACK_CANDIDATES]]
+
+        best_dir, best = None, {}
+        for pack_dir in candidates:
+            episodes = self.map_episodes(index, pack_dir)
+            if len(episodes) > len(best):
+                best_dir, best = pack_dir, episodes
+        if not best:
+            return None
+        self.episodes = best
+        log(f"[Watcher] 📦 Pack de temporada: {os.path.basename(best_dir)} ({len(best)} episodios)", self.on_log)
+        return best_dir
+
+    def map_episodes(self, index, pack_dir: str) -> dict:
+        """{episodio: ruta} de los videos de la temporada buscada dentro del pack (incluye subcarpetas)."""
+        episodes = {}
+        stack = [pack_dir]
+        while stack:
+            current = stack.pop()
+            listing = index.list_dir(current)
+            if not listing:
+                continue
+            stack.extend(os.path.join(current, d) for d in listing["subdirs"] if d.lower() not in PACK_SKIP_DIRS)
+            for name in sorted(listing["files"]):
+                lower = name.lower()
+                if not lower.endswith(VIDEO_EXTS) or "sample" in lower:
+                    continue
+                n_s, n_e = extract_se_info(name)
+                if n_s == self.season and n_e is not None and n_e not in episodes:
+                    episodes[n_e] = os.path.join(current, name)
+        return episodes
+
+    def share_result(self, leader: "WatchJob"):
+        super().share_result(leader)
+        self.episodes = dict(leader.episodes)
+
+    def visible_in_mount(self, found_path: str) -> bool:
+        return os.path.isdir(found_path) and all(os.path.exists(path) for path in self.episodes.values())
+
+    def notify_found(self):
+        msg = f"¡Temporada encontrada! {len(self.episodes)} episodios en {os.path.basename(self.found_path)}"
+        log(f"[Watcher] {msg}", self.on_log)
+        self.status("Found", msg)
+        if self.callback:
+            self.callback(self.episodes, self.season)
+
+    def info(self, now: float) -> dict:
+        info = super().info(now)
+        info["season_pack"] = True
+        return info
+
+
+class WatcherScheduler:
+    """
+    Scheduler único para todas las búsquedas pendientes.
+
+    Mantiene los jobs en un heap ordenado por la hora del próximo chequeo. Cada
+    ciclo refresca una sola vez el índice del mount y la caché de rclone y
+    resuelve todos los jobs vencidos en una pasada, así N jobs cuestan un
+    escaneo por ciclo en lugar de N hilos escaneando por su cuenta.
+
+    Los pedidos duplicados (misma release o mismo tmdb/temporada/episodio) se
+    agrupan en un single-flight: solo el líder entra al heap y se sondea; los
+    seguidores esperan su resultado y reciben sus propios callbacks.
+
+    Con `discovery` (TorBoxDiscovery) cada ciclo consulta primero la API de
+    TorBox (una petición por intervalo para todos los jobs); mientras la API
+    responda no hace falta vfs/refresh ni re-escanear el mount en cada ciclo.
+    """
+
+    def __init__(self, retry_seconds: float = 1.0, callback_workers: int = 4):
+        self.retry_seconds = retry_seconds  # Reintento tras un error del ciclo; el resto lo decide la política de cada job
+        self._heap: list = []
+        self._jobs: dict = {}     # job_id -> WatchJob (pendientes o pausados, líderes y seguidores)
+        self._flights: dict = {}  # clave de flight_keys() -> job líder
+        self._seq = 0             # Desempate estable en el heap
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._callbacks = ThreadPoolExecutor(max_workers=callback_workers, thread_name_prefix="watcher-cb")
+        self.cycles = 0
+        self.last_cycle_duration = 0.0
+        self._watched_indexes = set()
+        self.coalesced = 0
+        self.discovery = None  # TorBoxDiscovery opcional (API de TorBox)
+
+    # --- API pública ---
+
+    def submit(self, job: WatchJob) -> WatchJob:
+        """
+        Encola el job. Si ya hay una búsqueda en curso para la misma release se une
+        a ella como seguidor (sin escaneos ni vfs/refresh extra). Si es el mismo
+        job_id (re-click) se actualizan los callbacks del job existente y se devuelve ese.
+        """
+        JOB_EVENTS.inc(event="submitted")
+        with self._cond:
+            leader = self._flight_leader(job)
+            previous = self._jobs.get(job.job_id)
+            if previous is not None and (leader is None or (previous.leader or previous) is not leader):
+                # Mismo job_id para otra release: el nuevo reemplaza al anterior
+                self._detach(previous)
+                previous.done.set()
+                previous = None
+            if leader is None:
+                self._jobs[job.job_id] = job
+                self._register_flight(job, job)
+                self._push(job)
+                self._watch_index(job.mount_path)
+                self._ensure_thread()
+                self._cond.notify()
+                return job
+
+            self._adopt(leader, job)
+            if previous is leader:
+                leader.callback, leader.on_status, leader.on_log = job.callback, job.on_status, job.on_log
+                job = leader
+            else:
+                if previous is not None:
+                    previous.cancel_event.set()
+                    previous.done.set()
+                job.leader = leader
+                leader.followers[job.job_id] = job
+                self._jobs[job.job_id] = job
+            self.coalesced += 1
+            self._cond.notify()
+        JOB_EVENTS.inc(event="coalesced")
+        log(f"[Watcher] ⇄ Se une a la búsqueda en curso de '{leader.expected_filename}' ({leader.job_id})", job.on_log)
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return False
+            self._detach(job)
+            self._cond.notify()
+        JOB_EVENTS.inc(event="cancelled")
+        log(f"[Watcher] Búsqueda cancelada.", job.on_log)
+        job.done.set()
+        return True
+
+    def pause(self, job_id: str) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return False
+        job.resume_event.clear()
+        return True
+
+    def resume(self, job_id: str) -> bool:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return False
+            if job.paused:
+                job.resume_event.set()
+                # Los seguidores no están en el heap: se reactiva el sondeo del líder
+                target = job.leader or job
+                target.next_check = time.time()
+                self._push(target)
+                self._cond.notify()
+        return True
+
+    def get(self, job_id: str) -> Optional[WatchJob]:
+        return self._jobs.get(job_id)
+
+    def queue_depth(self) -> int:
+        return len(self._jobs)
+
+    def stats(self) -> dict:
+        now = time.time()
+        jobs = [job.info(now) for job in list(self._jobs.values())]
+        return {
+            "queue_depth": len(jobs),
+            "flights": sum(1 for j in jobs if not j["coalesced_into"]),
+            "coalesced": self.coalesced,
+            "paused": sum(1 for j in jobs if j["paused"]),
+            "cycles": self.cycles,
+            "last_cycle_duration": round(self.last_cycle_duration, 4),
+            "max_wait_seconds": max((j["wait_seconds"] for j in jobs), default=0),
+            "jobs": sorted(jobs, key=lambda j: -j["wait_seconds"]),
+            "discovery": self.discovery.stats() if self.discovery else None,
+        }
+
+    # --- Single-flight ---
+
+    def _flight_leader(self, job: WatchJob) -> Optional[WatchJob]:
+        for key in job.flight_keys():
+            leader = self._flights.get(key)
+            if leader is not None and type(leader) is type(job) and leader.mount_path == job.mount_path:
+                return leader
+        return None
+
+    def _register_flight(self, leader: WatchJob, job: WatchJob):
+        for key in job.flight_keys():
+            self._flights.setdefault(key, leader)
+
+    def _drop_flight(self, leader: WatchJob):
+        for key in [k for k, v in self._flights.items() if v is leader]:
+            del self._flights[key]
+
+    def _adopt(self, leader: WatchJob, job: WatchJob):
+        """Suma el pedido `job` a la búsqueda de `leader` (lock tomado)."""
+        if job.expected_filename and job.expected_filename not in leader.filenames:
+            leader.aliases.append(job.expected_filename)
+        self._register_flight(leader, job)
+        # El grupo espera al menos lo que hubiera esperado el pedido nuevo
+        leader.timeout_seconds = max(leader.timeout_seconds, job.submitted_at + job.timeout_seconds - leader.submitted_at)
+        # Un pedido nuevo suele significar un torrent recién agregado: volver a la fase rápida
+        leader.policy.reset(job.submitted_at - leader.submitted_at)
+        if job.next_check < leader.next_check:
+            leader.next_check = job.next_check
+            self._push(leader)
+
+    def _detach(self, job: WatchJob):
+        """Saca un job del scheduler (lock tomado). Si es líder con seguidores, uno hereda el sondeo."""
+        if self._jobs.get(job.job_id) is job:
+            del self._jobs[job.job_id]
+        job.cancel_event.set()
+        job.resume_event.set()
+        if job.leader is not None:
+            leader = job.leader
+            leader.followers.pop(job.job_id, None)
+            job.leader = None
+            self._rebuild_flight(leader)
+            return
+        self._drop_flight(job)
+        if not job.followers:
+            return
+        followers = list(job.followers.values())
+        heir = followers[0]
+        heir.leader = None
+        heir.followers = {f.job_id: f for f in followers[1:]}
+        for follower in heir.followers.values():
+            follower.leader = heir
+        heir.policy, heir.cycles = job.policy, job.cycles
+        heir.surface_attempts, heir.surfacing_since = job.surface_attempts, job.surfacing_since
+        heir.timeout_seconds = max(heir.timeout_seconds, job.submitted_at + job.timeout_seconds - heir.submitted_at)
+        heir.next_check = job.next_check
+        # La release del líder cancelado ya no la espera nadie (salvo que otro pidiera el mismo nombre)
+        self._rebuild_flight(heir)
+        job.followers = {}
+        self._push(heir)
+
+    def _rebuild_flight(self, leader: WatchJob):
+        """Recalcula aliases y claves del grupo con los pedidos que siguen esperando (lock tomado)."""
+        leader.aliases = []
+        for follower in leader.followers.values():
+            if follower.expected_filename and follower.expected_filename not in leader.filenames:
+                leader.aliases.append(follower.expected_filename)
+        self._drop_flight(leader)
+        for subscriber in [leader] + list(leader.followers.values()):
+            self._register_flight(leader, subscriber)
+
+    def _flight_paused(self, job: WatchJob) -> bool:
+        """El grupo queda estacionado solo si el líder y todos sus seguidores están pausados."""
+        return job.paused and all(f.paused for f in job.followers.values())
+
+    # --- Bucle interno ---
+
+    def _watch_index(self, mount_path: str):
+        if mount_path in self._watched_indexes:
+            return
+        self._watched_indexes.add(mount_path)
+        get_mount_index(mount_path).add_listener(lambda change: self._on_mount_change(mount_path, change))
+
+    def _on_mount_change(self, mount_path: str, change: dict):
+        """Entradas nuevas en la raíz del mount: todos los jobs vuelven a la fase rápida."""
+        if not change.get("top_level_added"):
+            return
+        now = time.time()
+        with self._cond:
+            for job in self._jobs.values():
+                if job.leader is not None or job.mount_path != mount_path or self._flight_paused(job):
+                    continue
+                job.policy.reset(now - job.submitted_at)
+                log(f"[Watcher] Nuevas entradas en el mount ({len(change['top_level_added'])}), sondeo rápido reactivado", job.on_log)
+                if job.next_check > now:
+                    job.next_check = now
+                    self._push(job)
+            self._cond.notify()
+
+    def _push(self, job: WatchJob):
+        self._seq += 1
+        heapq.heappush(self._heap, (job.next_check, self._seq, job))
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _next_due(self) -> list:
+        """Bloquea hasta que haya jobs vencidos y los devuelve."""
+        with self._cond:
+            while True:
+                now = time.time()
+                # Descartar entradas obsoletas (cancelados, reemplazados o ya re-encolados)
+                while self._heap:
+                    next_check, _, job = self._heap[0]
+                    if self._jobs.get(job.job_id) is not job or job.cancel_event.is_set() or next_check != job.next_check:
+                        heapq.heappop(self._heap)
+                        continue
+                    break
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                wait = self._heap[0][0] - now
+                if wait > 0:
+                    self._cond.wait(timeout=wait)
+                    continue
+                due = []
+                while self._heap and self._heap[0][0] <= now:
+                    _, _, job = heapq.heappop(self._heap)
+                    if self._jobs.get(job.job_id) is job and not job.cancel_event.is_set():
+                        due.append(job)
+                if due:
+                    return due
+
+    def _run(self):
+        while True:
+            due = self._next_due()
+            try:
+                self._run_cycle(due)
+            except Exception as e:
+                print(f"[Watcher] ✗ Error en ciclo del scheduler: {e}", flush=True)
+                with self._cond:
+                    for job in due:
+                        if self._jobs.get(job.job_id) is job:
+                            job.next_check = time.time() + self.retry_seconds
+                            self._push(job)
+
+    def _run_cycle(self, due: list):
+        started = time.time()
+        active = []
+        for job in due:
+            if self._flight_paused(job):
+                continue  # Queda estacionado hasta resume()
+            if job.expired(started):
+                self._finish(job, None)
+                continue
+            active.append(job)
+        if not active:
+            return
+
+        indexes = {}
+        for job in active:
+            if job.mount_path not in indexes:
+                indexes[job.mount_path] = get_mount_index(job.mount_path)
+
+        discovery = self.discovery
+        api_ok = discovery is not None and discovery.poll()
+        if api_ok and all(job.mount_path == discovery.mount_path for job in active):
+            # La API ya informa los torrents listos: el mount se sigue indexando en background
+            self.cycles += 1
+        else:
+            # Refrescar ANTES de buscar para evitar cache stale: un solo vfs/refresh
+            # con los directorios candidatos de todos los jobs del ciclo
+            dirs = set()
+            for job in active:
+                dirs.update(job.refresh_dirs(indexes[job.mount_path]))
+            refreshed = cleanup_rclone_cache(dirs=sorted(dirs), aggressive=(self.cycles > 0 and self.cycles % 50 == 0))
+            self.cycles += 1
+
+            for mount_path, index in indexes.items():
+                if refreshed:
+                    index.invalidate(os.path.join(mount_path, d) if d else mount_path for d in refreshed)
+                index.refresh()
+
+        for job in active:
+            elapsed = int(started - job.submitted_at)
+            job.cycles += 1
+            log(f"[Watcher] Ciclo {elapsed}s: Buscando '{job.expected_filename}'...", job.on_log)
+            job.status("Searching", f"Buscando '{job.expected_filename}'... ({elapsed}s)")
+
+            job.policy.record_cycle()
+            found_path = None
+            surfacing = False
+            if api_ok and job.mount_path == discovery.mount_path:
+                found_path = job.resolve(discovery)
+                if found_path:
+                    self._surface(job, found_path, indexes[job.mount_path])
+                    if job.visible_in_mount(found_path):
+                        FOUND_SOURCE.inc(source="api")
+                    else:
+                        # RC caído o nombre distinto en el mount: sin el archivo el symlink quedaría roto
+                        job.surface_attempts += 1
+                        if not job.surfacing_since:
+                            job.surfacing_since = time.time()
+                        surfacing = time.time() - job.surfacing_since < SURFACE_FAST_WINDOW
+                        log(f"[Watcher] La API ya lo tiene pero el mount aún no muestra '{os.path.basename(found_path)}' (intento {job.surface_attempts})", job.on_log)
+                        found_path = None
+            if not found_path:
+                found_path = job.resolve(indexes[job.mount_path])
+                if found_path:
+                    FOUND_SOURCE.inc(source="mount")
+            if found_path:
+                self._finish(job, found_path)
+                continue
+            with self._cond:
+                if self._jobs.get(job.job_id) is job and not job.cancel_event.is_set():
+                    now = time.time()
+                    previous_phase = job.policy.phase
+                    delay = SURFACE_RETRY_SECONDS if surfacing else job.policy.next_delay(now - job.submitted_at)
+                    if job.policy.phase != previous_phase:
+                        log(f"[Watcher] Sondeo: fase '{previous_phase}' → '{job.policy.phase}' (próximo chequeo en {delay:.1f}s)", job.on_log)
+                    job.next_check = now + delay
+                    self._push(job)
+
+        self.last_cycle_duration = time.time() - started
+        CYCLE_SECONDS.observe(self.last_cycle_duration)
+
+    def _surface(self, job: WatchJob, found_path: str, index):
+        """
+        Un archivo visto por la API puede no estar todavía en el listado cacheado
+        del mount: refrescar su carpeta de primer nivel para que el symlink y Plex lo vean.
+        """
+        rel = os.path.relpath(found_path, job.mount_path).split(os.sep)
+        # Un archivo suelto en la raíz solo necesita la raíz; un pack es la carpeta misma
+        dirs = [""] if len(rel) == 1 and not isinstance(job, SeasonPackJob) else ["", rel[0]]
+        log(f"[Watcher] ⚡ Encontrado por la API de TorBox, refrescando '{rel[0]}' en el mount", job.on_log)
+        refreshed = cleanup_rclone_cache(dirs=dirs, force=True, on_log=job.on_log)
+        if refreshed:
+            index.invalidate(os.path.join(job.mount_path, d) if d else job.mount_path for d in refreshed)
+
+    def _finish(self, job: WatchJob, found_path: Optional[str]):
+        with self._cond:
+            if self._jobs.get(job.job_id) is not job:
+                return
+            del self._jobs[job.job_id]
+            self._drop_flight(job)
+            followers = list(job.followers.values())
+            for follower in followers:
+                if self._jobs.get(follower.job_id) is follower:
+                    del self._jobs[follower.job_id]
+            job.followers = {}
+        job.found_path = found_path
+        now = time.time()
+        log(f"[Watcher] Resumen de sondeo: {job.cycles} ciclos en {int(now - job.submitted_at)}s ({job.policy.summary()})", job.on_log)
+        for subscriber in [job] + followers:
+            if subscriber is not job:
+                subscriber.share_result(job)
+            if found_path:
+                JOB_EVENTS.inc(event="found")
+                TIME_TO_FOUND.observe(now - subscriber.submitted_at)
+            else:
+                JOB_EVENTS.inc(event="timeout")
+            subscriber.done.set()
+            self._callbacks.submit(_complete_job, subscriber)
+
+
+def _complete_job(job: WatchJob):
+    """Notifica el resultado de un job (se ejecuta fuera del hilo del scheduler)."""
+    try:
+        if job.found_path:
+            job.notify_found()
+        else:
+            log(f"[Watcher] No se encontró '{job.expected_filename}' (Timeout).", job.on_log)
+            job.status("Error", "No se encontró el archivo (Timeout)")
+    except Exception as e:
+        print(f"[Watcher] ✗ Error notificando resultado de {job.job_id}: {e}", flush=True)
+
+
+_scheduler: Optional[WatcherScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> WatcherScheduler:
+    """Devuelve el scheduler compartido del proceso."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = WatcherScheduler()
+        return _scheduler
+
+
 def watch_for_file(
     expected_filename: str,
     title: str = "",
@@ -85,95 +852,63 @@ def watch_for_file(
     mount_path: str = "/mnt/torbox",
     timeout_seconds: int = 7200,  # 2 horas por defecto (era 1 hora)
     on_status: Optional[callable] = None,
-    get_status: Optional[callable] = None,
     original_title: str = "",
-    on_log: Optional[callable] = None
+    on_log: Optional[callable] = None,
+    job_id: Optional[str] = None,
+    policy: Optional[PollingPolicy] = None,
+    tmdb_id: str = ""
 ) -> Optional[str]:
     """
-    Busca un archivo en TorBox por filename exacto.
-    Limpia caché de rclone cada ciclo, con limpieza AGRESIVA cada 5 minutos.
+    Busca un archivo en TorBox por filename exacto y bloquea hasta encontrarlo.
+    La búsqueda la hace el scheduler compartido; esta función solo espera el resultado.
     """
-    start_time = time.time()
     msg = f"Buscando archivo: '{expected_filename}'"
     log(f"[Watcher] {msg}", on_log)
     if on_status:
         on_status("Searching", msg)
 
-    # Esperar a que rclone monte el archivo
-    log(f"[Watcher] Aguardando montaje en rclone...", on_log)
-    time.sleep(3)
-    
-    # Limpiar caché inicial agresivamente
-    log(f"[Watcher] Limpiando caché de rclone...", on_log)
-    cleanup_rclone_cache(on_log)
-    
-    cycle_count = 0
-
-    while time.time() - start_time < timeout_seconds:
-        if get_status:
-            status = get_status()
-            if status == "Cancelled":
-                log(f"[Watcher] Búsqueda cancelada.", on_log)
-                return None
-            if status == "Paused":
-                time.sleep(5)
-                continue
-
-        elapsed = int(time.time() - start_time)
-        log(f"[Watcher] Ciclo {elapsed}s: Buscando '{expected_filename}'...", on_log)
-        if on_status:
-            on_status("Searching", f"Buscando '{expected_filename}'... ({elapsed}s)")
-
-        # Limpiar ANTES de buscar para evitar cache stale
-        if cycle_count > 0:  # Primera vez ya se limpió arriba
-            cleanup_rclone_cache(on_log, aggressive=(cycle_count % 50 == 0))
-
-        found_path = find_file_path(expected_filename, title, mount_path, on_log, season, episode)
-        if found_path:
-            return found_path
+    job = get_scheduler().submit(WatchJob(
+        job_id or expected_filename, expected_filename, title, year, season, episode,
+        original_title, mount_path, timeout_seconds, on_status=on_status, on_log=on_log, policy=policy, tmdb_id=tmdb_id
+    ))
+    started = time.time()
+    job.done.wait()
+    WAIT_SECONDS.observe(time.time() - started, result="found" if job.found_path else "not_found")
+    return job.found_path
 
-        cycle_count += 1
-        
-        # Esperar menos entre ciclos (reducido de 3s a 1s) para búsqueda más rápida
-        time.sleep(1)
-
-    return None
-
-def cleanup_rclone_cache(on_log: Optional[callable] = None, aggressive: bool = False):
+def cleanup_rclone_cache(on_log: Optional[callable] = None, aggressive: bool = False, dirs: Optional[list] = None, force: bool = False) -> Optional[list]:
     """
-    Limpia el caché de rclone de múltiples formas para asegurar descubrimiento rápido.
-    Si aggressive=True, hace limpiezas más profundas.
+    Pide a rclone (vía RC HTTP, sin lanzar procesos) que refresque solo los directorios
+    que pueden contener la release esperada. Los pedidos de todos los jobs se juntan
+    y se envían en una sola llamada vfs/refresh por intervalo; la caché del resto
+    del mount (que usa Plex) no se toca.
+    Si aggressive=True, el refresco es recursivo.
+    Devuelve los directorios refrescados (relativos al remoto) o None si no tocaba refrescar.
     """
+    coalescer = get_refresh_coalescer()
+    coalescer.request(dirs if dirs is not None else [""])
     try:
-        # 1. Forget: limpia metadata cacheada
-        result = subprocess.run(["rclone", "rc", "vfs/forget"], capture_output=True, timeout=5, text=True)
-        if result.returncode == 0:
-            log(f"[Watcher] ✓ vfs/forget ejecutado", on_log)
+        refreshed = coalescer.flush(force=force, recursive=aggressive)
+        RCLONE_REFRESHES.inc(result="skipped" if refreshed is None else "refreshed")
+        if refreshed is not None:
+            RCLONE_REFRESH_DIRS.inc(len(refreshed))
+            shown = ", ".join(d or "/" for d in refreshed[:5])
+            log(f"[Watcher] ✓ vfs/refresh ejecutado ({len(refreshed)} dirs: {shown})", on_log)
+            if aggressive:
+                log(f"[Watcher] 🔄 Refresco AGRESIVO (recursivo) de directorios candidatos", on_log)
+        return refreshed
+    except RcloneRCError as e:
+        RCLONE_REFRESHES.inc(result="error")
+        error_msg = str(e)
+        if "no responde" in error_msg:
+            log(f"[Watcher] 🔴 CRÍTICO: rclone rc NO activo (Puerto 5572 no responde)", on_log)
+            log(f"[Watcher] 🔴 Solución: Inicia rclone rc con: rclone rcd --rc-serve &", on_log)
         else:
-            error_msg = result.stderr or result.stdout
-            if "connection refused" in error_msg.lower() or "127.0.0.1:5572" in error_msg:
-                log(f"[Watcher] 🔴 CRÍTICO: rclone rc NO activo (Puerto 5572 no responde)", on_log)
-                log(f"[Watcher] 🔴 Solución: Inicia rclone rc con: rclone rcd --rc-serve &", on_log)
-            else:
-                log(f"[Watcher] ⚠️ vfs/forget error: {error_msg[:100]}", on_log)
-                return
-        
-        # 2. Clear-cache (si existe)
-        result = subprocess.run(["rclone", "rc", "vfs/clear-cache"], capture_output=True, timeout=5, text=True)
-        if result.returncode == 0:
-            log(f"[Watcher] ✓ vfs/clear-cache ejecutado", on_log)
-        
-        # 3. Flush writes para sincronizar
-        subprocess.run(["rclone", "rc", "vfs/forget", "mount=/mnt/torbox"], capture_output=True, timeout=5)
-        
-        if aggressive:
-            log(f"[Watcher] 🔄 Limpieza AGRESIVA: Flush y reset de stat caches...", on_log)
-            subprocess.run(["rclone", "rc", "cache/expire"], capture_output=True, timeout=5)
-            
-    except subprocess.TimeoutExpired:
-        log(f"[Watcher] ⚠️ rclone rc timeout", on_log)
+            log(f"[Watcher] ⚠️ vfs/refresh error: {error_msg[:100]}", on_log)
     except Exception as e:
+        RCLONE_REFRESHES.inc(result="error")
         log(f"[Watcher] ⚠️ Error conectando con rclone rc: {e}", on_log)
+    return None
 
 
 def start_watcher_thread(
@@ -184,31 +919,51 @@ def start_watcher_thread(
     season_number: int = None,
     episode_number: int = None,
     on_status: Optional[callable] = None,
-    get_status: Optional[callable] = None,
     original_title: str = "",
-    on_log: Optional[callable] = None
-):
+    on_log: Optional[callable] = None,
+    job_id: Optional[str] = None,
+    policy: Optional[PollingPolicy] = None,
+    tmdb_id: str = ""
+) -> WatchJob:
     """
-    Inicia la búsqueda en segundo plano y llama al callback con la ruta cuando la encuentra.
+    Encola la búsqueda en el scheduler compartido y llama al callback con la ruta cuando la encuentra.
+    Si ya hay una búsqueda de la misma release (o del mismo tmdb_id/temporada/episodio) se une a ella.
+    Cancelar/pausar se hace con get_scheduler().cancel/pause/resume(job_id).
     """
-    def run_watch():
-        se_str = f" S{season_number:02d}E{(episode_number or 0):02d}" if season_number else ""
-        log(f"[Watcher] Iniciando búsqueda: {title}{se_str} → '{expected_filename}'", on_log)
-        found_path = watch_for_file(
-            expected_filename, title, year, season_number, episode_number,
-            on_status=on_status, get_status=get_status, original_title=original_title, on_log=on_log
-        )
-        if found_path:
-            msg = f"¡Encontrado! {os.path.basename(found_path)}"
-            log(f"[Watcher] {msg}", on_log)
-            if on_status:
-                on_status("Found", msg)
-            callback(found_path, season_number)
-        else:
-            log(f"[Watcher] No se encontró '{expected_filename}' (Timeout).", on_log)
-            if on_status:
-                on_status("Error", "No se encontró el archivo (Timeout)")
+    se_str = f" S{season_number:02d}E{(episode_number or 0):02d}" if season_number else ""
+    log(f"[Watcher] Iniciando búsqueda: {title}{se_str} → '{expected_filename}'", on_log)
+    msg = f"Buscando archivo: '{expected_filename}'"
+    log(f"[Watcher] {msg}", on_log)
+    if on_status:
+        on_status("Searching", msg)
+
+    return get_scheduler().submit(WatchJob(
+        job_id or expected_filename, expected_filename, title, year, season_number, episode_number,
+        original_title, callback=callback, on_status=on_status, on_log=on_log, policy=policy, tmdb_id=tmdb_id
+    ))
+
+
+def start_season_watcher(
+    expected_filename: str,
+    title: str,
+    year: str,
+    season_number: int,
+    callback,
+    on_status: Optional[callable] = None,
+    original_title: str = "",
+    on_log: Optional[callable] = None,
+    job_id: Optional[str] = None,
+    policy: Optional[PollingPolicy] = None,
+    tmdb_id: str = ""
+) -> SeasonPackJob:
+    """
+    Encola la búsqueda de una temporada completa; el callback recibe ({episodio: ruta}, temporada).
+    """
+    log(f"[Watcher] Iniciando búsqueda de temporada: {title} T{season_number} → '{expected_filename}'", on_log)
+    if on_status:
+        on_status("Searching", f"Buscando pack de la temporada {season_number}...")
 
-    thread = threading.Thread(target=run_watch, daemon=True)
-    thread.start()
-    return thread
+    return get_scheduler().submit(SeasonPackJob(
+        job_id or f"{expected_filename}_season_{season_number}", expected_filename, title, year, season_number,
+        original_title=original_title, callback=callback, on_status=on_status, on_log=on_log, policy=policy, tmdb_id=tmdb_id
+    ))
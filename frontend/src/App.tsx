@@ -77,6 +77,8 @@ export default function App() {
 
     const [streams, setStreams] = useState<any[]>([]);
     const [loadingStreams, setLoadingStreams] = useState(false);
+    const [streamsHasMore, setStreamsHasMore] = useState(false);
+    const streamsQueryRef = useRef<any>(null); // Última consulta de streams (para paginar)
 
     // -- New Library State --
     const [activeTab, setActiveTab] = useState<'search' | 'library'>('search');
@@ -106,6 +108,8 @@ export default function App() {
     const [expandedJobLog, setExpandedJobLog] = useState<string | null>(null); // Currently expanded job
     const jobLogSinceRef = useRef<Record<string, number>>({});               // Cursor per job
     const jobLogsEndRef = useRef<HTMLDivElement>(null);
+    const eventsConnectedRef = useRef<boolean>(false);                        // SSE activo: el polling queda como respaldo
+    const notificationSeqRef = useRef<number>(0);                             // Último aviso visto (SSE o polling)
     const lastRcloneStatusRef = useRef<string>("checking");
     const [streamCacheStatuses, setStreamCacheStatuses] = useState<Record<string, boolean>>({}); // Cache status per stream URL
 
@@ -150,6 +154,66 @@ export default function App() {
             });
     }, []);
 
+    const fetchJobLogs = (id: string) => {
+        const since = jobLogSinceRef.current[id] || 0;
+        fetch(`${API_BASE}/jobs/${id}/logs?since=${since}`)
+            .then(r => r.json())
+            .then(d => {
+                if (d.logs && d.logs.length > 0) {
+                    setJobLogs(prev => ({ ...prev, [id]: [...(prev[id] || []), ...d.logs] }));
+                    jobLogSinceRef.current[id] = d.total;
+                }
+            }).catch(() => { });
+    };
+
+    // Stream de eventos (SSE): estado de trabajos, logs por trabajo y notificaciones en tiempo real.
+    // EventSource reconecta solo y envía Last-Event-ID para retomar desde el último evento recibido.
+    useEffect(() => {
+        if (setupMode || checkingStatus || typeof EventSource === 'undefined') return;
+        const source = new EventSource(`${API_BASE}/events`);
+        source.onopen = () => { eventsConnectedRef.current = true; };
+        source.onerror = () => { eventsConnectedRef.current = false; };
+
+        source.addEventListener('snapshot', (e: MessageEvent) => {
+            const d = JSON.parse(e.data);
+            setActiveDownloads(d.jobs || {});
+            // Recuperar por HTTP las líneas de log que se perdieron mientras no estábamos conectados
+            Object.entries(d.logs_total || {}).forEach(([id, total]: [string, any]) => {
+                if ((jobLogSinceRef.current[id] || 0) < total) fetchJobLogs(id);
+            });
+        });
+        source.addEventListener('job', (e: MessageEvent) => {
+            const d = JSON.parse(e.data);
+            setActiveDownloads(prev => ({ ...prev, [d.job_id]: { ...(prev[d.job_id] || {}), ...d.changes } }));
+        });
+        source.addEventListener('job_removed', (e: MessageEvent) => {
+            const d = JSON.parse(e.data);
+            setActiveDownloads(prev => {
+                const next = { ...prev };
+                delete next[d.job_id];
+                return next;
+            });
+        });
+        source.addEventListener('job_log', (e: MessageEvent) => {
+            const d = JSON.parse(e.data);
+            setJobLogs(prev => ({ ...prev, [d.job_id]: [...(prev[d.job_id] || []), d.line] }));
+            jobLogSinceRef.current[d.job_id] = d.total;
+        });
+        source.addEventListener('notification', (e: MessageEvent) => {
+            const d = JSON.parse(e.data);
+            if (d.seq) notificationSeqRef.current = Math.max(notificationSeqRef.current, d.seq);
+            setNotifications(prev => [...prev, d.message]);
+            setTimeout(() => {
+                setNotifications(prev => prev.slice(1));
+            }, 5000);
+        });
+
+        return () => {
+            eventsConnectedRef.current = false;
+            source.close();
+        };
+    }, [setupMode, checkingStatus]);
+
     // Global Logs and Status Poller
     useEffect(() => {
         if (setupMode || checkingStatus) return;
@@ -169,10 +233,14 @@ export default function App() {
                     setRcloneReason("backend_unreachable");
                 });
 
+            // Notificaciones y descargas llegan por SSE; el polling solo es respaldo
+            if (eventsConnectedRef.current) return;
+
             // Polling de notificaciones
-            fetch(`${API_BASE}/notifications`)
+            fetch(`${API_BASE}/notifications?since=${notificationSeqRef.current}`)
                 .then(r => r.json())
                 .then(d => {
+                    if (d.last_seq) notificationSeqRef.current = Math.max(notificationSeqRef.current, d.last_seq);
                     if (d.messages && d.messages.length > 0) {
                         setNotifications(prev => [...prev, ...d.messages]);
                         setTimeout(() => {
@@ -209,17 +277,10 @@ export default function App() {
     useEffect(() => {
         if (setupMode || checkingStatus) return;
         const jobLogInterval = setInterval(() => {
+            if (eventsConnectedRef.current) return; // Con SSE los logs llegan en tiempo real
             Object.entries(activeDownloads).forEach(([id, job]: [string, any]) => {
                 if (job.status === 'Completed' || job.status === 'Error' || job.status === 'Cancelled') return;
-                const since = jobLogSinceRef.current[id] || 0;
-                fetch(`${API_BASE}/jobs/${id}/logs?since=${since}`)
-                    .then(r => r.json())
-                    .then(d => {
-                        if (d.logs && d.logs.length > 0) {
-                            setJobLogs(prev => ({ ...prev, [id]: [...(prev[id] || []), ...d.logs] }));
-                            jobLogSinceRef.current[id] = d.total;
-                        }
-                    }).catch(() => { });
+                fetchJobLogs(id);
             });
         }, 3000); // Poll más rápido (3s) para logs en tiempo real
         return () => clearInterval(jobLogInterval);
@@ -718,6 +779,31 @@ export default function App() {
         }
     };
 
+    // Una sola petición para muchos episodios: el backend lista cada carpeta de temporada una vez
+    const checkSymlinksBatch = async (item: any, seasonNumber: number, episodeNumbers: number[]) => {
+        try {
+            const res = await fetch(`${API_BASE}/symlink/exists/batch`, {
+                method: "POST",
+                headers: { "Content-Type": "application/json" },
+                body: JSON.stringify({
+                    items: episodeNumbers.map(ep => ({
+                        title: item.title,
+                        original_title: item.original_title,
+                        year: item.year,
+                        media_type: item.media_type,
+                        tmdb_id: item.id || item.tmdb_id,
+                        season_number: seasonNumber,
+                        episode_number: ep
+                    }))
+                })
+            });
+            const data = await res.json();
+            return (data.results || []) as boolean[];
+        } catch {
+            return episodeNumbers.map(() => false);
+        }
+    };
+
     const handleSelect = async (item: any) => {
         setSelectedItem(item);
         setMediaDetails(null);
@@ -749,7 +835,7 @@ export default function App() {
                     handleSeasonSelect(item, data.seasons[0].season_number);
                 } else if (item.media_type === 'movie') {
                     // Si es película, traemos streams de una vez (opcional, o ponemos un botón)
-                    fetchStreams(item.media_type, item.id);
+                    fetchStreams(item.media_type, item.id, { ...item, original_title: data.original_title || item.original_title });
                 }
             }
         } catch (err) {
@@ -774,46 +860,54 @@ export default function App() {
                 setEpisodes(foundEpisodes);
 
                 // Batch check symlinks for the season
-                foundEpisodes.forEach(async (ep: any) => {
-                    const exists = await checkSymlink(media_item, seasonNumber, ep.episode_number);
-                    if (exists) {
-                        setEpisodeSyncStatus(prev => ({ ...prev, [ep.episode_number]: 'synced' }));
-                    }
-                });
+                const episodeNumbers = foundEpisodes.map((ep: any) => ep.episode_number);
+                if (episodeNumbers.length > 0) {
+                    const results = await checkSymlinksBatch(media_item, seasonNumber, episodeNumbers);
+                    const synced: Record<number, 'synced'> = {};
+                    episodeNumbers.forEach((ep: number, i: number) => {
+                        if (results[i]) synced[ep] = 'synced';
+                    });
+                    setEpisodeSyncStatus(prev => ({ ...prev, ...synced }));
+                }
             }
         } catch (err) {
             addLog(`Error al obtener episodios de S${seasonNumber}: ${err}`);
         }
     };
 
-    const fetchStreams = async (mediaType: string, tmdbId: number | string) => {
+    const fetchStreams = async (mediaType: string, tmdbId: number | string, meta: any = selectedItem, page: number = 1) => {
         setLoadingStreams(true);
-        setStreams([]);
-        setStreamCacheStatuses({});
-        addLog(`Obteniendo fuentes de AIOStreams para ID: ${tmdbId}`);
+        if (page === 1) {
+            setStreams([]);
+            setStreamCacheStatuses({});
+            addLog(`Obteniendo fuentes de AIOStreams para ID: ${tmdbId}`);
+        }
+        streamsQueryRef.current = { mediaType, tmdbId, meta, page };
         try {
-            const res = await fetch(`${API_BASE}/streams/${mediaType}/${tmdbId}`);
+            // El backend parsea, puntúa y ordena los streams; aquí solo pedimos la página
+            const params = new URLSearchParams({
+                title: meta?.title || '',
+                original_title: meta?.original_title || '',
+                year: meta?.year ? String(meta.year) : '',
+                page: String(page),
+                page_size: '50'
+            });
+            const res = await fetch(`${API_BASE}/streams/${mediaType}/${tmdbId}?${params}`);
             if (res.ok) {
                 const data = await res.json();
                 const fetchedStreams = data.streams || [];
-                setStreams(fetchedStreams);
-                addLog(`${fetchedStreams.length} streams encontrados.`);
+                setStreams(prev => page === 1 ? fetchedStreams : [...prev, ...fetchedStreams]);
+                setStreamsHasMore(!!data.has_more);
+                if (page === 1) {
+                    addLog(`${data.total ?? fetchedStreams.length} streams encontrados (${data.facets?.cached ?? 0} en caché).`);
+                }
 
-                // Detectar caché por el indicador ⚡ en el nombre (AIOStreams marca con [TB⚡] los archivos en caché)
+                // El backend marca `cached` cuando AIOStreams pone ⚡ en el nombre ([TB⚡] = en caché de TorBox)
                 const cacheStatuses: Record<string, boolean> = {};
                 fetchedStreams.forEach((stream: any) => {
-                    const id = stream.url || stream.title;
-                    const streamName = stream.name || "";
-                    
-                    // Si el nombre contiene ⚡ está en caché según AIOStreams
-                    if (streamName.includes("⚡") || streamName.includes("[TB⚡]")) {
-                        cacheStatuses[id] = true;
-                        addLog(`Stream en caché detectado: ${streamName.substring(0, 50)}...`);
-                    } else {
-                        cacheStatuses[id] = false;
-                    }
+                    cacheStatuses[stream.url || stream.title] = !!stream.cached;
                 });
-                setStreamCacheStatuses(cacheStatuses);
+                setStreamCacheStatuses(prev => ({ ...prev, ...cacheStatuses }));
             }
         } catch (err) {
             addLog(`Error al obtener streams: ${err}`);
@@ -822,6 +916,11 @@ export default function App() {
         }
     };
 
+    const fetchMoreStreams = () => {
+        const q = streamsQueryRef.current;
+        if (q && !loadingStreams) fetchStreams(q.mediaType, q.tmdbId, q.meta, q.page + 1);
+    };
+
     const getFilenameEstimate = (stream: any) => {
         const videoExts = ['.mkv', '.mp4', '.avi', '.ts', '.webm'];
         let filenameEstimate = stream.behaviorHints?.filename;
@@ -871,7 +970,7 @@ export default function App() {
         setTimeout(() => setGlobalNotification(null), 4000);
     };
 
-    const handleDownload = async (stream: any) => {
+    const handleDownload = async (stream: any, seasonPack: boolean = false) => {
         const streamId = stream.url || stream.title;
         setDownloadingStreamId(streamId);
 
@@ -897,11 +996,14 @@ export default function App() {
                     tmdb_id: selectedItem.id,
                     filename: filenameEstimate,
                     season_number: selectedItem.current_season,
-                    episode_number: selectedItem.current_episode
+                    episode_number: seasonPack ? null : selectedItem.current_episode,
+                    season_pack: seasonPack
                 })
             });
             addLog(`Instrucción enviada. Esperando a que Rclone monte el archivo...`);
-            showNotification(`¡Añadido! Buscando "${selectedItem.title}" en la nube...`, 'success');
+            showNotification(seasonPack
+                ? `¡Añadido! Buscando la temporada ${selectedItem.current_season} de "${selectedItem.title}"...`
+                : `¡Añadido! Buscando "${selectedItem.title}" en la nube...`, 'success');
 
             // setItem status locally to show feedback immediately
             if (selectedItem.media_type === 'tv' && selectedItem.current_episode) {
@@ -964,7 +1066,7 @@ export default function App() {
     };
 
     const renderStreamsList = () => {
-        if (loadingStreams) {
+        if (loadingStreams && streams.length === 0) {
             return (
                 <div className="flex flex-col items-center justify-center p-8 space-y-4">
                     <div className="animate-spin rounded-full h-8 w-8 border-t-2 border-b-2 border-amber-500"></div>
@@ -1010,6 +1112,17 @@ export default function App() {
                                     </div>
                                 )}
                             </div>
+                            {stream.pack && selectedItem?.media_type === 'tv' && selectedItem?.current_season && (
+                                <button
+                                    onClick={() => handleDownload(stream, true)}
+                                    disabled={isDownloading}
+                                    title="Enlazar todos los episodios del pack de una vez"
+                                    className="shrink-0 mr-2 flex items-center gap-2 font-bold px-3 py-2.5 rounded-lg bg-zinc-800 hover:bg-zinc-700 text-amber-400 border border-amber-500/20 transition-all active:scale-95"
+                                >
+                                    <Download className="w-4 h-4" />
+                                    Temporada
+                                </button>
+                            )}
                             <button
                                 onClick={() => handleDownload(stream)}
                                 disabled={isDownloading}
@@ -1040,6 +1153,15 @@ export default function App() {
                         </div>
                     );
                 })}
+                {streamsHasMore && (
+                    <button
+                        onClick={fetchMoreStreams}
+                        disabled={loadingStreams}
+                        className="w-full py-2.5 rounded-lg bg-zinc-900 border border-zinc-800 hover:border-amber-500/50 text-zinc-400 text-sm transition-all"
+                    >
+                        {loadingStreams ? "Cargando..." : "Mostrar más fuentes"}
+                    </button>
+                )}
             </div>
         );
     };